@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de modelos sinteticos en el formato de texto de 'InputParser'
+"""
+import random
+
+
+def generate_model(variables=10, values=5, rules=10000, depth=2, seed=0):
+    """
+    Genera el texto de un modelo con 'rules' reglas aleatorias
+
+    - variables: cantidad de variables de entrada (V0, V1, ...)
+    - values: cantidad de valores linguisticos de cada variable (L0, ...) y
+      de la variable de salida (S0, ...)
+    - depth: profundidad maxima de anidamiento de 'and'/'or'/'not' en los
+      encabezados (0: un solo 'Var = Valor')
+
+    """
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(variables):
+        for j in range(values):
+            lines.append('input: (V%d) (L%d) (triangulo: (%d,0) (%d,0) '
+                         '(%d,1))' % (i, j, j * 10, j * 10 + 20, j * 10 + 10))
+    for j in range(values):
+        lines.append('output: (Salida) (S%d) (triangulo: (%d,0) (%d,0) '
+                     '(%d,1))' % (j, j * 10, j * 10 + 20, j * 10 + 10))
+    for _ in range(rules):
+        atoms = []
+        head = generate_head(rnd, variables, values, depth, atoms)
+        # Como en un modelo real, el consecuente sigue a los valores del
+        # antecedente: asi la activacion de cada valor de salida depende de
+        # la fila y no se satura en 1 con muchas reglas
+        if atoms:
+            output = int(round(sum(atoms) / float(len(atoms))))
+        else:
+            output = rnd.randrange(values)
+        lines.append('rule: %s => S%d' % (head, output))
+    for i in range(variables):
+        lines.append('ini: V%d = %d' % (i, rnd.randrange(values * 10)))
+    return '\n'.join(lines) + '\n'
+
+
+def generate_head(rnd, variables, values, depth, atoms=None):
+    """
+    Genera un encabezado aleatorio de profundidad maxima 'depth'
+
+    La mayoria de los operadores son 'and'. Un 'not' solo aparece como
+    operando de un 'and' (por si solo se activaria con casi cualquier fila
+    y todas las salidas se saturarian en 1). Agrega a 'atoms' el indice del
+    valor de cada 'Var = Valor' que no esta negado
+
+    """
+    if depth <= 0 or rnd.random() < 0.2:
+        value = rnd.randrange(values)
+        if atoms is not None:
+            atoms.append(value)
+        return 'V%d = L%d' % (rnd.randrange(variables), value)
+
+    operator = 'or' if rnd.random() < 0.15 else 'and'
+    operands = []
+    for _ in range(rnd.randint(2, 3)):
+        if operator == 'and' and operands and rnd.random() < 0.15:
+            operands.append('not(%s)' % generate_head(rnd, variables, values,
+                                                      depth - 1))
+        else:
+            operands.append(generate_head(rnd, variables, values, depth - 1,
+                                          atoms))
+    return '(%s)' % (' %s ' % operator).join(operands)
+
+
+def generate_inputs(variables=10, values=5, rows=1000, seed=0):
+    """
+    Genera 'rows' diccionarios de valores iniciales para un modelo generado
+    con 'generate_model'
+
+    """
+    rnd = random.Random(seed)
+    top = values * 10 + 10
+    return [dict(('V%d' % i, rnd.uniform(0, top)) for i in range(variables))
+            for _ in range(rows)]
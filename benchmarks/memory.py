@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Mide la memoria de un modelo con muchas funciones de membresia y las
+asignaciones de memoria al evaluarlas
+
+    python -m benchmarks.memory --values 1000
+"""
+import argparse
+import gc
+import sys
+import time
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from benchmarks.generator import generate_model
+from fis.parser import InputParser
+
+
+def deep_size(obj, seen=None):
+    """
+    Tamano (en bytes) de 'obj' y de todo lo que referencia
+
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_size(item, seen)
+    elif not isinstance(obj, (str, bytes, int, float, type)):
+        if hasattr(obj, '__dict__'):
+            size += deep_size(obj.__dict__, seen)
+        for cls in type(obj).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if hasattr(obj, name):
+                    size += deep_size(getattr(obj, name), seen)
+    return size
+
+
+def evaluate_all(functions, values):
+    for function in functions:
+        for x in values:
+            function.evaluate(x)
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument('--variables', type=int, default=10)
+    arg_parser.add_argument('--values', type=int, default=1000)
+    arg_parser.add_argument('--points', type=int, default=20)
+    args = arg_parser.parse_args(args)
+
+    text = generate_model(args.variables, args.values, rules=0)
+    input_vars, output_var = InputParser().parse(text)[:2]
+    functions = [v.function for var in list(input_vars) + [output_var]
+                 for v in var.values]
+
+    size = deep_size(input_vars) + deep_size(output_var)
+    print('%d funciones: %d bytes (%.1f bytes/funcion)' % (
+        len(functions), size, size / float(len(functions))))
+
+    # Valores dentro de las funciones, para pasar por todas las rectas
+    top = args.values * 10 + 20
+    values = [top * (i + 0.5) / args.points for i in range(args.points)]
+    calls = len(functions) * len(values)
+
+    gc.collect()
+    start = time.time()
+    evaluate_all(functions, values)
+    elapsed = time.time() - start
+    print('%d evaluaciones en %.3f s (%.0f ns/evaluacion)' % (
+        calls, elapsed, elapsed * 1e9 / calls))
+
+    if tracemalloc is None:
+        print('Memoria temporal: tracemalloc no esta disponible')
+        return
+
+    # Memoria temporal maxima al evaluar (objetos creados en cada llamada)
+    tracemalloc.start()
+    evaluate_all(functions, values)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('Memoria temporal maxima al evaluar: %d bytes' % peak)
+
+if __name__ == '__main__':
+    main()
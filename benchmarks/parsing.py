@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Mide el tiempo de carga de modelos grandes con 'InputParser'
+
+    python -m benchmarks.parsing --rules 100000
+"""
+import argparse
+import time
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from benchmarks.generator import generate_model
+from fis.parser import InputParser
+
+
+def measure(text, repeat=3):
+    """
+    Devuelve el menor tiempo (en segundos) de 'repeat' cargas de 'text'
+
+    """
+    best = None
+    for _ in range(repeat):
+        f = StringIO(text)
+        start = time.time()
+        InputParser().parse(f)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument('--rules', type=int, default=100000)
+    arg_parser.add_argument('--variables', type=int, default=10)
+    arg_parser.add_argument('--values', type=int, default=5)
+    arg_parser.add_argument('--depth', type=int, default=2)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(args)
+
+    text = generate_model(args.variables, args.values, args.rules,
+                          args.depth)
+    lines = text.count('\n')
+    elapsed = measure(text, args.repeat)
+    print('%d lineas en %.3f s (%.0f lineas/s)' % (lines, elapsed,
+                                                   lines / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Mide el costo del perfilador: ejecucion sin perfilador frente a la
+evaluacion directa (sin pasar por la comprobacion de 'execute') y frente a
+la ejecucion con el perfilador activo
+
+    python -m benchmarks.profiling --rules 2000
+"""
+import argparse
+import time
+
+from benchmarks.generator import generate_model, generate_inputs
+from fis.core import FIS
+from fis.parser import InputParser
+from fis.profiling import Profiler
+
+
+def measure(function, inputs, repeat=3):
+    """
+    Devuelve el menor tiempo (en segundos) de 'repeat' pasadas de
+    'function' sobre todas las entradas
+
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        for input_values in inputs:
+            function(input_values)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument('--variables', type=int, default=10)
+    arg_parser.add_argument('--values', type=int, default=5)
+    arg_parser.add_argument('--rules', type=int, default=2000)
+    arg_parser.add_argument('--rows', type=int, default=500)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(args)
+
+    text = generate_model(args.variables, args.values, args.rules)
+    fis = FIS(*InputParser().parse(text)[:3])
+    inputs = generate_inputs(args.variables, args.values, args.rows)
+
+    def direct(input_values):
+        return fis.defuzzify(fis.activate(input_values))
+
+    baseline = measure(direct, inputs, args.repeat)
+    disabled = measure(fis.execute, inputs, args.repeat)
+    fis.profiler = Profiler()
+    enabled = measure(fis.execute, inputs, args.repeat)
+
+    for name, elapsed in (('directo', baseline),
+                          ('sin perfilador', disabled),
+                          ('con perfilador', enabled)):
+        print('%-16s %.3f s (%+.1f%%)' % (name, elapsed,
+                                          (elapsed / baseline - 1) * 100))
+
+
+if __name__ == '__main__':
+    main()
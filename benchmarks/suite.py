@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecuta todos los escenarios de rendimiento sobre un modelo sintetico y
+guarda los resultados en JSON
+
+    python -m benchmarks.suite --rules 10000 --output resultados.json
+    python -m benchmarks.suite --compare anteriores.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from benchmarks.generator import generate_model, generate_inputs
+from fis.core import FIS
+from fis.parser import InputParser
+
+# Metricas en las que un valor mayor es mejor (en el resto, menor es mejor)
+HIGHER_IS_BETTER = ('batch_rows_per_second',)
+
+
+def percentile(values, p):
+    """
+    Percentil 'p' (0-100) de 'values', por el metodo del rango mas cercano
+
+    """
+    values = sorted(values)
+    rank = int(round(p / 100.0 * (len(values) - 1)))
+    return values[rank]
+
+
+def parse_time(text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        model = InputParser().parse(StringIO(text))
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, FIS(*model[:3])
+
+
+def execute_latency(fis, inputs):
+    latencies = []
+    for input_values in inputs:
+        start = time.time()
+        fis.execute(input_values)
+        latencies.append(time.time() - start)
+    return latencies
+
+
+def batch_throughput(fis, inputs):
+    columns = dict((name, [row[name] for row in inputs])
+                   for name in inputs[0])
+    start = time.time()
+    fis.execute_batch(columns)
+    return len(inputs) / (time.time() - start)
+
+
+def peak_memory(text):
+    """
+    Memoria maxima (en bytes) al cargar y ejecutar el modelo, y el metodo
+    usado para medirla
+
+    """
+    if tracemalloc is not None:
+        tracemalloc.start()
+        fis = FIS(*InputParser().parse(StringIO(text))[:3])
+        fis.execute(generate_inputs(len(fis.input_vars), rows=1)[0])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak, 'tracemalloc'
+
+    if resource is not None:
+        # ru_maxrss esta en KB (en Linux) y abarca todo el proceso
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_maxrss * 1024, 'ru_maxrss'
+
+    return None, None
+
+
+def run(variables=10, values=5, rules=10000, depth=2, rows=1000,
+        repeat=3, seed=0):
+    """
+    Ejecuta todos los escenarios y devuelve un diccionario con los
+    resultados
+
+    """
+    text = generate_model(variables, values, rules, depth, seed)
+    inputs = generate_inputs(variables, values, rows, seed)
+
+    results = {}
+    results['parse_seconds'], fis = parse_time(text, repeat)
+
+    latencies = execute_latency(fis, inputs)
+    results['execute_p50_seconds'] = percentile(latencies, 50)
+    results['execute_p99_seconds'] = percentile(latencies, 99)
+    results['execute_mean_seconds'] = sum(latencies) / len(latencies)
+
+    if numpy is not None:
+        results['batch_rows_per_second'] = batch_throughput(fis, inputs)
+
+    results['peak_memory_bytes'], method = peak_memory(text)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'variables': variables, 'values': values,
+                       'rules': rules, 'depth': depth, 'rows': rows,
+                       'repeat': repeat, 'seed': seed},
+        'memory_method': method,
+        'results': results,
+    }
+
+
+def compare(previous, current):
+    """
+    Devuelve una linea por metrica con el valor anterior, el actual y la
+    relacion entre ambos ('+' mejor, '-' peor)
+
+    """
+    lines = []
+    for name in sorted(current['results']):
+        new = current['results'][name]
+        old = previous['results'].get(name)
+        if old is None or new is None or not old:
+            continue
+        ratio = new / float(old)
+        better = ratio > 1 if name in HIGHER_IS_BETTER else ratio < 1
+        lines.append('%-24s %12.6g %12.6g %7.2fx %s' % (
+            name, old, new, ratio, '+' if better else '-'))
+    return lines
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument('--variables', type=int, default=10)
+    arg_parser.add_argument('--values', type=int, default=5)
+    arg_parser.add_argument('--rules', type=int, default=10000)
+    arg_parser.add_argument('--depth', type=int, default=2)
+    arg_parser.add_argument('--rows', type=int, default=1000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--output', '-o',
+                            help='fichero JSON de resultados (por defecto, '
+                                 'la salida estandar)')
+    arg_parser.add_argument('--compare',
+                            help='fichero JSON de una ejecucion anterior')
+    args = arg_parser.parse_args(args)
+
+    report = run(args.variables, args.values, args.rules, args.depth,
+                 args.rows, args.repeat, args.seed)
+
+    text = json.dumps(report, indent=2, sort_keys=True,
+                      separators=(',', ': '))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if previous['parameters'] != report['parameters']:
+            sys.stderr.write('Aviso: los parametros no coinciden\n')
+        if previous.get('memory_method') != report['memory_method']:
+            sys.stderr.write('Aviso: la memoria se midio de otra forma\n')
+        for line in compare(previous, report):
+            sys.stderr.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
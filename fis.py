@@ -1,13 +1,149 @@
 # -*- coding: utf-8 -*-
+"""
+Ejecuta un sistema de inferencia difusa
 
-if __name__ == '__main__':
+Sin argumentos, lee el modelo y los valores iniciales ('ini:') de 'in.txt'
+y muestra el resultado. Con '--input', evalua cada registro de un fichero
+CSV (o de la entrada estandar si es '-') y escribe los resultados a medida
+que se obtienen:
+
+    python fis.py modelo.txt --input datos.csv --chunk-size 1000
+
+Con '--serve', atiende peticiones JSON por TCP (ver 'fis.server'):
+
+    python fis.py modelo.txt --serve --port 8765
+
+Con '--watch', el servidor vuelve a cargar el modelo cuando cambia el
+fichero, sin reiniciar el proceso (ver 'fis.reload'):
+
+    python fis.py modelo.txt --serve --watch 1
+
+Con '--generate', escribe un modulo de Python independiente que evalua el
+modelo (ver 'fis.codegen'):
+
+    python fis.py modelo.txt --generate propina.py
+
+Con '--chain', los valores de salida de cada modelo son valores iniciales
+de los modelos siguientes (ver 'fis.pipeline'):
+
+    python fis.py calidad.txt --chain propina.txt --input datos.csv
+"""
+import argparse
+import sys
+
+
+def main(args=None):
     from fis.parser import InputParser
     from fis.core import FIS
+    from fis.stream import read_records, execute_stream, write_results
+
+    arg_parser = argparse.ArgumentParser(
+        description='Ejecuta un sistema de inferencia difusa')
+    arg_parser.add_argument('model', nargs='?', default='in.txt',
+                            help='fichero con el modelo (in.txt)')
+    arg_parser.add_argument('--input', '-i',
+                            help='fichero CSV con los valores de entrada '
+                                 '("-" para la entrada estandar)')
+    arg_parser.add_argument('--output', '-o',
+                            help='fichero CSV para los resultados')
+    arg_parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='registros evaluados en cada bloque')
+    arg_parser.add_argument('--delimiter', default=',',
+                            help='separador de columnas del CSV')
+    arg_parser.add_argument('--serve', action='store_true',
+                            help='atiende peticiones por TCP')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--max-batch-size', type=int, default=64,
+                            help='peticiones maximas por lote')
+    arg_parser.add_argument('--max-wait', type=float, default=0.002,
+                            help='espera maxima (segundos) de cada lote')
+    arg_parser.add_argument('--watch', type=float, metavar='SEGUNDOS',
+                            help='con --serve, recarga el modelo si cambia '
+                                 'el fichero (comprobandolo cada SEGUNDOS)')
+    arg_parser.add_argument('--optimize', action='store_true',
+                            help='optimiza la base de reglas antes de '
+                                 'ejecutar (ver fis.optimizer)')
+    arg_parser.add_argument('--generate', metavar='MODULO',
+                            help='escribe un modulo de Python que evalua '
+                                 'el modelo')
+    arg_parser.add_argument('--chain', metavar='MODELO', action='append',
+                            default=[],
+                            help='encadena otro modelo, que usa las salidas '
+                                 'de los anteriores como entradas')
+    args = arg_parser.parse_args(args)
+    if args.chain and (args.serve or args.generate):
+        arg_parser.error('--chain no admite --serve ni --generate')
+    if args.watch and (not args.serve or args.optimize):
+        arg_parser.error('--watch necesita --serve y no admite --optimize')
+
+    if args.watch:
+        from fis.reload import ModelHandle
+        from fis.server import serve
+        handle = ModelHandle(args.model)
+        handle.watch(args.watch)
+        try:
+            serve(handle, args.host, args.port,
+                  max_batch_size=args.max_batch_size,
+                  max_wait=args.max_wait)
+        finally:
+            handle.stop()
+        return
 
-    f = open('in.txt')
-    input_vars, output_var, rules, input_values = InputParser().parse(f)
+    with open(args.model) as f:
+        input_vars, output_var, rules, input_values = InputParser().parse(f)
+
+    if args.optimize:
+        from fis.optimizer import optimize_rules
+        rules, optimizer = optimize_rules(rules)
+        sys.stderr.write(optimizer.report() + '\n')
+
+    if args.generate:
+        from fis.codegen import write_module
+        write_module(args.generate, input_vars, output_var, rules)
+        return
 
     fis = FIS(input_vars, output_var, rules)
-    fis.execute(input_values)
 
-    print ''
+    if args.chain:
+        from fis.pipeline import Pipeline
+        systems = [fis]
+        for path in args.chain:
+            with open(path) as f:
+                model = InputParser().parse(f)
+            systems.append(FIS(*model[:3]))
+            input_values = dict(model[3], **input_values)
+        fis = Pipeline(systems)
+
+    if args.serve:
+        from fis.server import serve
+        serve(fis, args.host, args.port, max_batch_size=args.max_batch_size,
+              max_wait=args.max_wait)
+        return
+
+    if not args.input:
+        if args.chain:
+            input_values = dict((var.name, input_values[var.name])
+                                for var in fis.input_vars)
+        print(fis.execute(input_values))
+        return
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    target = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        records = read_records(source, args.delimiter)
+        results = execute_stream(fis, records, args.chunk_size)
+        names = [var.name for var in fis.input_vars]
+        outputs = [var.name for var in fis.output_vars]
+        write_results(results, target, names,
+                      outputs if len(outputs) > 1 else outputs[0],
+                      args.delimiter)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Agregacion y defuzzificacion exactas de funciones lineales a trozos
+
+Una funcion lineal a trozos se representa como una lista de puntos (x, y)
+ordenados por 'x'. Fuera de [primer punto, ultimo punto] la funcion vale 0.
+Dos puntos consecutivos con el mismo 'x' representan un salto vertical.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def clip(points, alpha):
+    """
+    Trunca (superiormente) la funcion 'points' por el valor 'alpha'
+
+    Equivale a la funcion 'truncate' de las funciones de membresia, pero
+    sin modificar ningun objeto
+
+    """
+    if alpha <= 0:
+        return []
+
+    result = [(points[0][0], min(points[0][1], alpha))]
+
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        # Si el segmento cruza la recta y = alpha, agregamos el punto de corte
+        if (y0 - alpha) * (y1 - alpha) < 0:
+            x = x0 + (alpha - y0) * (x1 - x0) / float(y1 - y0)
+            result.append((x, alpha))
+        result.append((x1, min(y1, alpha)))
+
+    return result
+
+
+def envelope(functions):
+    """
+    Devuelve la envolvente superior (maximo) de varias funciones lineales a
+    trozos como una nueva funcion lineal a trozos
+
+    Recorre de izquierda a derecha todos los extremos de los segmentos.
+    Entre dos extremos consecutivos cada funcion es una recta, por lo que la
+    envolvente solo puede cambiar de recta en los cortes entre ellas (ver
+    '_upper'). Con k puntos y a lo sumo 'a' funciones activas a la vez el
+    costo es O(k log k + k * a^2); 'a' es la cantidad de valores
+    linguisticos de la salida, por lo que suele ser pequeña.
+
+    """
+    functions = [f for f in functions if f and f[0][0] < f[-1][0]]
+    if not functions:
+        return []
+
+    # Eventos: cuando empieza y cuando termina cada funcion
+    events = []
+    for i, f in enumerate(functions):
+        events.append((f[0][0], 1, i))
+        events.append((f[-1][0], 0, i))
+    events.sort()
+
+    xs = sorted(set(x for f in functions for x, _ in f))
+    positions = [0] * len(functions)
+    active = set()
+    event = 0
+    result = []
+
+    for x0, x1 in zip(xs, xs[1:]):
+        while event < len(events) and events[event][0] <= x0:
+            _, starts, i = events[event]
+            if starts:
+                active.add(i)
+            else:
+                active.discard(i)
+            event += 1
+
+        # Valor de cada funcion activa en los extremos del intervalo
+        lines = [(0.0, 0.0)]
+        for i in active:
+            f = functions[i]
+            j = positions[i]
+            while f[j + 1][0] <= x0:
+                j += 1
+            positions[i] = j
+            lines.append(_line(f[j], f[j + 1], x0, x1))
+
+        for x, y in _upper(lines, x0, x1):
+            if result and result[-1] == (x, y):
+                continue
+            result.append((x, y))
+
+    return result
+
+
+def _line(p0, p1, x0, x1):
+    """
+    Valores en 'x0' y 'x1' de la recta que pasa por 'p0' y 'p1'
+
+    """
+    slope = (p1[1] - p0[1]) / float(p1[0] - p0[0])
+    return (p0[1] + (x0 - p0[0]) * slope, p0[1] + (x1 - p0[0]) * slope)
+
+
+def _upper(lines, x0, x1):
+    """
+    Puntos de la envolvente superior de varias rectas en [x0, x1]
+
+    Cada recta viene dada por sus valores (y0, y1) en los extremos. Cada
+    cambio de recta recorre todas las rectas: O(a^2) para 'a' rectas
+
+    """
+    def key(line):
+        return (line[0], line[1] - line[0])
+
+    current = max(lines, key=key)
+    t = 0.0
+    points = [(x0, current[0])]
+
+    while True:
+        best = None
+        slope = current[1] - current[0]
+        for line in lines:
+            other = line[1] - line[0]
+            if other <= slope:
+                continue
+            # Corte entre la recta actual y una con mayor pendiente
+            s = (current[0] - line[0]) / float(other - slope)
+            if t < s < 1 and (best is None or (s, -other) < best[0]):
+                best = ((s, -other), line)
+
+        if best is None:
+            break
+
+        t, current = best[0][0], best[1]
+        points.append((x0 + t * (x1 - x0),
+                       current[0] + t * (current[1] - current[0])))
+
+    points.append((x1, current[1]))
+    return points
+
+
+def centroid(points):
+    """
+    Devuelve el centroide (centro de gravedad) de una funcion lineal a trozos
+
+    Se integra analiticamente cada segmento, por lo que el resultado es
+    exacto. Si el area es 0 se devuelve None
+
+    """
+    area, moment = integrate(points)
+    if area <= 0:
+        return None
+    return moment / area
+
+
+def integrate(points):
+    """
+    Devuelve una tupla (area, momento respecto al eje Y) de una funcion
+    lineal a trozos, integrando analiticamente cada segmento
+
+    """
+    area = 0.0
+    moment = 0.0
+
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        width = x1 - x0
+        area += width * (y0 + y1) / 2.0
+        moment += width * (x0 * (2 * y0 + y1) + x1 * (y0 + 2 * y1)) / 6.0
+
+    return area, moment
+
+
+def breakpoints(functions):
+    """
+    Devuelve una tupla (segmentos, cortes) de 'functions' (lista de
+    funciones lineales a trozos) para 'centroid_batch'
+
+    - segmentos: tupla de (p0, p1) con los segmentos no verticales
+    - cortes: tupla ordenada con los extremos de los segmentos y los cortes
+      entre segmentos de funciones distintas
+
+    Compara cada par de segmentos (O(s^2)), pero solo depende de las
+    funciones, por lo que se calcula una sola vez por variable de salida
+
+    """
+    segments = []
+    fixed = set()
+    for f in functions:
+        fixed.update(x for x, _ in f)
+        segments.extend((p0, p1) for p0, p1 in zip(f, f[1:])
+                        if p1[0] > p0[0])
+
+    for i, (p0, p1) in enumerate(segments):
+        for q0, q1 in segments[i + 1:]:
+            x = _intersection(p0, p1, q0, q1)
+            if x is not None:
+                fixed.add(x)
+
+    return tuple(segments), tuple(sorted(fixed))
+
+
+def centroid_batch(functions, alphas, fixed=None):
+    """
+    Centroide de la envolvente de 'functions' truncadas por 'alphas', para
+    muchas filas a la vez
+
+    - functions: lista de funciones lineales a trozos (listas de puntos)
+    - alphas: lista de arreglos (uno por funcion) con el valor de
+      truncamiento de cada fila
+    - fixed: lo devuelto por 'breakpoints(functions)', si ya se calculo
+
+    Entre dos puntos de corte consecutivos la envolvente es una recta, por lo
+    que basta con calcular todos los posibles puntos de corte de cada fila:
+    - Los extremos de los segmentos y los cortes entre segmentos de
+      funciones distintas (iguales para todas las filas)
+    - Los cortes de cada segmento con cada recta y = alpha
+
+    Devuelve un arreglo con el centroide de cada fila (NaN si el area es 0)
+
+    """
+    alphas = [numpy.asarray(a, dtype=float) for a in alphas]
+    rows = len(alphas[0]) if alphas else 0
+
+    if fixed is None:
+        fixed = breakpoints(functions)
+    segments, cuts = fixed
+
+    columns = [numpy.repeat(cuts, rows).reshape(-1, rows).T]
+
+    for p0, p1 in segments:
+        if p1[1] == p0[1]:
+            continue
+        slope = (p1[1] - p0[1]) / float(p1[0] - p0[0])
+        for alpha in alphas:
+            x = p0[0] + (alpha - p0[1]) / slope
+            x = numpy.where((x > p0[0]) & (x < p1[0]), x, p0[0])
+            columns.append(x[:, None])
+
+    xs = numpy.sort(numpy.hstack(columns), axis=1)
+    widths = numpy.diff(xs, axis=1)
+
+    # Como la envolvente es lineal en cada intervalo, con dos puntos
+    # interiores obtenemos su valor medio y su pendiente
+    q1 = xs[:, :-1] + widths / 4.0
+    q3 = xs[:, :-1] + 3 * widths / 4.0
+    y1 = _evaluate_envelope(functions, alphas, q1)
+    y3 = _evaluate_envelope(functions, alphas, q3)
+
+    middle = (q1 + q3) / 2.0
+    mean = (y1 + y3) / 2.0
+    slope = numpy.zeros(widths.shape)
+    numpy.divide(y3 - y1, widths / 2.0, out=slope, where=widths > 0)
+
+    area = (widths * mean).sum(axis=1)
+    moment = widths * (middle * mean + widths ** 2 * slope / 12.0)
+    moment = moment.sum(axis=1)
+
+    result = numpy.full(rows, numpy.nan)
+    numpy.divide(moment, area, out=result, where=area > 0)
+    return result
+
+
+def _intersection(p0, p1, q0, q1):
+    """
+    Coordenada 'x' del corte entre los segmentos p0-p1 y q0-q1 (o None)
+
+    """
+    start = max(p0[0], q0[0])
+    end = min(p1[0], q1[0])
+    if start >= end:
+        return None
+
+    sp = (p1[1] - p0[1]) / float(p1[0] - p0[0])
+    sq = (q1[1] - q0[1]) / float(q1[0] - q0[0])
+    if sp == sq:
+        return None
+
+    x = (q0[1] - p0[1] + sp * p0[0] - sq * q0[0]) / (sp - sq)
+    if start < x < end:
+        return x
+
+
+def _evaluate_envelope(functions, alphas, xs):
+    result = numpy.zeros(xs.shape)
+    for f, alpha in zip(functions, alphas):
+        values = numpy.interp(xs, [x for x, _ in f], [y for _, y in f],
+                              left=0, right=0)
+        numpy.maximum(result, numpy.minimum(values, alpha[:, None]),
+                      out=result)
+    return result
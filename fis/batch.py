@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def normalize_inputs(inputs, columns=None):
+    """
+    Convierte los valores de entrada en {nombre: arreglo 1-D}
+
+    """
+    if isinstance(inputs, dict):
+        return dict((name, numpy.asarray(values, dtype=float))
+                    for name, values in inputs.items())
+
+    inputs = numpy.asarray(inputs)
+
+    if inputs.dtype.names:
+        return dict((name, numpy.asarray(inputs[name], dtype=float))
+                    for name in inputs.dtype.names)
+
+    if columns is None or inputs.ndim != 2:
+        raise Exception('Un arreglo 2-D necesita el nombre de cada '
+                        'columna')
+    if len(columns) != inputs.shape[1]:
+        raise Exception('El numero de columnas no coincide')
+
+    return dict((name, numpy.asarray(inputs[:, i], dtype=float))
+                for i, name in enumerate(columns))
+
+
+class BatchVariables(object):
+    """
+    Valores de entrada de una evaluacion por lotes
+
+    Hace el mismo papel que 'VariableCollection' en la evaluacion de una
+    regla, pero cada variable toma un arreglo de valores (uno por fila) y
+    los grados de membresia son arreglos de NumPy. Cada grado de membresia
+    (y cada subexpresion comun a varias reglas) se calcula una sola vez por
+    lote.
+
+    Los valores de entrada pueden ser:
+    - Un diccionario {nombre de la variable: arreglo 1-D}
+    - Un arreglo estructurado de NumPy (con nombres de campos)
+    - Un arreglo 2-D junto con el nombre de cada columna ('columns')
+
+    """
+    def __init__(self, input_vars, inputs, columns=None):
+        if numpy is None:
+            raise ImportError('Se necesita NumPy para evaluar por lotes')
+
+        self.input_vars = input_vars
+        self.inputs = normalize_inputs(inputs, columns)
+        self.degrees = {}
+        self.shared = {}
+
+        sizes = set(len(v) for v in self.inputs.values())
+        if len(sizes) > 1:
+            raise Exception('Las variables de entrada tienen distinto '
+                            'numero de valores')
+        self.size = sizes.pop() if sizes else 0
+
+    def membership(self, variable, value):
+        """
+        Devuelve el arreglo de grados de membresia de la variable 'variable'
+        para el valor linguistico 'value'
+
+        """
+        key = (variable, value)
+        degrees = self.degrees.get(key)
+        if degrees is None:
+            definition = self.input_vars.get_definition(variable)
+            function = definition.get_value(value).function
+            degrees = function.evaluate_batch(self.inputs[variable])
+            self.degrees[key] = degrees
+        return degrees
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import OrderedDict
+
+
+class ResultCache(object):
+    """
+    Cache (LRU) de los resultados de 'FIS.execute'
+
+    Los valores de entrada se redondean segun la resolucion de cada variable
+    ('resolution', {variable: paso}; las variables sin resolucion se usan
+    tal cual) y el sistema se ejecuta con los valores redondeados, por lo que
+    todas las entradas que caen en la misma celda devuelven el mismo
+    resultado. Es decir, activar el cache cambia los resultados: un sistema
+    con cache no devuelve lo mismo que sin cache salvo que las entradas ya
+    esten en la cuadricula de 'resolution'.
+
+    Con varias variables de salida el resultado es un diccionario: se guarda
+    y se devuelve una copia, para que modificar el resultado recibido no
+    cambie los aciertos siguientes.
+
+    Contiene la siguiente informacion:
+    - Cantidad maxima de resultados guardados ('maxsize')
+    - Aciertos, fallos y resultados descartados ('hits', 'misses',
+      'evictions')
+
+    Un cache pertenece a un solo modelo: si se asocia a otro FIS (por
+    ejemplo, al reemplazar el modelo) se vacia, y a partir de ese momento
+    el modelo anterior (que puede seguir ejecutandose, ver 'fis.reload') no
+    lee ni guarda resultados en el.
+
+    """
+    def __init__(self, maxsize=1024, resolution=None):
+        self.maxsize = maxsize
+        self.resolution = resolution or {}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.model = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def bind(self, model):
+        """
+        Asocia el cache al modelo 'model', vaciandolo si era de otro
+
+        """
+        with self.lock:
+            if self.model is not model:
+                self.entries.clear()
+                self.model = model
+
+    def quantize(self, input_values):
+        """
+        Devuelve una tupla (llave, valores de entrada redondeados)
+
+        """
+        values = {}
+        for name, value in input_values.items():
+            step = self.resolution.get(name)
+            if step:
+                value = round(value / float(step)) * step
+            values[name] = value
+        return tuple(sorted(values.items())), values
+
+    def get(self, key, model=None):
+        """
+        Devuelve una tupla (encontrado, resultado)
+
+        Si se indica 'model' y no es el modelo asociado, nunca se encuentra
+
+        """
+        with self.lock:
+            if model is not None and model is not self.model:
+                self.misses += 1
+                return False, None
+            if key in self.entries:
+                # Lo movemos al final (el usado mas recientemente)
+                value = self.entries.pop(key)
+                self.entries[key] = value
+                self.hits += 1
+                if isinstance(value, dict):
+                    value = dict(value)
+                return True, value
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, model=None):
+        """
+        Guarda el resultado 'value' (salvo si 'model' no es el modelo
+        asociado)
+
+        """
+        with self.lock:
+            if model is not None and model is not self.model:
+                return
+            if isinstance(value, dict):
+                value = dict(value)
+            self.entries.pop(key, None)
+            self.entries[key] = value
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Devuelve un diccionario con los contadores del cache
+
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'size': len(self.entries),
+                    'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self.entries)
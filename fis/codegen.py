@@ -0,0 +1,457 @@
+# -*- coding: utf-8 -*-
+"""
+Generacion de codigo: convierte un modelo en un modulo de Python
+independiente
+
+El modulo generado no depende de 'fis' ni parsea nada al importarse: los
+parametros de las funciones de membresia quedan como constantes, las reglas
+como expresiones 'min'/'max' en linea recta (las subexpresiones comunes se
+calculan una sola vez, ver 'RuleSet') y la agregacion y el centroide se
+copian de 'fis.aggregation'. Expone:
+
+- evaluate(**inputs): valor concreto de la salida (None si no se activa
+  ninguna regla), igual que 'FIS.execute'
+- evaluate_batch(**inputs): lo mismo para columnas de valores (NumPy), igual
+  que 'FIS.execute_batch'
+- INPUTS, OUTPUT: nombres de las variables de entrada y de salida
+
+Ejemplo:
+    input_vars, output_var, rules, _ = InputParser().parse(f)
+    write_module('propina.py', input_vars, output_var, rules)
+
+    import propina
+    propina.evaluate(Servicio=3, Comida=8)
+"""
+import inspect
+
+from fis import aggregation
+from fis.compiler import Atom, And, Not, Shared, RuleSet
+from fis.definitions import VariableDefinition
+from fis.functions import (TriangularFunction, TrapezoidalFunction,
+                           PiecewiseLinearFunction, ShoulderFunction,
+                           GaussianFunction, BellFunction, SigmoidFunction,
+                           LinearFunction)
+from fis.sugeno import ConstantConsequent, LinearConsequent, is_sugeno
+
+
+# Funciones de 'fis.aggregation' que se copian al modulo generado
+AGGREGATION = ('clip', 'envelope', '_line', '_upper', 'centroid',
+               'integrate', 'breakpoints', 'centroid_batch',
+               '_intersection', '_evaluate_envelope')
+
+HEADER = '''\
+# -*- coding: utf-8 -*-
+"""
+Sistema de inferencia difusa '%(output)s' generado por 'fis.codegen'
+
+No modificar: volver a generarlo a partir del modelo
+"""
+import math
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INPUTS = %(inputs)r
+OUTPUT = %(output)r
+'''
+
+DEFUZZIFY = '''
+def _defuzzify(alphas):
+    """
+    Centroide de la envolvente de las funciones de salida truncadas por
+    'alphas' (ver 'FIS.defuzzify')
+
+    """
+    active = [i for i, alpha in enumerate(alphas) if alpha > 0]
+    if len(active) == 1:
+        i = active[0]
+        if LINEAR[i]:
+            value = centroid(clip(FUNCTIONS[i], alphas[i]))
+        else:
+            value = CENTROIDS[i]
+        if value is not None:
+            return value
+    return centroid(envelope([clip(f, alpha) for f, alpha in
+                              zip(FUNCTIONS, alphas)]))
+'''
+
+
+def number(value):
+    """
+    Literal de Python para el numero 'value'
+
+    """
+    return repr(float(value))
+
+
+def membership(function, x):
+    """
+    Expresion (escalar) del grado de membresia de 'function' en 'x'
+
+    Repite exactamente las comparaciones de 'evaluate' de cada funcion
+
+    """
+    if isinstance(function, TriangularFunction):
+        return ('0.0 if %(x)s <= %(l)s or %(x)s >= %(r)s else '
+                '((%(x)s - %(l)s) * %(up)s if %(x)s <= %(p)s else '
+                '(%(r)s - %(x)s) * %(down)s)' % {
+                    'x': x, 'l': number(function.left),
+                    'r': number(function.right),
+                    'p': number(function.peak), 'up': number(function.up),
+                    'down': number(function.down)})
+
+    if isinstance(function, TrapezoidalFunction):
+        return ('0.0 if %(x)s <= %(l)s or %(x)s >= %(r)s else '
+                '((%(x)s - %(l)s) * %(up)s if %(x)s < %(tl)s else '
+                '(%(h)s if %(x)s <= %(tr)s else (%(r)s - %(x)s) * %(down)s))'
+                % {'x': x, 'l': number(function.left),
+                   'r': number(function.right),
+                   'tl': number(function.top_left),
+                   'tr': number(function.top_right),
+                   'h': number(function.height), 'up': number(function.up),
+                   'down': number(function.down)})
+
+    if isinstance(function, PiecewiseLinearFunction):
+        xs, ys, slopes = function.xs, function.ys, function.slopes
+        # Un tramo por segmento, en el mismo orden que 'bisect_right'
+        expression = number(ys[-1])
+        for i in reversed(range(1, len(xs))):
+            expression = '%s + (%s - %s) * %s if %s < %s else (%s)' % (
+                number(ys[i - 1]), x, number(xs[i - 1]),
+                number(slopes[i - 1]), x, number(xs[i]), expression)
+        return '0.0 if %s < %s or %s > %s else (%s)' % (
+            x, number(xs[0]), x, number(xs[-1]), expression)
+
+    if isinstance(function, ShoulderFunction):
+        return ('%(ay)s if %(x)s <= %(ax)s else (%(by)s if %(x)s >= %(bx)s '
+                'else %(ay)s + (%(x)s - %(ax)s) * %(s)s)' % {
+                    'x': x, 'ax': number(function.a.x),
+                    'ay': number(function.a.y), 'bx': number(function.b.x),
+                    'by': number(function.b.y), 's': number(function.slope)})
+
+    if isinstance(function, GaussianFunction):
+        return '%s * math.exp((%s - %s) ** 2 * %s)' % (
+            number(function.height), x, number(function.mean),
+            number(function.scale))
+
+    if isinstance(function, BellFunction):
+        return '1 / (1 + abs((%s - %s) / %s) ** %s)' % (
+            x, number(function.c), number(function.a),
+            number(2 * function.b))
+
+    if isinstance(function, SigmoidFunction):
+        z = '%s * (%s - %s)' % (number(function.slope), x,
+                                number(function.center))
+        return ('1 / (1 + math.exp(-(%(z)s))) if %(z)s >= 0 else '
+                'math.exp(%(z)s) / (1 + math.exp(%(z)s))' % {'z': z})
+
+    raise Exception('No se puede generar codigo para la funcion: %s' %
+                    function)
+
+
+def membership_batch(function, x):
+    """
+    Igual que 'membership', pero sobre un arreglo de NumPy (repite
+    'evaluate_batch' de cada funcion)
+
+    """
+    if isinstance(function, TriangularFunction):
+        return ('numpy.where((%(x)s > %(l)s) & (%(x)s < %(r)s), '
+                'numpy.where(%(x)s <= %(p)s, (%(x)s - %(l)s) * %(up)s, '
+                '(%(r)s - %(x)s) * %(down)s), 0.0)' % {
+                    'x': x, 'l': number(function.left),
+                    'r': number(function.right),
+                    'p': number(function.peak), 'up': number(function.up),
+                    'down': number(function.down)})
+
+    if isinstance(function, TrapezoidalFunction):
+        return ('numpy.where((%(x)s > %(l)s) & (%(x)s < %(r)s), '
+                'numpy.where(%(x)s < %(tl)s, (%(x)s - %(l)s) * %(up)s, '
+                'numpy.where(%(x)s <= %(tr)s, %(h)s, '
+                '(%(r)s - %(x)s) * %(down)s)), 0.0)' % {
+                    'x': x, 'l': number(function.left),
+                    'r': number(function.right),
+                    'tl': number(function.top_left),
+                    'tr': number(function.top_right),
+                    'h': number(function.height), 'up': number(function.up),
+                    'down': number(function.down)})
+
+    if isinstance(function, PiecewiseLinearFunction):
+        return 'numpy.interp(%s, %r, %r, left=0, right=0)' % (
+            x, function.xs, function.ys)
+
+    if isinstance(function, ShoulderFunction):
+        return 'numpy.interp(%s, [%s, %s], [%s, %s])' % (
+            x, number(function.a.x), number(function.b.x),
+            number(function.a.y), number(function.b.y))
+
+    if isinstance(function, GaussianFunction):
+        return '%s * numpy.exp((%s - %s) ** 2 * %s)' % (
+            number(function.height), x, number(function.mean),
+            number(function.scale))
+
+    if isinstance(function, BellFunction):
+        return '1 / (1 + numpy.abs((%s - %s) / %s) ** %s)' % (
+            x, number(function.c), number(function.a),
+            number(2 * function.b))
+
+    if isinstance(function, SigmoidFunction):
+        return 'numpy.exp(-numpy.logaddexp(0, -%s * (%s - %s)))' % (
+            number(function.slope), x, number(function.center))
+
+    raise Exception('No se puede generar codigo para la funcion: %s' %
+                    function)
+
+
+def consequent(function, names):
+    """
+    Expresion de un consecuente Sugeno; 'names' es {variable: nombre local}
+
+    """
+    if isinstance(function, ConstantConsequent):
+        return number(function.value)
+    if isinstance(function, LinearConsequent):
+        terms = [number(function.constant)]
+        for name, coefficient in function.coefficients:
+            terms.append('%s * %s' % (number(coefficient), names[name]))
+        return '(%s)' % ' + '.join(terms)
+    raise Exception('Consecuente desconocido: %s' % function)
+
+
+class Generator(object):
+    """
+    Genera el codigo de las funciones 'evaluate' y 'evaluate_batch'
+
+    """
+    def __init__(self, input_vars, output_var, rules):
+        if not isinstance(output_var, VariableDefinition):
+            raise Exception('Solo se puede generar codigo para una variable '
+                            'de salida')
+        self.input_vars = input_vars
+        self.output_var = output_var
+        self.rules = list(rules)
+        self.sugeno = is_sugeno(output_var)
+        self.evaluators = RuleSet([rule.evaluator for rule in
+                                   self.rules]).evaluators
+
+        # Nombres locales de las variables de entrada
+        self.names = dict((var.name, 'x%d' % i)
+                          for i, var in enumerate(input_vars))
+
+    def source(self):
+        lines = [HEADER % {
+            'inputs': tuple(str(var.name) for var in self.input_vars),
+            'output': str(self.output_var.name)}]
+
+        if not self.sugeno:
+            for name in AGGREGATION:
+                lines.append('')
+                lines.append(inspect.getsource(getattr(aggregation, name)))
+            lines.append(self.constants())
+            lines.append(DEFUZZIFY)
+
+        lines.append(self.function(batch=False))
+        lines.append(self.function(batch=True))
+        return '\n'.join(lines)
+
+    def constants(self):
+        """
+        Puntos de las funciones de salida y centroides de las funciones
+        suaves truncadas (ver 'FIS.defuzzify')
+
+        """
+        functions = []
+        linear = []
+        centroids = []
+        for value in self.output_var.values:
+            function = value.function
+            functions.append(function.points())
+            linear.append(isinstance(function, LinearFunction))
+            centroids.append(None if linear[-1] else function.centroid(1))
+
+        return '\n'.join([
+            '',
+            'FUNCTIONS = %r' % (functions,),
+            'LINEAR = %r' % (tuple(linear),),
+            'CENTROIDS = %r' % (tuple(centroids),),
+            'BREAKPOINTS = %r' % (aggregation.breakpoints(functions),),
+        ])
+
+    def function(self, batch):
+        if batch:
+            lines = ['def evaluate_batch(**inputs):', '    """',
+                     '    Valor concreto de la salida para cada fila de '
+                     "'inputs'",
+                     '    ({variable: valores}); NaN si no se activa '
+                     'ninguna regla', '', '    """']
+        else:
+            lines = ['def evaluate(**inputs):', '    """',
+                     '    Valor concreto de la salida (None si no se activa '
+                     'ninguna regla)', '', '    """']
+
+        for var in self.input_vars:
+            if batch:
+                lines.append("    %s = numpy.asarray(inputs[%r], "
+                             "dtype=float)" % (self.names[var.name],
+                                               str(var.name)))
+            else:
+                lines.append('    %s = inputs[%r]' % (self.names[var.name],
+                                                      str(var.name)))
+        if batch:
+            lines.append('    rows = len(%s)' %
+                         self.names[self.input_vars[0].name])
+
+        # Grados de membresia (solo los que usan las reglas)
+        self.degrees = {}
+        self.shared = set()
+        self.batch = batch
+        self.lines = lines
+        strengths = ['r%d' % i for i in range(len(self.rules))]
+        for i, evaluator in enumerate(self.evaluators):
+            expression = self.expression(evaluator)
+            lines.append('    %s = %s' % (strengths[i], expression))
+
+        if self.sugeno:
+            self.weighted_average(strengths)
+        else:
+            self.activations(strengths)
+        return '\n'.join([''] + lines) + '\n'
+
+    def expression(self, node):
+        """
+        Devuelve la expresion del nodo 'node'; los grados de membresia y los
+        nodos compartidos se asignan antes a una variable local
+
+        """
+        if isinstance(node, Shared):
+            name = 's%d' % node.index
+            if node.index not in self.shared:
+                expression = self.expression(node.node)
+                self.lines.append('    %s = %s' % (name, expression))
+                self.shared.add(node.index)
+            return name
+
+        if isinstance(node, Atom):
+            key = (node.variable, node.value)
+            name = self.degrees.get(key)
+            if name is None:
+                definition = self.input_vars.get_definition(node.variable)
+                function = definition.get_value(node.value).function
+                x = self.names[definition.name]
+                name = self.degrees[key] = 'm%d' % len(self.degrees)
+                generate = membership_batch if self.batch else membership
+                self.lines.append('    # %s = %s' % (node.variable,
+                                                     node.value))
+                self.lines.append('    %s = %s' % (name,
+                                                   generate(function, x)))
+            return name
+
+        if isinstance(node, Not):
+            return '(1 - %s)' % self.expression(node.operand)
+
+        operands = [self.expression(o) for o in node.operands]
+        if isinstance(node, And):
+            operator = 'numpy.minimum' if self.batch else 'min'
+        else:
+            operator = 'numpy.maximum' if self.batch else 'max'
+        if self.batch:
+            # 'numpy.minimum' y 'numpy.maximum' solo aceptan dos operandos
+            expression = operands[0]
+            for operand in operands[1:]:
+                expression = '%s(%s, %s)' % (operator, expression, operand)
+            return expression
+        return '%s(%s)' % (operator, ', '.join(operands))
+
+    def activations(self, strengths):
+        """
+        Grado de activacion de cada valor de salida (el maximo entre sus
+        reglas) y defuzzificacion
+
+        """
+        alphas = []
+        for value in self.output_var.values:
+            rules = [strengths[i] for i, rule in enumerate(self.rules)
+                     if rule.output_var.value.value == value.value]
+            if not rules:
+                alphas.append('numpy.zeros(rows)' if self.batch else '0')
+            elif len(rules) == 1:
+                alphas.append(rules[0])
+            elif self.batch:
+                expression = rules[0]
+                for rule in rules[1:]:
+                    expression = 'numpy.maximum(%s, %s)' % (expression, rule)
+                alphas.append(expression)
+            else:
+                alphas.append('max(%s)' % ', '.join(rules))
+
+        self.lines.append('    alphas = [')
+        for value, alpha in zip(self.output_var.values, alphas):
+            self.lines.append('        %s,  # %s' % (alpha, value.value))
+        self.lines.append('    ]')
+        if self.batch:
+            self.lines.append('    return centroid_batch(FUNCTIONS, alphas, '
+                              'BREAKPOINTS)')
+        else:
+            self.lines.append('    return _defuzzify(alphas)')
+
+    def weighted_average(self, strengths):
+        """
+        Promedio de los consecuentes ponderado por el grado de activacion
+        de cada regla (ver 'FIS.weighted_average')
+
+        """
+        lines = self.lines
+        if self.batch:
+            lines.append('    total = numpy.zeros(rows)')
+            lines.append('    weighted = numpy.zeros(rows)')
+        else:
+            lines.append('    total = 0.0')
+            lines.append('    weighted = 0.0')
+
+        outputs = {}
+        for rule, strength in zip(self.rules, strengths):
+            value = rule.output_var.value
+            output = outputs.get(value.value)
+            if output is None:
+                output = outputs[value.value] = 'y%d' % len(outputs)
+                lines.append('    # %s' % value.value)
+                lines.append('    %s = %s' % (output, consequent(
+                    value.function, self.names)))
+            if self.batch:
+                lines.append('    total += %s' % strength)
+                lines.append('    weighted += %s * %s' % (strength, output))
+            else:
+                lines.append('    if %s:' % strength)
+                lines.append('        total += %s' % strength)
+                lines.append('        weighted += %s * %s' % (strength,
+                                                               output))
+
+        if self.batch:
+            lines.append('    result = numpy.full(rows, numpy.nan)')
+            lines.append('    numpy.divide(weighted, total, out=result, '
+                         'where=total > 0)')
+            lines.append('    return result')
+        else:
+            lines.append('    if total <= 0:')
+            lines.append('        return None')
+            lines.append('    return weighted / total')
+
+
+def generate(input_vars, output_var, rules):
+    """
+    Devuelve el codigo fuente del modulo generado para el modelo
+    ('input_vars', 'output_var' y 'rules', tal como los devuelve
+    'InputParser.parse')
+
+    """
+    return Generator(input_vars, output_var, rules).source()
+
+
+def write_module(path, input_vars, output_var, rules):
+    """
+    Escribe en 'path' el modulo generado para el modelo (ver 'generate')
+
+    """
+    with open(path, 'w') as f:
+        f.write(generate(input_vars, output_var, rules))
@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+import re
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Node(object):
+    """
+    Nodo (abstracto) del arbol de una regla compilada
+
+    Cada nodo se evalua directamente sobre numeros reales (grados de
+    membresia) sin necesidad de construir codigo ni llamar a 'eval'
+
+    """
+    __slots__ = ()
+
+    def evaluate(self, variables):
+        """
+        Devuelve un valor en el intervalo [0,1]
+
+        El parametro 'variables' debe tener un metodo
+        'membership(variable, valor)' que devuelva el grado de membresia
+        de la variable de entrada para ese valor linguistico
+        """
+        raise NotImplementedError()
+
+    def evaluate_batch(self, variables):
+        """
+        Igual que 'evaluate', pero 'variables.membership' devuelve arreglos
+        de NumPy y el resultado es un arreglo con un valor por fila
+
+        """
+        raise NotImplementedError()
+
+
+class Atom(Node):
+    """
+    Representa el texto 'Variable = Valor' de una regla
+
+    """
+    __slots__ = ('variable', 'value')
+
+    def __init__(self, variable, value):
+        self.variable = variable
+        self.value = value
+
+    def evaluate(self, variables):
+        return variables.membership(self.variable, self.value)
+
+    def evaluate_batch(self, variables):
+        return variables.membership(self.variable, self.value)
+
+    def __str__(self):
+        return '%s = %s' % (self.variable, self.value)
+
+
+class And(Node):
+    """
+    Conjuncion de varios operandos (minimo)
+
+    Deja de evaluar los operandos restantes en cuanto uno de ellos es 0
+
+    """
+    __slots__ = ('operands',)
+
+    def __init__(self, operands):
+        self.operands = operands
+
+    def evaluate(self, variables):
+        result = 1
+        for operand in self.operands:
+            value = operand.evaluate(variables)
+            if not value:
+                return 0
+            if value < result:
+                result = value
+        return result
+
+    def evaluate_batch(self, variables):
+        result = self.operands[0].evaluate_batch(variables)
+        for operand in self.operands[1:]:
+            result = numpy.minimum(result, operand.evaluate_batch(variables))
+        return result
+
+    def __str__(self):
+        return '(%s)' % ' and '.join(str(o) for o in self.operands)
+
+
+class Or(Node):
+    """
+    Disyuncion de varios operandos (maximo)
+
+    Deja de evaluar los operandos restantes en cuanto uno de ellos es 1
+
+    """
+    __slots__ = ('operands',)
+
+    def __init__(self, operands):
+        self.operands = operands
+
+    def evaluate(self, variables):
+        result = 0
+        for operand in self.operands:
+            value = operand.evaluate(variables)
+            if value >= 1:
+                return value
+            if value > result:
+                result = value
+        return result
+
+    def evaluate_batch(self, variables):
+        result = self.operands[0].evaluate_batch(variables)
+        for operand in self.operands[1:]:
+            result = numpy.maximum(result, operand.evaluate_batch(variables))
+        return result
+
+    def __str__(self):
+        return '(%s)' % ' or '.join(str(o) for o in self.operands)
+
+
+class Not(Node):
+    """
+    Negacion de un operando (1 - valor)
+
+    """
+    __slots__ = ('operand',)
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, variables):
+        return 1 - self.operand.evaluate(variables)
+
+    def evaluate_batch(self, variables):
+        return 1 - self.operand.evaluate_batch(variables)
+
+    def __str__(self):
+        return 'not(%s)' % self.operand
+
+
+class Shared(Node):
+    """
+    Subexpresion comun a varias reglas (o repetida en una misma regla)
+
+    Se evalua una sola vez por ejecucion: el resultado se guarda en el
+    diccionario 'shared' del contexto de la ejecucion, con la posicion del
+    nodo ('index') como llave
+
+    """
+    __slots__ = ('node', 'index')
+
+    def __init__(self, node, index):
+        self.node = node
+        self.index = index
+
+    def evaluate(self, variables):
+        value = variables.shared.get(self.index)
+        if value is None:
+            value = self.node.evaluate(variables)
+            variables.shared[self.index] = value
+        return value
+
+    def evaluate_batch(self, variables):
+        value = variables.shared.get(self.index)
+        if value is None:
+            value = self.node.evaluate_batch(variables)
+            variables.shared[self.index] = value
+        return value
+
+    def __str__(self):
+        return str(self.node)
+
+
+class RuleSet(object):
+    """
+    Compila los encabezados de todas las reglas en un unico grafo (DAG)
+
+    Los nodos equivalentes ('Var = Valor' iguales, o 'and'/'or'/'not' sobre
+    los mismos operandos, sin importar su orden) se representan con un solo
+    nodo. Los nodos compuestos que aparecen mas de una vez se envuelven en un
+    'Shared' para evaluarlos una sola vez por ejecucion; los 'Var = Valor' ya
+    se calculan una sola vez gracias a la tabla de grados del contexto.
+
+    Contiene la siguiente informacion:
+    - Evaluadores de cada regla, en el mismo orden ('evaluators')
+    - Cantidad de nodos de los arboles originales ('total_nodes')
+    - Cantidad de nodos distintos del grafo ('unique_nodes')
+    - Cantidad de nodos compartidos ('shared_nodes')
+    - Cantidad de nodos ahorrados ('saved_nodes')
+
+    El grafo puede actualizarse cuando cambian algunas reglas (ver
+    'update'): solo se compilan los encabezados nuevos.
+
+    """
+    def __init__(self, evaluators):
+        self.keys = {}
+        self.numbers = {}
+        self.counts = {}
+        self.total_nodes = 0
+        self.next_number = 0
+
+        self.sources = list(evaluators)
+        self.roots = [self.intern(node) for node in self.sources]
+
+        self.unique_nodes = len(self.keys)
+        self.saved_nodes = self.total_nodes - self.unique_nodes
+        self.shared_nodes = 0
+
+        self.built = {}
+        self.evaluators = [self.build(node, self.built)
+                           for node in self.roots]
+
+    @classmethod
+    def compiled(cls, evaluators, total_nodes, unique_nodes, shared_nodes):
+        """
+        Construye un RuleSet a partir de evaluadores que ya forman el grafo
+        (por ejemplo, al cargar un modelo compilado, ver 'fis.serialization')
+
+        Un RuleSet construido asi no se puede actualizar
+
+        """
+        rule_set = cls.__new__(cls)
+        rule_set.evaluators = evaluators
+        rule_set.total_nodes = total_nodes
+        rule_set.unique_nodes = unique_nodes
+        rule_set.saved_nodes = total_nodes - unique_nodes
+        rule_set.shared_nodes = shared_nodes
+        rule_set.roots = None
+        return rule_set
+
+    def update(self, evaluators):
+        """
+        Devuelve un RuleSet para los encabezados 'evaluators' reutilizando
+        este grafo
+
+        Las reglas cuyo encabezado ya estaba (el mismo objeto, como los que
+        devuelve 'InputParser' para un mismo texto) conservan su evaluador;
+        solo se agregan al grafo los encabezados nuevos y se liberan los que
+        ya no estan, por lo que el costo depende de la cantidad de reglas que
+        cambiaron. Este RuleSet se puede seguir evaluando, pero ya no se
+        puede actualizar.
+
+        """
+        if self.roots is None:
+            raise Exception('Este RuleSet no se puede actualizar')
+
+        previous = {}
+        for source, root, evaluator in zip(self.sources, self.roots,
+                                           self.evaluators):
+            previous.setdefault(id(source), []).append((root, evaluator))
+
+        # Las tablas del grafo pasan al RuleSet nuevo
+        rule_set = RuleSet.__new__(RuleSet)
+        for name in ('keys', 'numbers', 'counts', 'total_nodes',
+                     'next_number', 'shared_nodes', 'built'):
+            setattr(rule_set, name, getattr(self, name))
+        self.roots = None
+
+        rule_set.sources = list(evaluators)
+        rule_set.roots = []
+        rule_set.evaluators = []
+        for source in rule_set.sources:
+            found = previous.get(id(source))
+            if found:
+                root, evaluator = found.pop()
+            else:
+                root = rule_set.intern(source)
+                evaluator = rule_set.build(root, rule_set.built)
+            rule_set.roots.append(root)
+            rule_set.evaluators.append(evaluator)
+
+        for found in previous.values():
+            for root, _ in found:
+                rule_set.release(root)
+
+        rule_set.unique_nodes = len(rule_set.keys)
+        rule_set.saved_nodes = rule_set.total_nodes - rule_set.unique_nodes
+        return rule_set
+
+    def intern(self, node):
+        """
+        Devuelve el nodo canonico equivalente a 'node'
+
+        """
+        if isinstance(node, Shared):
+            return self.intern(node.node)
+
+        self.total_nodes += 1
+
+        if isinstance(node, Atom):
+            key = ('=', node.variable, node.value)
+        elif isinstance(node, Not):
+            operands = [self.intern(node.operand)]
+            key = ('not', self.numbers[id(operands[0])])
+        else:
+            # 'and' y 'or' son conmutativos: ordenamos los operandos
+            operands = sorted((self.intern(o) for o in node.operands),
+                              key=lambda o: self.numbers[id(o)])
+            key = (node.__class__.__name__,) + tuple(
+                self.numbers[id(o)] for o in operands)
+
+        canonical = self.keys.get(key)
+        if canonical is None:
+            if isinstance(node, Atom):
+                canonical = Atom(node.variable, node.value)
+            elif isinstance(node, Not):
+                canonical = Not(operands[0])
+            else:
+                canonical = node.__class__(operands)
+            self.keys[key] = canonical
+            self.numbers[id(canonical)] = self.next_number
+            self.next_number += 1
+
+        self.counts[id(canonical)] = self.counts.get(id(canonical), 0) + 1
+        return canonical
+
+    def release(self, node):
+        """
+        Deshace 'intern' para el nodo canonico 'node': los nodos que ya no
+        usa ninguna regla se eliminan del grafo
+
+        """
+        if isinstance(node, Atom):
+            key = ('=', node.variable, node.value)
+        elif isinstance(node, Not):
+            key = ('not', self.numbers[id(node.operand)])
+        else:
+            key = (node.__class__.__name__,) + tuple(
+                self.numbers[id(o)] for o in node.operands)
+
+        if isinstance(node, Not):
+            self.release(node.operand)
+        elif not isinstance(node, Atom):
+            for operand in node.operands:
+                self.release(operand)
+
+        self.total_nodes -= 1
+        count = self.counts[id(node)] - 1
+        if count:
+            self.counts[id(node)] = count
+            return
+        del self.keys[key]
+        del self.numbers[id(node)]
+        del self.counts[id(node)]
+        self.built.pop(id(node), None)
+
+    def build(self, node, built):
+        """
+        Construye el evaluador final de 'node', envolviendo en un 'Shared'
+        los nodos compuestos que se usan mas de una vez
+
+        Si el nodo ya estaba construido sin 'Shared' y ahora se usa mas de
+        una vez (al actualizar el grafo, ver 'update'), las reglas nuevas
+        usan un 'Shared' sobre el mismo evaluador
+
+        """
+        result = built.get(id(node))
+        if result is not None:
+            if (isinstance(result, Shared) or isinstance(node, Atom) or
+                    self.counts[id(node)] < 2):
+                return result
+            result = Shared(result, self.shared_nodes)
+            self.shared_nodes += 1
+            built[id(node)] = result
+            return result
+
+        if isinstance(node, Atom):
+            result = node
+        elif isinstance(node, Not):
+            result = Not(self.build(node.operand, built))
+        else:
+            result = node.__class__([self.build(o, built)
+                                     for o in node.operands])
+
+        if not isinstance(node, Atom) and self.counts[id(node)] > 1:
+            result = Shared(result, self.shared_nodes)
+            self.shared_nodes += 1
+
+        built[id(node)] = result
+        return result
+
+
+class RuleParser(object):
+    """
+    Parsea una regla y la convierte a código Python lista para evaluarse
+
+    """
+    pattern = re.compile(r'([A-Z]\w*)\s+=\s+([A-Z]\w*)')
+
+    def _replace(self, match):
+        """
+        Funcion que reemplaza el texto 'Variable = Valor'
+
+        Lo reemplaza por el codigo correspondiente en Python que se ejecutara
+        posteriormente
+
+        """
+        return 'variables.get_var("%s", "%s")' % (match.group(1),
+                                                  match.group(2))
+
+    def parse(self, head):
+        """
+        Parsea un encabezado y lo convierte a codigo Python
+        """
+        head = head.replace(' and ', ' & ').replace(' or ', ' | ')
+        head = head.replace('not(', '-(')
+        return self.pattern.sub(self._replace, head)
+
+
+class RuleCompiler(object):
+    """
+    Convierte el encabezado de una regla en un arbol de nodos
+
+    La precedencia de los operadores es la misma que tenia el codigo
+    generado por 'RuleParser': 'not' antes que 'and' y 'and' antes que 'or'
+
+    """
+    token_pattern = re.compile(
+        r'\s*(?:(\()|(\))|(and|or|not)\b|([A-Z]\w*)\s*=\s*([A-Z]\w*))')
+
+    def __init__(self):
+        self.atoms = {}
+
+    def compile(self, head):
+        """
+        Devuelve el nodo raiz correspondiente al encabezado 'head'
+
+        """
+        self.tokens = self.tokenize(head)
+        self.position = 0
+
+        node = self.parse_or()
+        if self.position != len(self.tokens):
+            raise Exception('Error compilando la regla: %s' % head)
+        return node
+
+    def tokenize(self, head):
+        tokens = []
+        position = 0
+        head = head.rstrip()
+
+        for m in self.token_pattern.finditer(head):
+            if m.start() != position:
+                break
+            position = m.end()
+
+            open_, close, operator, variable, value = m.groups()
+            if variable:
+                # Los nodos no se modifican, por lo que pueden compartirse
+                atom = self.atoms.get((variable, value))
+                if atom is None:
+                    atom = self.atoms[(variable, value)] = Atom(variable,
+                                                                value)
+                tokens.append(atom)
+            else:
+                tokens.append(open_ or close or operator)
+
+        if position != len(head):
+            raise Exception('Error compilando la regla: %s' % head)
+
+        return tokens
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise Exception('Fin inesperado de la regla')
+        self.position += 1
+        return token
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek() == 'or':
+            self.next()
+            operands.append(self.parse_and())
+        if len(operands) == 1:
+            return operands[0]
+        return Or(operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.peek() == 'and':
+            self.next()
+            operands.append(self.parse_not())
+        if len(operands) == 1:
+            return operands[0]
+        return And(operands)
+
+    def parse_not(self):
+        token = self.next()
+
+        if token == 'not':
+            return Not(self.parse_not())
+
+        if token == '(':
+            node = self.parse_or()
+            if self.next() != ')':
+                raise Exception('Se esperaba ")" en la regla')
+            return node
+
+        if isinstance(token, Atom):
+            return token
+
+        raise Exception('Token inesperado en la regla: %s' % token)
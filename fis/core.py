@@ -1,7 +1,18 @@
 # -*- coding: utf-8 -*-
-from fis.definitions import VariableCollection
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-from fis.parser import RuleEvaluator
+from fis.aggregation import (clip, envelope, centroid, centroid_batch,
+                             breakpoints)
+from fis.batch import BatchVariables
+from fis.compiler import RuleSet
+from fis.definitions import VariableDefinition
+from fis.index import RuleIndex
+from fis.parallel import execute_parallel
+from fis.session import Session
+from fis.sugeno import is_sugeno
 
 
 class FIS(object):
@@ -11,29 +22,426 @@ class FIS(object):
     Contiene la siguiente informacion:
     - Variables de entrada (VariableCollection)
     - Valores iniciales para cada variable de entrada (dictionary)
-    - Variable de salida (VariableDefinition)
+    - Variables de salida ('output_vars', lista de VariableDefinition) y la
+      primera de ellas ('output_var')
     - Reglas
+    - Encabezados de las reglas compilados en un unico grafo, compartiendo
+      las subexpresiones comunes (RuleSet)
+    - Indice de las reglas que pueden activarse para cada entrada (RuleIndex)
+    - Cache de resultados opcional (ResultCache)
+    - Perfilador opcional (ver 'fis.profiling')
+
+    Si los valores de la variable de salida son consecuentes Sugeno (ver
+    'fis.sugeno'), el sistema usa inferencia Takagi-Sugeno ('sugeno'): el
+    resultado es el promedio ponderado de los consecuentes de las reglas.
+
+    Con varias variables de salida, cada regla se aplica a una de ellas y
+    'execute' devuelve un diccionario {variable: valor}. Los grados de
+    membresia y de activacion de las reglas se calculan una sola vez para
+    todas las salidas (ver 'execute_outputs').
+
+    El modelo no se modifica al ejecutarlo: todo el estado de una ejecucion
+    se guarda en un contexto propio (ver 'EvaluationContext'), por lo que un
+    mismo FIS puede ejecutarse desde varios hilos a la vez.
 
     """
-    def __init__(self, input_vars, output_var, rules):
+    def __init__(self, input_vars, output_var, rules, rule_set=None,
+                 rule_index=None, cache=None, profiler=None):
         self.input_vars = input_vars
-        self.rules = rules
-        self.output_var = output_var
+        self.rules = tuple(rules)
+
+        # 'output_var' puede ser una variable o una lista de variables
+        if isinstance(output_var, VariableDefinition):
+            self.output_vars = [output_var]
+        else:
+            self.output_vars = list(output_var)
+        self.output_var = self.output_vars[0]
+        # Variable de salida a la que se aplica cada regla
+        self.targets = [rule.output_var.definition.name
+                        for rule in self.rules]
+
+        # Ambos pueden venir ya construidos (ver 'fis.serialization')
+        if rule_set is None:
+            rule_set = RuleSet([rule.evaluator for rule in self.rules])
+        self.rule_set = rule_set
+        if rule_index is None:
+            rule_index = RuleIndex(self.input_vars, rule_set.evaluators)
+        self.rule_index = rule_index
+
+        self.sugeno = is_sugeno(self.output_var)
+        self.profiler = profiler
+        # {variable de salida: (puntos, 'breakpoints')}, para
+        # 'centroid_batch' (solo dependen de las funciones de salida)
+        self.breakpoints = {}
+        for output_var in self.output_vars:
+            if not is_sugeno(output_var):
+                functions = [v.function.points() for v in output_var.values]
+                self.breakpoints[output_var.name] = (
+                    functions, breakpoints(functions))
+
+        self.cache = cache
+        if cache is not None:
+            cache.bind(self)
+
+    @property
+    def profiler(self):
+        """
+        Perfilador (ver 'fis.profiling'), o None
+
+        Las ejecuciones Sugeno o con varias variables de salida no pasan por
+        el perfilador, por lo que no se puede asignar en esos sistemas
+
+        """
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        if profiler is not None:
+            if self.sugeno:
+                raise Exception('El perfilador solo admite inferencia '
+                                'Mamdani')
+            if len(self.output_vars) > 1:
+                raise Exception('El perfilador solo admite una variable de '
+                                'salida')
+        self._profiler = profiler
 
     def execute(self, input_values):
         """
         Metodo principal, encargado de toda la ejecucion del sistema
 
+        Devuelve el valor concreto de la variable de salida (None si no se
+        activa ninguna regla), o {variable: valor} si hay varias variables
+        de salida
+
+        """
+        cache = self.cache
+        if cache is not None:
+            key, input_values = cache.quantize(input_values)
+            found, value = cache.get(key, self)
+            if found:
+                return value
+
+        if len(self.output_vars) > 1:
+            value = self.execute_outputs(input_values)
+        elif self.sugeno:
+            value = self.weighted_average(input_values)
+        elif self._profiler is not None:
+            value = self._profiler.execute(self, input_values)
+        else:
+            # Evaluamos cada una de las reglas
+            activations = self.activate(input_values)
+
+            # Truncamos c/ funcion, las agregamos y calculamos el centroide
+            value = self.defuzzify(activations)
+
+        if cache is not None:
+            cache.put(key, value, self)
+        return value
+
+    def execute_outputs(self, input_values):
         """
-        evaluator = RuleEvaluator()
+        Devuelve {variable: valor concreto} para cada variable de salida
+
+        Cada regla se evalua una sola vez (ver 'strengths'); despues se
+        agrega y defuzzifica cada variable de salida por separado (o se
+        calcula el promedio ponderado si es una salida Sugeno)
+
+        """
+        return self.evaluate(self.input_vars.context(input_values))
+
+    def evaluate(self, context):
+        """
+        Igual que 'execute_outputs', pero sobre un contexto ya creado (ver
+        'EvaluationContext'), que puede compartir la tabla de valores y de
+        grados de membresia con otros sistemas (ver 'fis.pipeline')
+
+        """
+        input_values = context.input
+        strengths = list(self.strengths(input_values, context))
+
+        result = {}
+        for output_var in self.output_vars:
+            if is_sugeno(output_var):
+                value = self.weighted(strengths, output_var, input_values)
+            else:
+                value = self.defuzzify(
+                    self.activations(strengths, output_var), output_var)
+            result[output_var.name] = value
+        return result
+
+    def defuzzify(self, activations, output_var=None):
+        """
+        Calcula el valor concreto de la variable de salida ('output_var', la
+        primera si no se indica) a partir del grado de activacion de cada uno
+        de sus valores linguisticos
+
+        La agregacion (maximo) y el centroide se calculan de forma exacta
+        sobre las funciones lineales a trozos (ver 'fis.aggregation')
 
-        # Guardamos los valores iniciales que toman las variables de entrada
-        for var, value in input_values.items():
-            self.input_vars.add_input(var, value)
+        Si solo se activa un valor linguistico no hace falta agregar: se usa
+        el centroide de su funcion truncada (ver 'centroid' en
+        'fis.functions', exacto tambien para las funciones suaves)
 
-        # Evaluamos cada una de las reglas y truncamos c/ funcion
-        for rule in self.rules:
-            result = evaluator.evaluate(self.input_vars, rule.head)
-            rule.output_var.truncate(result)
+        """
+        output_var = output_var or self.output_var
+        active = [v for v in output_var.values if activations[v.value] > 0]
+        if len(active) == 1:
+            value = active[0].function.centroid(activations[active[0].value])
+            if value is not None:
+                return value
+
+        return centroid(self.aggregate(activations, output_var))
+
+    def aggregate(self, activations, output_var=None):
+        """
+        Trunca la funcion de cada valor linguistico de salida por su grado
+        de activacion y devuelve la envolvente (maximo) de todas ellas
+
+        """
+        functions = []
+        for value in (output_var or self.output_var).values:
+            points = value.function.points()
+            functions.append(clip(points, activations[value.value]))
+
+        return envelope(functions)
+
+    def activate(self, input_values):
+        """
+        Devuelve el grado de activacion de cada valor linguistico de la
+        variable de salida (el maximo entre las reglas que lo tienen como
+        consecuente)
+
+        Solo se evaluan las reglas que pueden ser distintas de 0 (ver
+        'RuleIndex'); el resto no aporta nada a la agregacion
+
+        """
+        return self.activations(self.strengths(input_values),
+                                self.output_var)
+
+    def strengths(self, input_values, context=None):
+        """
+        Genera una tupla (indice de la regla, grado de activacion) por cada
+        regla que puede ser distinta de 0 (ver 'RuleIndex')
+
+        Si no se indica 'context', se crea uno nuevo para 'input_values'
+
+        """
+        if context is None:
+            context = self.input_vars.context(input_values)
+        evaluators = self.rule_set.evaluators
+
+        for i in self.rule_index.candidates(input_values):
+            yield i, evaluators[i].evaluate(context)
+
+    def activations(self, strengths, output_var):
+        """
+        Grado de activacion de cada valor linguistico de 'output_var' a
+        partir de lo generado por 'strengths'
+
+        """
+        activations = dict((v.value, 0) for v in output_var.values)
+        name = output_var.name
+
+        for i, result in strengths:
+            if self.targets[i] != name:
+                continue
+            value = self.rules[i].output_var.value.value
+            if result > activations[value]:
+                activations[value] = result
+
+        return activations
+
+    def activate_batch(self, inputs, columns=None):
+        """
+        Igual que 'activate', pero sobre muchas filas a la vez
+
+        Ver 'BatchVariables' para los formatos aceptados de 'inputs'.
+        Devuelve un arreglo de NumPy (uno por fila) por cada valor linguistico
+        de la variable de salida
+
+        """
+        variables = BatchVariables(self.input_vars, inputs, columns)
+        return self.activations_batch(self.strengths_batch(variables),
+                                      self.output_var, len(variables))
 
-        #TODO: Finish!
+    def activations_batch(self, strengths, output_var, rows):
+        """
+        Igual que 'activations', pero a partir de lo generado por
+        'strengths_batch'
+
+        """
+        activations = dict((v.value, numpy.zeros(rows))
+                           for v in output_var.values)
+        name = output_var.name
+
+        for i, result in strengths:
+            if self.targets[i] != name:
+                continue
+            current = activations[self.rules[i].output_var.value.value]
+            numpy.maximum(current, result, out=current)
+
+        return activations
+
+    def strengths_batch(self, variables):
+        """
+        Genera una tupla (indice de la regla, arreglo con su grado de
+        activacion en cada fila) por cada regla que puede activarse en
+        alguna fila de 'variables' (BatchVariables)
+
+        """
+        for i in range(len(self.rules)):
+            # Si algun (variable, valor) necesario es 0 en todas las filas,
+            # la regla no se activa en ninguna
+            if not all(variables.membership(*atom).any()
+                       for atom in self.rule_index.required[i]):
+                continue
+
+            yield i, self.rule_set.evaluators[i].evaluate_batch(variables)
+
+    def weighted_average(self, input_values):
+        """
+        Inferencia Takagi-Sugeno: promedio de los consecuentes de las reglas
+        ponderado por su grado de activacion
+
+        Cada consecuente se evalua una sola vez por ejecucion. Devuelve None
+        si no se activa ninguna regla
+
+        """
+        return self.weighted(self.strengths(input_values), self.output_var,
+                             input_values)
+
+    def weighted(self, strengths, output_var, input_values):
+        """
+        Promedio ponderado de los consecuentes de 'output_var' a partir de
+        lo generado por 'strengths' (ver 'weighted_average')
+
+        """
+        name = output_var.name
+        outputs = {}
+        total = 0.0
+        weighted = 0.0
+
+        for i, strength in strengths:
+            if not strength or self.targets[i] != name:
+                continue
+            value = self.rules[i].output_var.value
+            output = outputs.get(value.value)
+            if output is None:
+                output = value.function.evaluate(input_values)
+                outputs[value.value] = output
+            total += strength
+            weighted += strength * output
+
+        if total <= 0:
+            return None
+        return weighted / total
+
+    def weighted_average_batch(self, inputs, columns=None):
+        """
+        Igual que 'weighted_average', pero sobre muchas filas a la vez (NaN
+        en las filas en las que no se activa ninguna regla)
+
+        """
+        variables = BatchVariables(self.input_vars, inputs, columns)
+        return self.weighted_batch(self.strengths_batch(variables),
+                                   self.output_var, variables)
+
+    def weighted_batch(self, strengths, output_var, variables):
+        """
+        Igual que 'weighted', pero a partir de lo generado por
+        'strengths_batch'
+
+        """
+        name = output_var.name
+        outputs = {}
+        total = numpy.zeros(len(variables))
+        weighted = numpy.zeros(len(variables))
+
+        for i, strength in strengths:
+            if self.targets[i] != name:
+                continue
+            value = self.rules[i].output_var.value
+            output = outputs.get(value.value)
+            if output is None:
+                output = value.function.evaluate_batch(variables.inputs)
+                outputs[value.value] = output
+            total += strength
+            weighted += strength * output
+
+        result = numpy.full(len(variables), numpy.nan)
+        numpy.divide(weighted, total, out=result, where=total > 0)
+        return result
+
+    def execute_batch(self, inputs, columns=None):
+        """
+        Ejecuta el sistema sobre muchas filas de valores de entrada a la vez
+
+        Todos los grados de membresia, de activacion de las reglas y el
+        centroide se calculan como operaciones sobre arreglos completos de
+        NumPy. Devuelve un arreglo con el valor concreto de la variable de
+        salida para cada fila (NaN si no se activa ninguna regla), o
+        {variable: arreglo} si hay varias variables de salida
+
+        """
+        if len(self.output_vars) > 1:
+            return self.execute_outputs_batch(inputs, columns)
+        if self.sugeno:
+            return self.weighted_average_batch(inputs, columns)
+
+        activations = self.activate_batch(inputs, columns)
+        return self.centroid_batch(activations, self.output_var)
+
+    def execute_outputs_batch(self, inputs, columns=None):
+        """
+        Igual que 'execute_outputs', pero sobre muchas filas a la vez:
+        devuelve {variable: arreglo}
+
+        """
+        return self.evaluate_batch(
+            BatchVariables(self.input_vars, inputs, columns))
+
+    def evaluate_batch(self, variables):
+        """
+        Igual que 'evaluate', pero sobre muchas filas a la vez ('variables',
+        ver 'BatchVariables')
+
+        """
+        strengths = list(self.strengths_batch(variables))
+
+        result = {}
+        for output_var in self.output_vars:
+            if is_sugeno(output_var):
+                value = self.weighted_batch(strengths, output_var, variables)
+            else:
+                value = self.centroid_batch(self.activations_batch(
+                    strengths, output_var, len(variables)), output_var)
+            result[output_var.name] = value
+        return result
+
+    def centroid_batch(self, activations, output_var):
+        """
+        Centroide de la agregacion de 'output_var' en cada fila, a partir de
+        lo devuelto por 'activations_batch'
+
+        """
+        values = output_var.values
+        functions, fixed = self.breakpoints[output_var.name]
+        return centroid_batch(functions,
+                              [activations[v.value] for v in values], fixed)
+
+    def execute_parallel(self, inputs, workers=None, columns=None,
+                         chunk_size=None):
+        """
+        Igual que 'execute_batch', pero repartiendo las filas entre varios
+        procesos (ver 'fis.parallel')
+
+        """
+        return execute_parallel(self, inputs, workers, columns, chunk_size)
+
+    def session(self, input_values):
+        """
+        Devuelve una sesion para ejecutar el sistema de forma incremental a
+        partir de los valores iniciales 'input_values' (ver 'Session')
+
+        """
+        return Session(self, input_values)
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from copy import copy
+from fis.compiler import RuleCompiler, RuleParser
 
 
 class ValueDefinition(object):
@@ -11,6 +11,8 @@ class ValueDefinition(object):
     - Funciones de membresia de la variable para ese valor linguistico
 
     """
+    __slots__ = ('value', 'function')
+
     def __init__(self, value, function):
         self.value = value
         self.function = function
@@ -27,20 +29,34 @@ class VariableDefinition(object):
     - Nombre de la variable (ej. Calidad, Propina, etc.)
     - Valor de la variable (ver clase 'Value')
 
+    Los valores nuevos se agregan con 'add_value', que mantiene el indice
+    por nombre ('index'); si se modifica 'values' directamente hay que
+    llamar a 'build_index'.
+
     """
     def __init__(self, name, values=None):
         self.name = name
         if not values:
             values = []
         self.values = values
+        self.index = {}
+        self.build_index()
+
+    def build_index(self):
+        """
+        Construye el indice {valor linguistico: ValueDefinition}
+
+        Si hay valores repetidos se queda con el primero
+
+        """
+        self.index = dict((v.value, v) for v in reversed(self.values))
 
     def add_value(self, value):
         self.values.append(value)
+        self.index.setdefault(value.value, value)
 
     def get_value(self, value):
-        for v in self.values:
-            if v.value == value:
-                return v
+        return self.index.get(value)
 
     def __str__(self):
         return 'Definition: %s %s' % (self.name, self.values)
@@ -55,6 +71,8 @@ class Variable(object):
     - Valor de la variable (ver clase 'Value')
 
     """
+    __slots__ = ('definition', 'value')
+
     def __init__(self, definition, value):
         self.definition = definition
         self.value = value
@@ -64,16 +82,18 @@ class Variable(object):
 
 
 class OutputVariable(Variable):
+    __slots__ = ()
+
     def __init__(self, definition, value):
         super(OutputVariable, self).__init__(definition, value)
 
     def truncate(self, value):
         """
-        Trunca la funcion de membresia asociada a esta variable
+        Devuelve la funcion de membresia asociada a esta variable truncada
+        por 'value' (la definicion de la variable no se modifica)
 
         """
-        truncated_function = self.value.function.truncate(value)
-        self.value.function = truncated_function
+        return self.value.function.truncate(value)
 
 
 class InputVariable(Variable):
@@ -85,7 +105,11 @@ class InputVariable(Variable):
     - Valor inicial
     - Valor obtenido al evaluar la funcion de membresia en el valor inicial
       que tomó esta variable (ej. 0, 1, 0.2, etc.)
+
+    Los operadores devuelven uno de los operandos sin crear objetos nuevos
+    (salvo '-', que no puede modificar su operando)
     """
+    __slots__ = ('input_value', 'membership_value')
 
     def __init__(self, definition, value, input_value):
         super(InputVariable, self).__init__(definition, value)
@@ -96,17 +120,21 @@ class InputVariable(Variable):
     ### correspondiente en las reglas de la lógica de difusa
 
     def __and__(self, other):
-        d = {self.membership_value: self,
-             other.membership_value: other}
-        return d[min(self.membership_value, other.membership_value)]
+        # Ante un empate se devuelve 'other', igual que antes
+        if self.membership_value < other.membership_value:
+            return self
+        return other
 
     def __or__(self, other):
-        d = {self.membership_value: self,
-             other.membership_value: other}
-        return d[max(self.membership_value, other.membership_value)]
+        if self.membership_value > other.membership_value:
+            return self
+        return other
 
     def __neg__(self):
-        var = copy(self)
+        var = InputVariable.__new__(InputVariable)
+        var.definition = self.definition
+        var.value = self.value
+        var.input_value = self.input_value
         var.membership_value = 1 - self.membership_value
         return var
 
@@ -115,20 +143,69 @@ class VariableCollection(list):
     """
     Representa una lista de definiciones de variables linguisticas
 
+    Los metodos que agregan o quitan definiciones mantienen el indice por
+    nombre ('index')
+
     """
     def __init__(self, seq=()):
         super(VariableCollection, self).__init__(seq)
         self.input = {}
+        self.index = {}
+        self.build_index()
+
+    def build_index(self):
+        """
+        Construye el indice {nombre de la variable: VariableDefinition}
+
+        """
+        self.index = dict((var.name, var) for var in reversed(self))
+
+    def append(self, definition):
+        super(VariableCollection, self).append(definition)
+        self.index.setdefault(definition.name, definition)
+
+    def extend(self, definitions):
+        for definition in definitions:
+            self.append(definition)
+
+    def insert(self, position, definition):
+        super(VariableCollection, self).insert(position, definition)
+        self.build_index()
+
+    def remove(self, definition):
+        super(VariableCollection, self).remove(definition)
+        self.build_index()
+
+    def pop(self, position=-1):
+        definition = super(VariableCollection, self).pop(position)
+        self.build_index()
+        return definition
+
+    def get_definition(self, variable):
+        """
+        Devuelve la definicion de la variable de nombre 'variable' (None si
+        no existe)
+
+        """
+        return self.index.get(variable)
 
     def get_var(self, variable, value):
         """
         Devuelve la variable linguistica 'variable' con valor ling. 'valor'
 
         """
-        for var in self:
-            if var.name == variable:
-                return InputVariable(var, var.get_value(value),
-                    self.input[var.name])
+        var = self.get_definition(variable)
+        if var is not None:
+            return InputVariable(var, var.get_value(value),
+                self.input[var.name])
+
+    def membership(self, variable, value):
+        """
+        Devuelve el grado de membresia de la variable 'variable' para el
+        valor linguistico 'value' (sin construir un 'InputVariable')
+
+        """
+        return self.context(self.input).membership(variable, value)
 
     def add_input(self, var, value):
         """
@@ -138,15 +215,85 @@ class VariableCollection(list):
         - Calidad: 3
         - Servicio: 8
         - ...
+
+        Modifica la coleccion, por lo que no debe usarse si la coleccion es
+        compartida (ver 'context')
         """
         self.input[var] = value
 
+    def context(self, input_values):
+        """
+        Devuelve el contexto de una ejecucion con los valores iniciales
+        'input_values', sin modificar la coleccion
+
+        """
+        return EvaluationContext(self, input_values)
+
+
+class EvaluationContext(object):
+    """
+    Estado de una ejecucion del sistema
+
+    Guarda los valores iniciales de las variables de entrada de una sola
+    ejecucion y la tabla de grados de membresia ya calculados, indexada por
+    (variable, valor linguistico). Cada grado se calcula una sola vez por
+    ejecucion. Lo mismo ocurre con las subexpresiones comunes a varias
+    reglas ('shared', ver 'RuleSet').
+
+    El modelo (variables y reglas) no se modifica durante la evaluacion, por
+    lo que el mismo modelo puede ser utilizado por varios hilos a la vez,
+    cada uno con su propio contexto.
+
+    """
+    def __init__(self, input_vars, input_values):
+        self.input_vars = input_vars
+        self.input = input_values
+        self.degrees = {}
+        self.shared = {}
+
+    def membership(self, variable, value):
+        """
+        Devuelve el grado de membresia de la variable 'variable' para el
+        valor linguistico 'value'
+
+        """
+        key = (variable, value)
+        degree = self.degrees.get(key)
+        if degree is None:
+            definition = self.input_vars.get_definition(variable)
+            function = definition.get_value(value).function
+            degree = function.evaluate(self.input[variable])
+            self.degrees[key] = degree
+        return degree
+
 
 class Rule(object):
-    def __init__(self, orig_head, head, output_var):
-        self.head = head
+    """
+    Representa una regla del sistema
+
+    Contiene la siguiente informacion:
+    - Encabezado original ('orig_head') y su version en codigo Python ('head',
+      se genera la primera vez que se pide si no se especifica)
+    - Evaluador compilado del encabezado ('evaluator'), construido una sola
+      vez al cargar la regla
+    - Variable de salida (OutputVariable)
+
+    """
+    __slots__ = ('_head', 'orig_head', 'output_var', 'evaluator')
+
+    def __init__(self, orig_head, head, output_var, evaluator=None):
+        self._head = head
         self.orig_head = orig_head
         self.output_var = output_var
+        if evaluator is None:
+            evaluator = RuleCompiler().compile(orig_head)
+        self.evaluator = evaluator
+
+    @property
+    def head(self):
+        if self._head is None:
+            self._head = RuleParser().parse(self.orig_head)
+        return self._head
 
     def __str__(self):
         return '%s => %s' % (self.orig_head, self.output_var)
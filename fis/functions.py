@@ -1,11 +1,25 @@
 # -*- coding: utf-8 -*-
+import math
+from bisect import bisect_right
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from fis.aggregation import clip, integrate
 
 
 class Point(object):
     """
     Representa un punto en 2D
 
+    Las funciones de membresia precalculan sus pendientes a partir de sus
+    puntos, por lo que para cambiar una funcion hay que asignarle un punto
+    nuevo (no modificar 'x' o 'y' de uno existente)
+
     """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -19,7 +33,67 @@ class Point(object):
         return other.x == self.x and other.y == self.y
 
 
-class TriangularFunction(object):
+def _slope(height, width):
+    """
+    Pendiente de una recta que sube 'height' en 'width' (0 si es vertical)
+
+    """
+    if width <= 0:
+        return 0.0
+    return height / float(width)
+
+
+def _point(name):
+    """
+    Propiedad para un punto de una funcion: al asignar un punto nuevo se
+    vuelven a precalcular las pendientes
+
+    """
+    def set_point(self, point):
+        setattr(self, name, point)
+        self.precompute()
+    return property(lambda self: getattr(self, name), set_point)
+
+
+class LinearFunction(object):
+    """
+    Base de las funciones de membresia lineales a trozos definidas por
+    puntos (ver 'points'): su area y su centroide se integran de forma
+    exacta
+
+    """
+    __slots__ = ()
+
+    def area(self, alpha=1):
+        """
+        Area bajo la funcion truncada por 'alpha' (exacta)
+
+        """
+        return integrate(clip(self.points(), alpha))[0]
+
+    def centroid(self, alpha=1):
+        """
+        Centroide de la funcion truncada por 'alpha' (exacto, None si el
+        area es 0)
+
+        """
+        area, moment = integrate(clip(self.points(), alpha))
+        if area <= 0:
+            return None
+        return moment / area
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        """
+        Construye la funcion a partir de lo devuelto por 'parameters' (ver
+        'fis.serialization')
+
+        """
+        return cls(*[Point(parameters[i], parameters[i + 1])
+                     for i in range(0, len(parameters), 2)])
+
+
+class TriangularFunction(LinearFunction):
     """
     Representa una funcion de membresia triangular
 
@@ -29,10 +103,29 @@ class TriangularFunction(object):
     'c': tercer punto del triangulo (el que define su altura)
 
     """
+    __slots__ = ('_a', '_b', '_c', 'left', 'right', 'peak', 'up', 'down')
+
     def __init__(self, a, b, c):
-        self.a = a
-        self.b = b
-        self.c = c
+        self._a = a
+        self._b = b
+        self._c = c
+        self.precompute()
+
+    a = _point('_a')
+    b = _point('_b')
+    c = _point('_c')
+
+    def precompute(self):
+        """
+        Precalcula los extremos y las pendientes de las rectas 'ac' y 'cb',
+        para que 'evaluate' no tenga que crear ningun objeto
+
+        """
+        self.left = float(self._a.x)
+        self.right = float(self._b.x)
+        self.peak = float(self._c.x)
+        self.up = _slope(self._c.y, self.peak - self.left)
+        self.down = _slope(self._c.y, self.right - self.peak)
 
     def evaluate(self, value):
         """
@@ -41,18 +134,34 @@ class TriangularFunction(object):
         """
 
         # Si el valor esta fuera del triangulo
-        if value <= self.a.x or value >= self.b.x:
+        if value <= self.left or value >= self.right:
             return 0
 
-        # Usamos float para que la division no sea en enteros
-        value = float(value)
-
         # Si el valor caerá en la recta 'ac'
-        if self.a.x < value <= self.c.x:
-            return (value - self.a.x) / (self.c.x - self.a.x) * self.c.y
+        if value <= self.peak:
+            return (value - self.left) * self.up
 
         # Si el valor caerá en la recta 'cb'
-        return (self.b.x - value) / (self.b.x - self.c.x) * self.c.y
+        return (self.right - value) * self.down
+
+    def evaluate_batch(self, values):
+        """
+        Igual que 'evaluate', pero sobre un arreglo de NumPy de valores
+
+        """
+        values = numpy.asarray(values, dtype=float)
+        result = numpy.zeros(values.shape)
+        inside = (values > self.left) & (values < self.right)
+
+        # Recta 'ac'
+        mask = inside & (values <= self.peak)
+        result[mask] = (values[mask] - self.left) * self.up
+
+        # Recta 'cb'
+        mask = inside & (values > self.peak)
+        result[mask] = (self.right - values[mask]) * self.down
+
+        return result
 
     def truncate(self, value):
         """
@@ -85,11 +194,37 @@ class TriangularFunction(object):
         trapezoidal_function = TrapezoidalFunction(self.a, self.b, c, d)
         return trapezoidal_function
 
+    def points(self):
+        """
+        Devuelve la funcion como una lista de puntos (x, y) (ver
+        'fis.aggregation')
+
+        """
+        return [(float(self.a.x), 0.0),
+                (float(self.c.x), float(self.c.y)),
+                (float(self.b.x), 0.0)]
+
+    def support(self):
+        """
+        Devuelve el intervalo abierto (a, b) fuera del cual la funcion vale 0
+
+        """
+        return (self.a.x, self.b.x)
+
+    def parameters(self):
+        """
+        Devuelve los parametros de la funcion como una lista de numeros (ver
+        'fis.serialization')
+
+        """
+        return [float(v) for p in (self._a, self._b, self._c)
+                for v in (p.x, p.y)]
+
     def __str__(self):
         return "Triangular Function: %s %s %s" % (self.a, self.b, self.c)
 
 
-class TrapezoidalFunction(object):
+class TrapezoidalFunction(LinearFunction):
     """
     Representa una funcion de membresia trapezoidal
 
@@ -100,38 +235,100 @@ class TrapezoidalFunction(object):
     'd': punto que no esta sobre el eje X (mas a la derecha)
 
     """
+    __slots__ = ('_a', '_b', '_c', '_d', 'left', 'right', 'top_left',
+                 'top_right', 'height', 'up', 'down')
+
     def __init__(self, a, b, c, d):
-        self.a = a
-        self.b = b
-        self.c = c
-        self.d = d
+        self._a = a
+        self._b = b
+        self._c = c
+        self._d = d
+        self.precompute()
+
+    a = _point('_a')
+    b = _point('_b')
+    c = _point('_c')
+    d = _point('_d')
+
+    def precompute(self):
+        """
+        Precalcula los extremos y las pendientes de las rectas 'ac' y 'db',
+        para que 'evaluate' no tenga que crear ningun objeto
+
+        """
+        self.left = float(self._a.x)
+        self.right = float(self._b.x)
+        self.top_left = float(self._c.x)
+        self.top_right = float(self._d.x)
+        self.height = self._c.y
+        self.up = _slope(self._c.y, self.top_left - self.left)
+        self.down = _slope(self._d.y, self.right - self.top_right)
 
     def evaluate(self, value):
         # Si el valor esta fuera del trapecio
-        if value <= self.a.x or value >= self.b.x:
+        if value <= self.left or value >= self.right:
             return 0
 
-        # Usamos float para que la division no sea en enteros
-        value = float(value)
-
         # Si el valor caerá en la recta 'ac'
-        if self.a.x < value < self.c.x:
-            return TriangularFunction(
-                self.a,
-                Point(self.c.x, 0),
-                self.c
-            ).evaluate(value)
+        if value < self.top_left:
+            return (value - self.left) * self.up
 
         # Si el valor cae en la recta paralela al eje X
-        if self.c.x <= value <= self.d.x:
-            return self.c.y
+        if value <= self.top_right:
+            return self.height
+
+        # Sino, el valor caerá en la recta 'db'
+        return (self.right - value) * self.down
+
+    def evaluate_batch(self, values):
+        """
+        Igual que 'evaluate', pero sobre un arreglo de NumPy de valores
+
+        """
+        values = numpy.asarray(values, dtype=float)
+        result = numpy.zeros(values.shape)
+        inside = (values > self.left) & (values < self.right)
+
+        # Recta 'ac'
+        mask = inside & (values < self.top_left)
+        result[mask] = (values[mask] - self.left) * self.up
+
+        # Recta paralela al eje X
+        mask = inside & (values >= self.top_left) & (values <= self.top_right)
+        result[mask] = self.height
+
+        # Recta 'db'
+        mask = inside & (values > self.top_right)
+        result[mask] = (self.right - values[mask]) * self.down
+
+        return result
+
+    def points(self):
+        """
+        Devuelve la funcion como una lista de puntos (x, y) (ver
+        'fis.aggregation')
+
+        """
+        return [(float(self.a.x), 0.0),
+                (float(self.c.x), float(self.c.y)),
+                (float(self.d.x), float(self.d.y)),
+                (float(self.b.x), 0.0)]
+
+    def support(self):
+        """
+        Devuelve el intervalo abierto (a, b) fuera del cual la funcion vale 0
 
-        # Sino, el valor caerá en la recta 'cb'
-        return TriangularFunction(
-            Point(self.d.x, 0),
-            self.b,
-            self.d
-        ).evaluate(value)
+        """
+        return (self.a.x, self.b.x)
+
+    def parameters(self):
+        """
+        Devuelve los parametros de la funcion como una lista de numeros (ver
+        'fis.serialization')
+
+        """
+        return [float(v) for p in (self._a, self._b, self._c, self._d)
+                for v in (p.x, p.y)]
 
     def __str__(self):
         return "Trapezoidal Function: %s %s %s %s" % (self.a, self.b, self.c,
@@ -145,7 +342,8 @@ class TrapezoidalFunction(object):
         triangulo, truncando los dos triangulos de las esquinas del trapecio
         (DRY)
 
-        Retorna la funcion resultante con los puntos del trapecio modificados
+        Retorna una nueva funcion con los puntos del trapecio modificados (la
+        funcion original no se modifica)
         """
 
         # Si el valor esta por encima del triangulo o es cero
@@ -155,12 +353,470 @@ class TrapezoidalFunction(object):
         # Truncar el triangulo de la izquierda y coger el pto que nos interesa
         f1 = TriangularFunction(self.a, Point(self.c.x, 0), self.c)
         trap1 = f1.truncate(value)
-        self.c = trap1.c
 
         # Truncar el triangulo de la derecha y coger el pto que nos interesa
         f2 = TriangularFunction(Point(self.d.x, 0), self.b, self.d)
         trap2 = f2.truncate(value)
 
-        self.d = trap2.d
+        return TrapezoidalFunction(self.a, self.b, trap1.c, trap2.d)
+
+
+class PiecewiseLinearFunction(LinearFunction):
+    """
+    Representa una funcion de membresia lineal a trozos arbitraria
+    ('poligonal')
+
+    Los puntos deben estar ordenados por 'x' (dos puntos seguidos con el
+    mismo 'x' representan un salto vertical). Fuera del intervalo
+    [primer punto, ultimo punto] la funcion vale 0
+
+    """
+    __slots__ = ('vertices', 'xs', 'ys', 'slopes')
+
+    def __init__(self, *points):
+        if len(points) < 2:
+            raise Exception('Se necesitan al menos dos puntos')
+        xs = [float(p.x) for p in points]
+        if any(x1 < x0 for x0, x1 in zip(xs, xs[1:])):
+            raise Exception('Los puntos deben estar ordenados por "x"')
+
+        self.vertices = list(points)
+        self.xs = xs
+        self.ys = [float(p.y) for p in points]
+        self.slopes = [_slope(y1 - y0, x1 - x0) for x0, x1, y0, y1 in
+                       zip(xs, xs[1:], self.ys, self.ys[1:])]
+
+    def evaluate(self, value):
+        xs = self.xs
+        if value < xs[0] or value > xs[-1]:
+            return 0
+
+        i = bisect_right(xs, value)
+        if i == len(xs):
+            return self.ys[-1]
+        return self.ys[i - 1] + (value - xs[i - 1]) * self.slopes[i - 1]
+
+    def evaluate_batch(self, values):
+        """
+        Igual que 'evaluate', pero sobre un arreglo de NumPy de valores
+
+        """
+        values = numpy.asarray(values, dtype=float)
+        return numpy.interp(values, self.xs, self.ys, left=0, right=0)
+
+    def truncate(self, value):
+        """
+        Devuelve una nueva funcion truncada (superiormente) por 'value'
+
+        """
+        if value >= max(self.ys):
+            return self
+        if value <= 0:
+            return PiecewiseLinearFunction(Point(self.xs[0], 0),
+                                           Point(self.xs[-1], 0))
+        return PiecewiseLinearFunction(*[Point(x, y) for x, y in
+                                         clip(self.points(), value)])
+
+    def points(self):
+        """
+        Devuelve la funcion como una lista de puntos (x, y) (ver
+        'fis.aggregation')
+
+        """
+        return list(zip(self.xs, self.ys))
+
+    def support(self):
+        """
+        Devuelve el intervalo abierto fuera del cual la funcion vale 0
+
+        Si la funcion no vale 0 en un extremo, o empieza (termina) con un
+        salto vertical (puede no valer 0 justo en el extremo), el intervalo
+        no se cierra por ese lado (el indice de reglas necesita un
+        intervalo abierto)
+
+        """
+        xs, ys = self.xs, self.ys
+        low = xs[0] if ys[0] == 0 and xs[1] > xs[0] else float('-inf')
+        high = xs[-1] if ys[-1] == 0 and xs[-1] > xs[-2] else float('inf')
+        return (low, high)
+
+    def parameters(self):
+        return [v for x, y in zip(self.xs, self.ys) for v in (x, y)]
+
+    def __str__(self):
+        return "Piecewise Linear Function: %s" % ' '.join(
+            str(p) for p in self.vertices)
+
 
-        return self
+class ShoulderFunction(LinearFunction):
+    """
+    Representa una funcion de membresia abierta por los extremos ('hombro')
+
+    Vale 'a.y' a la izquierda de 'a', 'b.y' a la derecha de 'b' y es lineal
+    entre ambos puntos. Ejemplos:
+    - Hombro izquierdo: (0,1) (10,0)
+    - Hombro derecho: (90,0) (100,1)
+
+    Como no esta acotada no puede usarse en la variable de salida
+
+    """
+    __slots__ = ('a', 'b', 'slope')
+
+    def __init__(self, a, b):
+        if b.x < a.x:
+            raise Exception('Los puntos deben estar ordenados por "x"')
+        self.a = a
+        self.b = b
+        self.slope = _slope(b.y - a.y, b.x - a.x)
+
+    def evaluate(self, value):
+        if value <= self.a.x:
+            return self.a.y
+        if value >= self.b.x:
+            return self.b.y
+        return self.a.y + (value - self.a.x) * self.slope
+
+    def evaluate_batch(self, values):
+        """
+        Igual que 'evaluate', pero sobre un arreglo de NumPy de valores
+
+        """
+        values = numpy.asarray(values, dtype=float)
+        return numpy.interp(values, [self.a.x, self.b.x],
+                            [self.a.y, self.b.y])
+
+    def truncate(self, value):
+        """
+        Devuelve una nueva funcion truncada (superiormente) por 'value'
+
+        """
+        if value >= max(self.a.y, self.b.y):
+            return self
+        if value <= 0:
+            return ShoulderFunction(Point(self.a.x, 0), Point(self.b.x, 0))
+
+        points = clip([(self.a.x, self.a.y), (self.b.x, self.b.y)], value)
+        if len(points) == 3:
+            # Nos quedamos con el corte y el extremo no truncado
+            points = points[1:] if self.a.y > value else points[:2]
+        return ShoulderFunction(Point(*points[0]), Point(*points[1]))
+
+    def points(self):
+        raise Exception('La funcion "hombro" no esta acotada')
+
+    def support(self):
+        """
+        Devuelve el intervalo abierto fuera del cual la funcion vale 0
+
+        """
+        low = float('-inf') if self.a.y > 0 else self.a.x
+        high = float('inf') if self.b.y > 0 else self.b.x
+        return (low, high)
+
+    def area(self, alpha=1):
+        """
+        Area bajo la funcion truncada por 'alpha' (None si es infinita)
+
+        """
+        if alpha <= 0 or (self.a.y == 0 and self.b.y == 0):
+            return 0.0
+        return None
+
+    def centroid(self, alpha=1):
+        return None
+
+    def parameters(self):
+        return [float(self.a.x), float(self.a.y), float(self.b.x),
+                float(self.b.y)]
+
+    def __str__(self):
+        return "Shoulder Function: %s %s" % (self.a, self.b)
+
+
+def linearize(function, low, high, tolerance, segments=16, depth=20):
+    """
+    Aproxima 'function' en [low, high] por una funcion lineal a trozos, con
+    error maximo 'tolerance' en los puntos de control de cada segmento
+
+    Devuelve una lista de puntos (x, y) (ver 'fis.aggregation')
+
+    """
+    def split(x0, y0, x1, y1, level):
+        width = x1 - x0
+        xm = x0 + width / 2.0
+        ym = function(xm)
+        q1 = function(x0 + width / 4.0)
+        q3 = function(x0 + 3 * width / 4.0)
+        if level >= depth or (abs(ym - (y0 + y1) / 2.0) <= tolerance and
+                              abs(q1 - (3 * y0 + y1) / 4.0) <= tolerance and
+                              abs(q3 - (y0 + 3 * y1) / 4.0) <= tolerance):
+            points.append((x1, y1))
+            return
+        split(x0, y0, xm, ym, level + 1)
+        split(xm, ym, x1, y1, level + 1)
+
+    xs = [low + (high - low) * i / float(segments)
+          for i in range(segments + 1)]
+    ys = [function(x) for x in xs]
+    points = [(xs[0], ys[0])]
+    for i in range(segments):
+        split(xs[i], ys[i], xs[i + 1], ys[i + 1], 0)
+    return points
+
+
+class SmoothFunction(object):
+    """
+    Base de las funciones de membresia suaves (gaussiana, campana, sigmoide)
+
+    La agregacion y la defuzzificacion exactas (ver 'fis.aggregation')
+    trabajan sobre funciones lineales a trozos: 'points' devuelve una
+    aproximacion con error maximo 'tolerance', calculada una sola vez. Cuando
+    existe una formula cerrada, 'area' y 'centroid' son exactos.
+
+    """
+    __slots__ = ('_points',)
+    tolerance = 1e-4
+
+    def truncate(self, value):
+        """
+        Devuelve la funcion truncada (superiormente) por 'value' (ver
+        'ClippedFunction')
+
+        """
+        if value >= self.height:
+            return self
+        return ClippedFunction(self, value)
+
+    def points(self):
+        if self._points is None:
+            low, high = self.bounds()
+            self._points = linearize(self.evaluate, low, high,
+                                     self.tolerance)
+        return self._points
+
+    def bounds(self):
+        """
+        Intervalo fuera del cual la funcion vale menos que 'tolerance'
+
+        """
+        raise Exception('La funcion "%s" no esta acotada' %
+                        self.__class__.__name__)
+
+    def support(self):
+        return (float('-inf'), float('inf'))
+
+    def area(self, alpha=1):
+        return None
+
+    def centroid(self, alpha=1):
+        return None
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        return cls(*parameters)
+
+
+class GaussianFunction(SmoothFunction):
+    """
+    Representa una funcion de membresia gaussiana ('gaussiana')
+
+    height * exp(-(x - mean)^2 / (2 * sigma^2))
+
+    """
+    __slots__ = ('mean', 'sigma', 'height', 'scale')
+
+    def __init__(self, mean, sigma, height=1.0):
+        if sigma <= 0:
+            raise Exception('La desviacion de la gaussiana debe ser positiva')
+        self.mean = float(mean)
+        self.sigma = float(sigma)
+        self.height = float(height)
+        self.scale = -1 / (2 * self.sigma ** 2)
+        self._points = None
+
+    def evaluate(self, value):
+        return self.height * math.exp((value - self.mean) ** 2 * self.scale)
+
+    def evaluate_batch(self, values):
+        """
+        Igual que 'evaluate', pero sobre un arreglo de NumPy de valores
+
+        """
+        values = numpy.asarray(values, dtype=float)
+        return self.height * numpy.exp((values - self.mean) ** 2 *
+                                       self.scale)
+
+    def bounds(self):
+        if self.tolerance >= self.height:
+            return (self.mean, self.mean)
+        d = self.sigma * math.sqrt(2 * math.log(self.height / self.tolerance))
+        return (self.mean - d, self.mean + d)
+
+    def area(self, alpha=1):
+        """
+        Area bajo la funcion truncada por 'alpha' (exacta)
+
+        Entre los cortes con y = alpha el area es un rectangulo y fuera de
+        ellos son las colas de la gaussiana (funcion 'erfc')
+
+        """
+        if alpha <= 0:
+            return 0.0
+        full = self.height * self.sigma * math.sqrt(2 * math.pi)
+        if alpha >= self.height:
+            return full
+        d = self.sigma * math.sqrt(2 * math.log(self.height / alpha))
+        return (2 * alpha * d +
+                full * math.erfc(d / (self.sigma * math.sqrt(2))))
+
+    def centroid(self, alpha=1):
+        # Es simetrica respecto a la media (tambien truncada)
+        return self.mean if alpha > 0 else None
+
+    def parameters(self):
+        return [self.mean, self.sigma, self.height]
+
+    def __str__(self):
+        return "Gaussian Function: %s %s" % (self.mean, self.sigma)
+
+
+class BellFunction(SmoothFunction):
+    """
+    Representa una funcion de membresia de campana generalizada ('campana')
+
+    1 / (1 + |(x - c) / a|^(2b))
+
+    """
+    __slots__ = ('a', 'b', 'c')
+    height = 1.0
+
+    def __init__(self, a, b, c):
+        if a == 0 or b <= 0:
+            raise Exception('Parametros de la campana incorrectos')
+        self.a = float(a)
+        self.b = float(b)
+        self.c = float(c)
+        self._points = None
+
+    def evaluate(self, value):
+        return 1 / (1 + abs((value - self.c) / self.a) ** (2 * self.b))
+
+    def evaluate_batch(self, values):
+        """
+        Igual que 'evaluate', pero sobre un arreglo de NumPy de valores
+
+        """
+        values = numpy.asarray(values, dtype=float)
+        return 1 / (1 + numpy.abs((values - self.c) / self.a) **
+                    (2 * self.b))
+
+    def bounds(self):
+        d = abs(self.a) * (1 / self.tolerance - 1) ** (1 / (2 * self.b))
+        return (self.c - d, self.c + d)
+
+    def area(self, alpha=1):
+        """
+        Area bajo la funcion (exacta). Truncada, el area de las colas no
+        tiene formula elemental: devuelve None
+
+        """
+        if alpha <= 0:
+            return 0.0
+        if alpha < 1 or self.b <= 0.5:
+            return None
+        k = math.pi / (2 * self.b)
+        return 2 * abs(self.a) * k / math.sin(k)
+
+    def centroid(self, alpha=1):
+        # Es simetrica respecto a 'c'; el momento solo es finito si b > 1
+        if alpha > 0 and self.b > 1:
+            return self.c
+        return None
+
+    def parameters(self):
+        return [self.a, self.b, self.c]
+
+    def __str__(self):
+        return "Bell Function: %s %s %s" % (self.a, self.b, self.c)
+
+
+class SigmoidFunction(SmoothFunction):
+    """
+    Representa una funcion de membresia sigmoide ('sigmoide')
+
+    1 / (1 + exp(-slope * (x - center)))
+
+    Como no esta acotada no puede usarse en la variable de salida
+
+    """
+    __slots__ = ('slope', 'center')
+    height = 1.0
+
+    def __init__(self, slope, center):
+        self.slope = float(slope)
+        self.center = float(center)
+        self._points = None
+
+    def evaluate(self, value):
+        z = self.slope * (value - self.center)
+        # Evitamos desbordar 'exp' con valores muy negativos
+        if z >= 0:
+            return 1 / (1 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1 + e)
+
+    def evaluate_batch(self, values):
+        """
+        Igual que 'evaluate', pero sobre un arreglo de NumPy de valores
+
+        """
+        values = numpy.asarray(values, dtype=float)
+        z = self.slope * (values - self.center)
+        return numpy.exp(-numpy.logaddexp(0, -z))
+
+    def parameters(self):
+        return [self.slope, self.center]
+
+    def __str__(self):
+        return "Sigmoid Function: %s %s" % (self.slope, self.center)
+
+
+class ClippedFunction(object):
+    """
+    Funcion suave truncada (superiormente) por 'alpha'
+
+    """
+    __slots__ = ('function', 'alpha', '_points')
+
+    def __init__(self, function, alpha):
+        self.function = function
+        self.alpha = alpha
+        self._points = None
+
+    def evaluate(self, value):
+        return min(self.function.evaluate(value), self.alpha)
+
+    def evaluate_batch(self, values):
+        return numpy.minimum(self.function.evaluate_batch(values), self.alpha)
+
+    def truncate(self, value):
+        if value >= self.alpha:
+            return self
+        return self.function.truncate(value)
+
+    def points(self):
+        if self._points is None:
+            self._points = clip(self.function.points(), self.alpha)
+        return self._points
+
+    def support(self):
+        return self.function.support()
+
+    def area(self, alpha=1):
+        return self.function.area(min(alpha, self.alpha))
+
+    def centroid(self, alpha=1):
+        return self.function.centroid(min(alpha, self.alpha))
+
+    def __str__(self):
+        return "Clipped %s (%s)" % (self.function, self.alpha)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_left
+
+from fis.compiler import Atom, Not, Or, Shared
+
+
+class SupportIndex(object):
+    """
+    Indice de los valores linguisticos de una variable segun su soporte
+
+    Cada funcion de membresia vale 0 fuera de su soporte (ver 'support' en
+    'fis.functions'). Los extremos de todos los soportes se guardan
+    ordenados, junto con los valores activos (distintos de 0) en cada
+    extremo y entre cada par de extremos consecutivos, por lo que los
+    valores activos para una entrada se obtienen en O(log M).
+
+    """
+    def __init__(self, definition):
+        supports = [(v.value, v.function.support())
+                    for v in definition.values]
+        self.bounds = sorted(set(x for _, support in supports
+                                 for x in support))
+
+        # Valores activos cuando la entrada coincide con un extremo
+        self.at_bound = []
+        for x in self.bounds:
+            self.at_bound.append(tuple(name for name, (a, b) in supports
+                                       if a < x < b))
+
+        # Valores activos entre dos extremos consecutivos
+        self.between = []
+        limits = [float('-inf')] + self.bounds + [float('inf')]
+        for low, high in zip(limits, limits[1:]):
+            self.between.append(tuple(name for name, (a, b) in supports
+                                      if a <= low and high <= b and a < b))
+
+    def active(self, x):
+        """
+        Devuelve los valores linguisticos con grado de membresia distinto
+        de 0 para la entrada 'x'
+
+        """
+        i = bisect_left(self.bounds, x)
+        if i < len(self.bounds) and self.bounds[i] == x:
+            return self.at_bound[i]
+        return self.between[i]
+
+
+def required_atoms(node):
+    """
+    Devuelve el conjunto de (variable, valor) que deben ser distintos de 0
+    para que el nodo 'node' sea distinto de 0
+
+    """
+    if isinstance(node, Shared):
+        return required_atoms(node.node)
+    if isinstance(node, Atom):
+        return frozenset([(node.variable, node.value)])
+    if isinstance(node, Not):
+        return frozenset()
+
+    atoms = [required_atoms(o) for o in node.operands]
+    if isinstance(node, Or):
+        return frozenset.intersection(*atoms)
+    return frozenset.union(*atoms)
+
+
+class RuleIndex(object):
+    """
+    Indice para evaluar solo las reglas que pueden activarse
+
+    Contiene la siguiente informacion:
+    - Un 'SupportIndex' por cada variable de entrada
+    - Los (variable, valor) que necesita cada regla para ser distinta de 0
+      (ver 'required_atoms')
+    - Indice invertido {(variable, valor): reglas que lo necesitan}
+    - Reglas que no necesitan ningun (variable, valor), por ejemplo las que
+      contienen 'not' o un 'or', que siempre se evaluan
+
+    """
+    def __init__(self, input_vars, evaluators, required=None):
+        self.supports = dict((var.name, SupportIndex(var))
+                             for var in input_vars)
+        if required is None:
+            required = [required_atoms(e) for e in evaluators]
+        self.required = required
+
+        self.always = []
+        self.rules = {}
+        for i, atoms in enumerate(self.required):
+            if not atoms:
+                self.always.append(i)
+            for atom in atoms:
+                self.rules.setdefault(atom, []).append(i)
+
+    def active(self, input_values):
+        """
+        Devuelve los (variable, valor) con grado de membresia distinto de 0
+
+        """
+        active = []
+        # 'input_values' puede tener mas variables (ver 'fis.pipeline')
+        for name, support in self.supports.items():
+            x = input_values.get(name)
+            if x is not None:
+                active.extend((name, value) for value in support.active(x))
+        return active
+
+    def candidates(self, input_values):
+        """
+        Devuelve (ordenados) los indices de las reglas que pueden ser
+        distintas de 0 para los valores iniciales 'input_values'
+
+        """
+        counts = {}
+        for atom in self.active(input_values):
+            for i in self.rules.get(atom, ()):
+                counts[i] = counts.get(i, 0) + 1
+
+        result = list(self.always)
+        result.extend(i for i, count in counts.items()
+                      if count == len(self.required[i]))
+        result.sort()
+        return result
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+Optimizacion estatica de la base de reglas
+
+Reduce la cantidad de reglas antes de ejecutar el sistema, sin cambiar el
+grado de activacion de ningun valor de salida (el maximo entre sus reglas):
+
+- Normaliza los encabezados: aplana 'and'/'or' anidados, ordena los
+  operandos, elimina la doble negacion y los operandos redundantes (por
+  ejemplo 'A and (A or B)' es 'A')
+- Elimina las reglas repetidas (mismo encabezado normalizado y mismo
+  consecuente)
+- Elimina las reglas subsumidas: si el encabezado de una regla nunca es
+  mayor que el de otra con el mismo consecuente ('A and B' frente a 'A'),
+  no aporta nada al maximo
+- Une en una disyuncion ('or') las reglas con el mismo consecuente que
+  necesitan los mismos (variable, valor) para activarse (ver
+  'required_atoms'), por lo que el indice de reglas sigue descartandolas
+  igual que antes
+
+Solo se optimizan las reglas de las variables de salida Mamdani: en la
+inferencia Sugeno cada regla suma su grado al promedio ponderado, por lo que
+las reglas repetidas no son redundantes.
+"""
+import random
+
+from fis.compiler import Atom, And, Or, Not, Shared
+from fis.core import FIS
+from fis.definitions import Rule
+from fis.index import required_atoms
+from fis.sugeno import is_sugeno
+
+
+class Normalizer(object):
+    """
+    Normaliza encabezados de reglas (ver el comentario del modulo)
+
+    Cada nodo distinto recibe un numero ('number'): dos nodos con el mismo
+    numero son equivalentes. Los numeros y las comparaciones entre nodos
+    ('implies') se guardan para no recalcularlos.
+
+    """
+    def __init__(self):
+        self.numbers = {}
+        self.ids = {}
+        # Mantiene vivos los nodos numerados (la llave de 'ids' es su 'id')
+        self.nodes = []
+        self.implications = {}
+
+    def number(self, node):
+        n = self.ids.get(id(node))
+        if n is not None:
+            return n
+
+        if isinstance(node, Shared):
+            n = self.number(node.node)
+        else:
+            if isinstance(node, Atom):
+                k = ('=', node.variable, node.value)
+            elif isinstance(node, Not):
+                k = ('not', self.number(node.operand))
+            else:
+                # 'and' y 'or' son conmutativos
+                k = (node.__class__.__name__,) + tuple(sorted(
+                    self.number(o) for o in node.operands))
+            n = self.numbers.setdefault(k, len(self.numbers))
+
+        self.ids[id(node)] = n
+        self.nodes.append(node)
+        return n
+
+    def implies(self, a, b):
+        """
+        Indica si el nodo 'a' es menor o igual que el nodo 'b' para
+        cualquier entrada (solo con reglas sintacticas: puede devolver
+        False aunque lo sea)
+
+        """
+        ids = self.ids
+        x = ids.get(id(a))
+        if x is None:
+            x = self.number(a)
+        y = ids.get(id(b))
+        if y is None:
+            y = self.number(b)
+        if x == y:
+            return True
+
+        result = self.implications.get((x, y))
+        if result is None:
+            result = self.implications[(x, y)] = self._implies(a, b)
+        return result
+
+    def _implies(self, a, b):
+        implies = self.implies
+        # min(...) <= cualquiera de sus operandos
+        if isinstance(a, And) and any(implies(o, b) for o in a.operands):
+            return True
+        # cualquiera de sus operandos <= max(...)
+        if isinstance(b, Or) and any(implies(a, o) for o in b.operands):
+            return True
+        if isinstance(a, Or) and all(implies(o, b) for o in a.operands):
+            return True
+        if isinstance(b, And) and all(implies(a, o) for o in b.operands):
+            return True
+        # 1 - x <= 1 - y si y <= x
+        if isinstance(a, Not) and isinstance(b, Not):
+            return implies(b.operand, a.operand)
+        return False
+
+    def normalize(self, node):
+        """
+        Devuelve un nodo equivalente a 'node' en forma normal
+
+        """
+        if isinstance(node, Shared):
+            return self.normalize(node.node)
+        if isinstance(node, Atom):
+            return node
+        if isinstance(node, Not):
+            operand = self.normalize(node.operand)
+            if isinstance(operand, Not):
+                return operand.operand
+            return Not(operand)
+
+        cls = node.__class__
+        operands = []
+        seen = set()
+        for operand in node.operands:
+            operand = self.normalize(operand)
+            nested = (operand.operands if isinstance(operand, cls)
+                      else [operand])
+            for o in nested:
+                n = self.number(o)
+                if n not in seen:
+                    seen.add(n)
+                    operands.append(o)
+
+        # En un 'and' sobra el operando mayor que otro; en un 'or', el menor
+        if cls is And:
+            dropped = redundant(operands, lambda o, other:
+                                self.implies(other, o))
+        else:
+            dropped = redundant(operands, self.implies)
+        operands = sorted((o for i, o in enumerate(operands)
+                           if i not in dropped), key=self.number)
+
+        if len(operands) == 1:
+            return operands[0]
+        return cls(operands)
+
+
+def redundant(nodes, dominated):
+    """
+    Devuelve los indices de 'nodes' que se pueden descartar porque otro nodo
+    (no descartado) los domina ('dominated(nodo, otro)')
+
+    """
+    dropped = set()
+    for i, node in enumerate(nodes):
+        for j, other in enumerate(nodes):
+            if i != j and j not in dropped and dominated(node, other):
+                dropped.add(i)
+                break
+    return dropped
+
+
+def normalize(node):
+    """
+    Devuelve un nodo equivalente a 'node' en forma normal (ver el
+    comentario del modulo)
+
+    """
+    return Normalizer().normalize(node)
+
+
+class RuleOptimizer(object):
+    """
+    Optimiza una lista de reglas (ver el comentario del modulo)
+
+    Contiene la siguiente informacion de la ultima optimizacion:
+    - Cantidad de reglas originales ('original') y finales ('optimized')
+    - Reglas repetidas eliminadas ('duplicates')
+    - Reglas subsumidas eliminadas ('subsumed')
+    - Reglas unidas a otra ('merged')
+    - Cantidad de nodos de los encabezados antes y despues ('nodes_before',
+      'nodes_after')
+
+    """
+    def __init__(self, merge=True, subsumption=True):
+        self.merge = merge
+        self.subsumption = subsumption
+        self.original = 0
+        self.optimized = 0
+        self.duplicates = 0
+        self.subsumed = 0
+        self.merged = 0
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    def optimize(self, rules):
+        """
+        Devuelve la lista de reglas optimizada
+
+        El orden de las reglas se mantiene (cada grupo de reglas unidas
+        ocupa la posicion de la primera)
+
+        """
+        rules = list(rules)
+        self.normalizer = Normalizer()
+        self.original = len(rules)
+        self.duplicates = self.subsumed = self.merged = 0
+        self.nodes_before = sum(count_nodes(r.evaluator) for r in rules)
+
+        # Reglas de cada consecuente (variable, valor) Mamdani, en orden
+        groups = {}
+        order = []
+        for rule in rules:
+            output_var = rule.output_var
+            if is_sugeno(output_var.definition):
+                order.append([rule])
+                continue
+            k = (output_var.definition.name, output_var.value.value)
+            group = groups.get(k)
+            if group is None:
+                group = groups[k] = []
+                order.append(group)
+            group.append(rule)
+
+        result = []
+        for group in order:
+            if len(group) == 1 and is_sugeno(group[0].output_var.definition):
+                result.extend(group)
+            else:
+                result.extend(self.optimize_group(group))
+
+        self.optimized = len(result)
+        self.nodes_after = sum(count_nodes(r.evaluator) for r in result)
+        return result
+
+    def optimize_group(self, rules):
+        """
+        Optimiza las reglas de un mismo consecuente
+
+        """
+        normalizer = self.normalizer
+        output_var = rules[0].output_var
+        heads = []
+        seen = set()
+        for rule in rules:
+            head = normalizer.normalize(rule.evaluator)
+            k = normalizer.number(head)
+            if k in seen:
+                self.duplicates += 1
+                continue
+            seen.add(k)
+            heads.append(head)
+
+        if self.subsumption:
+            # Filtros rapidos: si 'implies(a, b)', 'a' necesita al menos los
+            # (variable, valor) que necesita 'b' (ver 'required_atoms') y
+            # ambos tienen algun (variable, valor) en comun
+            required = dict((id(h), required_atoms(h)) for h in heads)
+            atoms = dict((id(h), all_atoms(h)) for h in heads)
+
+            def subsumed(a, b):
+                return (required[id(b)] <= required[id(a)] and
+                        not atoms[id(a)].isdisjoint(atoms[id(b)]) and
+                        normalizer.implies(a, b))
+
+            dropped = redundant(heads, subsumed)
+            self.subsumed += len(dropped)
+            heads = [h for i, h in enumerate(heads) if i not in dropped]
+
+        if self.merge:
+            merged = []
+            positions = {}
+            for head in heads:
+                atoms = required_atoms(head)
+                i = positions.get(atoms)
+                if i is None:
+                    positions[atoms] = len(merged)
+                    merged.append([head])
+                else:
+                    merged[i].append(head)
+                    self.merged += 1
+            heads = [normalizer.normalize(Or(h)) if len(h) > 1 else h[0]
+                     for h in merged]
+
+        return [Rule(str(head), None, output_var, head) for head in heads]
+
+    def report(self):
+        """
+        Devuelve un resumen de la ultima optimizacion
+
+        """
+        lines = [
+            'Reglas: %d -> %d' % (self.original, self.optimized),
+            '  Repetidas: %d' % self.duplicates,
+            '  Subsumidas: %d' % self.subsumed,
+            '  Unidas: %d' % self.merged,
+            'Nodos: %d -> %d' % (self.nodes_before, self.nodes_after),
+        ]
+        return '\n'.join(lines)
+
+
+def all_atoms(node):
+    """
+    Devuelve el conjunto de todos los (variable, valor) de 'node'
+
+    """
+    if isinstance(node, Shared):
+        return all_atoms(node.node)
+    if isinstance(node, Atom):
+        return frozenset([(node.variable, node.value)])
+    if isinstance(node, Not):
+        return all_atoms(node.operand)
+    return frozenset().union(*[all_atoms(o) for o in node.operands])
+
+
+def count_nodes(node):
+    if isinstance(node, Shared):
+        return count_nodes(node.node)
+    if isinstance(node, Atom):
+        return 1
+    if isinstance(node, Not):
+        return 1 + count_nodes(node.operand)
+    return 1 + sum(count_nodes(o) for o in node.operands)
+
+
+def optimize_rules(rules, merge=True, subsumption=True):
+    """
+    Devuelve una tupla (reglas optimizadas, RuleOptimizer con el resumen)
+
+    """
+    optimizer = RuleOptimizer(merge, subsumption)
+    return optimizer.optimize(rules), optimizer
+
+
+def sample_inputs(input_vars, samples=1000, seed=0):
+    """
+    Genera valores de entrada para comprobar la equivalencia: los extremos
+    de los soportes de cada funcion (donde cambian las reglas activas) y
+    valores aleatorios entre ellos
+
+    """
+    rnd = random.Random(seed)
+    points = {}
+    for var in input_vars:
+        bounds = sorted(set(x for v in var.values
+                            for x in v.function.support()
+                            if abs(x) != float('inf')))
+        if not bounds:
+            bounds = [-1.0, 1.0]
+        low, high = bounds[0] - 1, bounds[-1] + 1
+        points[var.name] = (bounds, low, high)
+
+    for _ in range(samples):
+        values = {}
+        for name, (bounds, low, high) in points.items():
+            if rnd.random() < 0.2:
+                values[name] = rnd.choice(bounds)
+            else:
+                values[name] = rnd.uniform(low, high)
+        yield values
+
+
+def verify(input_vars, output_var, rules, optimized, samples=1000, seed=0):
+    """
+    Comprueba que 'optimized' es equivalente a 'rules': compara el grado de
+    activacion de cada valor de salida (Mamdani) y el resultado final en
+    'samples' entradas (ver 'sample_inputs')
+
+    Devuelve la diferencia maxima encontrada (0 si son equivalentes)
+
+    """
+    original = FIS(input_vars, output_var, rules)
+    result = FIS(input_vars, output_var, optimized)
+    error = 0.0
+
+    for values in sample_inputs(input_vars, samples, seed):
+        a = list(original.strengths(values))
+        b = list(result.strengths(values))
+        for definition in original.output_vars:
+            if is_sugeno(definition):
+                continue
+            x = original.activations(a, definition)
+            y = result.activations(b, definition)
+            error = max([error] + [abs(x[k] - y[k]) for k in x])
+
+        x = original.execute(values)
+        y = result.execute(values)
+        if not isinstance(x, dict):
+            x, y = {None: x}, {None: y}
+        for name in x:
+            if (x[name] is None) != (y[name] is None):
+                return float('inf')
+            if x[name] is not None:
+                error = max(error, abs(x[name] - y[name]))
+
+    return error
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecucion por lotes en varios procesos
+
+Los valores de entrada y los resultados se guardan en memoria compartida
+('multiprocessing.sharedctypes'), por lo que las filas no se copian entre
+procesos: cada proceso recibe el modelo una sola vez al iniciar y despues
+solo los limites (inicio, fin) de cada bloque de filas.
+"""
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from fis.batch import normalize_inputs
+
+
+# Estado de cada proceso, inicializado por '_initialize'
+_worker = {}
+
+
+def _initialize(fis, columns, inputs, output):
+    _worker['fis'] = fis
+    _worker['columns'] = columns
+    _worker['inputs'] = numpy.frombuffer(inputs).reshape(len(columns), -1)
+    _worker['output'] = numpy.frombuffer(output).reshape(
+        len(fis.output_vars), -1)
+
+
+def _execute(bounds):
+    start, end = bounds
+    inputs = _worker['inputs']
+    chunk = dict((name, inputs[i, start:end])
+                 for i, name in enumerate(_worker['columns']))
+    fis = _worker['fis']
+    output = _worker['output']
+    result = fis.execute_batch(chunk)
+    if len(fis.output_vars) == 1:
+        output[0, start:end] = result
+    else:
+        for i, var in enumerate(fis.output_vars):
+            output[i, start:end] = result[var.name]
+    return end - start
+
+
+def execute_parallel(fis, inputs, workers=None, columns=None,
+                     chunk_size=None):
+    """
+    Igual que 'FIS.execute_batch', pero repartiendo las filas en bloques
+    entre 'workers' procesos (por defecto, uno por CPU)
+
+    Devuelve un arreglo con el valor concreto de cada fila, o {variable:
+    arreglo} si hay varias variables de salida (cada variable ocupa su
+    propia fila de la memoria compartida de resultados)
+
+    """
+    if numpy is None:
+        raise ImportError('Se necesita NumPy para evaluar por lotes')
+
+    inputs = normalize_inputs(inputs, columns)
+    columns = sorted(inputs)
+    rows = len(inputs[columns[0]]) if columns else 0
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers <= 1 or rows == 0:
+        return fis.execute_batch(inputs)
+
+    if chunk_size is None:
+        # Varios bloques por proceso para repartir mejor la carga
+        chunk_size = max(1, -(-rows // (workers * 4)))
+
+    shared_inputs = RawArray('d', len(columns) * rows)
+    view = numpy.frombuffer(shared_inputs).reshape(len(columns), rows)
+    for i, name in enumerate(columns):
+        view[i] = inputs[name]
+
+    outputs = [var.name for var in fis.output_vars]
+    shared_output = RawArray('d', len(outputs) * rows)
+
+    chunks = [(start, min(start + chunk_size, rows))
+              for start in range(0, rows, chunk_size)]
+
+    pool = multiprocessing.Pool(
+        workers, initializer=_initialize,
+        initargs=(fis, columns, shared_inputs, shared_output))
+    try:
+        pool.map(_execute, chunks)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    result = numpy.frombuffer(shared_output).reshape(len(outputs), rows)
+    if len(outputs) == 1:
+        return result[0]
+    return dict((name, result[i]) for i, name in enumerate(outputs))
@@ -2,53 +2,49 @@
 import re
 from fis.definitions import (VariableCollection, VariableDefinition,
                              ValueDefinition, Rule, OutputVariable)
-from fis.functions import Point, TriangularFunction, TrapezoidalFunction
+from fis.compiler import RuleCompiler, RuleParser
+from fis.functions import (Point, TriangularFunction, TrapezoidalFunction,
+                           PiecewiseLinearFunction, ShoulderFunction,
+                           GaussianFunction, BellFunction, SigmoidFunction)
+from fis.sugeno import ConstantConsequent, LinearConsequent
 
 
 class RuleEvaluator(object):
     """
     Clase encargada de evaluar el encabezado de una regla
 
+    Cada encabezado se compila una sola vez (ver 'RuleCompiler') y se guarda
+    para las siguientes evaluaciones
+
     """
     def __init__(self):
-        self.parser = RuleParser()
+        self.compiler = RuleCompiler()
+        self.compiled = {}
 
     def evaluate(self, variables, rule_head):
         """
         Evalua el encabezado de la regla dada
 
-        El parametro 'variables' es utilizado en el codigo que se evaluará
-        utilizando la función 'eval'
+        El parametro 'variables' debe tener un metodo 'membership' (por
+        ejemplo, un VariableCollection con los valores iniciales)
         """
-        parsed = self.parser.parse(rule_head)
-        var = eval(parsed)
-        return var.membership_value
+        evaluator = self.compiled.get(rule_head)
+        if evaluator is None:
+            evaluator = self.compiler.compile(rule_head)
+            self.compiled[rule_head] = evaluator
+        return evaluator.evaluate(variables)
 
 
-class RuleParser(object):
+class ParseError(Exception):
     """
-    Parsea una regla y la convierte a código Python lista para evaluarse
+    Error en una linea del texto o fichero de entrada
 
     """
-    def _replace(self, match):
-        """
-        Funcion que reemplaza el texto 'Variable = Valor'
-
-        Lo reemplaza por el codigo correspondiente en Python que se ejecutara
-        posteriormente
-
-        """
-        return 'variables.get_var("%s", "%s")' % (match.group(1),
-                                                  match.group(2))
-
-    def parse(self, head):
-        """
-        Parsea un encabezado y lo convierte a codigo Python
-        """
-        head = head.replace(' and ', ' & ').replace(' or ', ' | ')
-        head = head.replace('not(', '-(')
-        pattern = re.compile('([A-Z]\w*)\s+=\s+([A-Z]\w*)')
-        return pattern.sub(self._replace, head)
+    def __init__(self, line, message):
+        if line is not None:
+            message = 'Linea %d: %s' % (line, message)
+        super(ParseError, self).__init__(message)
+        self.line = line
 
 
 class InputParser(object):
@@ -66,7 +62,7 @@ class InputParser(object):
     input: (Var2) (Value2) (triangulo/trapecio: (x,y) (x,y) ...)
     input: (Var3) (Value3) (triangulo/trapecio: (x,y) (x,y) ...)
 
-    # Una sola variable de salida (Var1)
+    # Una o varias variables de salida
     output: (output_Var) (output_Value1) (triangulo/trapecio: (x,y) (x,y) ...)
     output: (output_Var) (output_Value3) (triangulo/trapecio: (x,y) (x,y) ...)
     output: (output_Var) (output_Value1) (triangulo/trapecio: (x,y) (x,y) ...)
@@ -78,165 +74,411 @@ class InputParser(object):
     rule: Var1 = Value1 or Var2 = Value2 => Output_Value1
     rule: (Var1 = Value1 or Var2 = Value2) and Value2 = Var1 => Output_Value3
     rule: not(Var1 = Value1 or Var2 = Value2) => Output_Value2
+    rule: Var1 = Value1 => output_Var = Output_Value2
     ...
 
+    Con varias variables de salida, cada regla indica la variable a la que
+    se aplica ('=> Var = Valor'); basta con el valor si solo una de ellas lo
+    tiene.
+
     # Valores iniciales de las variables:
     ini: Var1 = 10
     ini: Var2 = 20
     ...
 
+    Las lineas que no tienen ninguno de estos formatos se ignoran; con
+    'strict' se lanza ParseError.
+
+    Ademas de 'triangulo' y 'trapecio', las funciones pueden ser:
+    - hombro: (x,y) (x,y) (abierta por los extremos, ver 'ShoulderFunction')
+    - poligonal: (x,y) (x,y) (x,y) ... (lineal a trozos)
+    - gaussiana: (media, desviacion)
+    - campana: (a, b, c)
+    - sigmoide: (pendiente, centro)
+
+    Para inferencia Takagi-Sugeno, los valores de la variable de salida son
+    consecuentes (ver 'fis.sugeno') en lugar de funciones de membresia:
+    - constante: (valor)
+    - lineal: 2 + 0.5*Var1 - 1.5*Var2
+
     """
+    line_pattern = re.compile(r'\s*(input|output|rule|ini):\s*(.*?)\s*$')
+    variable_pattern = re.compile(r'\((\w+)\) \((\w+)\) \((.*)\)$')
+    rule_pattern = re.compile(r'(.+?)\s+=>\s+(?:(\w+)\s+=\s+)?(\w+)$')
+    input_value_pattern = re.compile(r'(.+?)\s+=\s+(-?[\d\.]+)$')
+    function_pattern = re.compile(r'(\w+): (.*)')
+    point_pattern = re.compile(r'\((-?[\d\.]+),\s*(-?[\d\.]+)\)')
+    number_pattern = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+    # Termino de un consecuente lineal: signo, coeficiente y variable
+    term_pattern = re.compile(r'([-+]?)(%s)?(?:\*?([A-Za-z]\w*))?' %
+                              number_pattern.pattern)
+
+    # Funciones definidas por puntos y funciones definidas por parametros
+    point_functions = {
+        'triangulo': TriangularFunction,
+        'trapecio': TrapezoidalFunction,
+        'hombro': ShoulderFunction,
+        'poligonal': PiecewiseLinearFunction,
+    }
+    parameter_functions = {
+        'gaussiana': GaussianFunction,
+        'campana': BellFunction,
+        'sigmoide': SigmoidFunction,
+        'constante': ConstantConsequent,
+    }
+
+    def __init__(self, strict=False):
+        self.compiler = RuleCompiler()
+        self.evaluators = {}
+        self.output_vars = {}
+        self.strict = strict
+
     def parse(self, text):
         """
         Retorna una tupla con la siguiente informacion:
         - Variables de entrada (VariableCollection)
-        - Variable de salida (VariableDefinition)
+        - Variable de salida (VariableDefinition), o un VariableCollection
+          si hay varias
         - Reglas (lista de Rule)
+        - Valores iniciales (dictionary)
+
+        Recorre el texto (o el fichero, linea a linea) una sola vez
 
         """
+        # Las variables de salida de otra llamada ya no sirven
+        self.output_vars = {}
+        input_vars = VariableCollection()
+        output_vars = VariableCollection()
+        outputs = []
+        rules = []
+        input_values = {}
 
-        # Si es un fichero, leemos su contenido
-        if hasattr(text, 'read'):
-            text = text.read()
+        for number, kind, entry in self.lines(text):
+            if kind == 'input':
+                name, value = self.parse_variable(entry, number)
+                self.add_input_value(input_vars, name, value)
 
-        # Parseando las variables de entrada
-        input_vars = self.parse_input_vars(text)
+            elif kind == 'output':
+                name, value = self.parse_variable(entry, number)
+                self.add_input_value(output_vars, name, value)
+                outputs.append((number, name, value))
 
-        # Parseando la definicion de la variable de salida
-        output_var_def = self.parse_output_var(text)
+            elif kind == 'rule':
+                # La variable de salida puede definirse despues de la regla
+                rules.append((number, self.parse_rule(entry, number)))
 
-        # Parseando las reglas
-        rules = self.parse_rules(text, output_var_def)
+            else:
+                name, value = self.parse_input_value(entry, number)
+                input_values[name] = value
 
-        # Parseando los valores iniciales
-        input_values = self.parse_input_values(text)
+        self.check_outputs(outputs, input_vars)
+        output_var_def = self.output_definition(output_vars)
+        rules = [self.build_rule(rule, output_var_def, number)
+                 for number, rule in rules]
 
         return input_vars, output_var_def, rules, input_values
 
-    def parse_input_vars(self, text):
+    def output_definition(self, output_vars):
         """
-        Parsea las variables de entrada. Devuelve un VariableCollection
+        Devuelve la unica variable de salida de 'output_vars'
+        (VariableCollection), la coleccion completa si hay varias o None si
+        no hay ninguna
 
         """
-        pattern = re.compile(r'input: \((\w+)\) \((\w+)\) \((.*)\)')
-        m = pattern.search(text)
+        if not output_vars:
+            return None
+        if len(output_vars) == 1:
+            return output_vars[0]
+        return output_vars
 
-        d = {}
+    def lines(self, text):
+        """
+        Genera una tupla (numero de linea, tipo, entrada) por cada linea del
+        texto o fichero, donde tipo es 'input', 'output', 'rule' o 'ini'
 
-        while m:
-            name = m.group(1)
-            value_raw = m.group(2)
-            func = self.parse_function(m.group(3))
+        Las lineas con otro formato se ignoran; con 'strict' se lanza
+        ParseError si no estan en blanco ni son comentarios ('#')
 
-            value = ValueDefinition(value_raw, func)
-            if not name in d:
-                d[name] = []
+        """
+        if not hasattr(text, 'read'):
+            text = text.splitlines()
 
-            d[name].append(value)
+        for number, line in enumerate(text, 1):
+            m = self.line_pattern.match(line)
+            if m:
+                yield number, m.group(1), m.group(2)
+            elif self.strict:
+                self.check_line(line, number)
 
-            m = pattern.search(text, m.end())
+    def check_line(self, line, number=None):
+        """
+        Lanza ParseError si la linea 'line' (que no es una entrada) no esta
+        en blanco ni es un comentario
 
-        variables = VariableCollection()
+        """
+        line = line.strip()
+        if line and not line.startswith('#'):
+            raise ParseError(number, 'Linea desconocida: %s' % line)
 
-        for name, values in d.items():
-            variables.append(VariableDefinition(name, values))
+    def add_input_value(self, variables, name, value):
+        """
+        Agrega el valor 'value' a la variable 'name' de 'variables' (de
+        entrada o de salida), creando la variable si no existe
 
-        return variables
+        """
+        definition = variables.get_definition(name)
+        if definition is None:
+            definition = VariableDefinition(name)
+            variables.append(definition)
+        definition.add_value(value)
+
+    def parse_variable(self, entry, number=None):
+        """
+        Parsea la entrada '(Var) (Valor) (funcion)' de una variable
+
+        Devuelve una tupla (nombre de la variable, ValueDefinition)
+
+        """
+        m = self.variable_pattern.match(entry)
+        if not m:
+            raise ParseError(number, 'Error parseando la variable: %s' %
+                                     entry)
+        try:
+            func = self.parse_function(m.group(3))
+        except ParseError:
+            raise
+        except Exception as e:
+            raise ParseError(number, str(e))
+
+        return m.group(1), ValueDefinition(m.group(2), func)
 
     def parse_function(self, text):
         """
         Parsea el texto correspondiente a una funcion
 
         """
-        m = re.match('(triangulo|trapecio): (.*)', text)
+        m = self.function_pattern.match(text)
         if not m:
             raise Exception('Error parseando la funcion: %s' % text)
 
         func_type = m.group(1)
-        points_raw = m.group(2)
-
-        points = []
+        if func_type == 'lineal':
+            return self.parse_linear(m.group(2))
+
+        if func_type in self.parameter_functions:
+            cls = self.parameter_functions[func_type]
+            parameters = [float(v) for v in
+                          self.number_pattern.findall(m.group(2))]
+            try:
+                return cls(*parameters)
+            except TypeError:
+                raise Exception('Cantidad de parametros incorrecta: %s' %
+                                text)
+
+        cls = self.point_functions.get(func_type)
+        if cls is None:
+            raise Exception('Funcion desconocida: %s' % func_type)
+
+        points = [Point(float(x), float(y))
+                  for x, y in self.point_pattern.findall(m.group(2))]
+        try:
+            return cls(*points)
+        except TypeError:
+            raise Exception('Cantidad de puntos incorrecta: %s' % text)
+
+    def parse_linear(self, text):
+        """
+        Parsea un consecuente lineal ('2 + 0.5*Var1 - Var2')
 
-        pattern = re.compile(r'\(([\d\.]+),\s*([\d\.]+)\)')
-        m = pattern.search(points_raw)
+        """
+        text = text.replace(' ', '')
+        if text.startswith('(') and text.endswith(')'):
+            text = text[1:-1]
+
+        constant = 0.0
+        coefficients = []
+        position = 0
+        while position < len(text):
+            # El coeficiente se lee completo (con su exponente) antes de
+            # buscar el signo del termino siguiente
+            m = self.term_pattern.match(text, position)
+            if (not (m.group(2) or m.group(3)) or
+                    (position and not m.group(1))):
+                raise Exception('Error parseando el consecuente: %s' % text)
+            position = m.end()
+            sign, number, variable = m.groups()
+            coefficient = float(number or 1)
+            if sign == '-':
+                coefficient = -coefficient
+            if variable:
+                coefficients.append((variable, coefficient))
+            else:
+                constant += coefficient
+
+        return LinearConsequent(constant, coefficients)
+
+    def check_outputs(self, outputs, input_vars):
+        """
+        Comprueba que los valores de cada variable de salida ('outputs',
+        lista de (numero de linea, variable, ValueDefinition)) no mezclen
+        consecuentes Sugeno y funciones de membresia, y que los consecuentes
+        solo usen variables de entrada definidas
 
-        while m:
-            points.append(Point(float(m.group(1)), float(m.group(2))))
-            m = pattern.search(points_raw, m.end())
+        """
+        kinds = {}
+        for number, name, value in outputs:
+            consequent = getattr(value.function, 'consequent', False)
+            if kinds.setdefault(name, consequent) != consequent:
+                raise ParseError(number, 'No se pueden mezclar consecuentes '
+                                         'y funciones de membresia en la '
+                                         'salida')
+            if not consequent:
+                continue
+            for name in value.function.variables():
+                if input_vars.get_definition(name) is None:
+                    raise ParseError(number, 'Variable de entrada '
+                                             'desconocida: %s' % name)
+
+    def parse_rule(self, entry, number=None):
+        """
+        Parsea la entrada 'encabezado => Valor' (o 'encabezado => Var =
+        Valor') de una regla
 
-        if func_type == 'triangulo':
-            cls = TriangularFunction
-        else:
-            cls = TrapezoidalFunction
-        return cls(*points)
+        Devuelve una tupla (encabezado original, evaluador compilado,
+        variable de salida o None, valor de salida). Los encabezados
+        repetidos se compilan una sola vez
 
-    def parse_output_var(self, text):
         """
-        Parsea la variable de salida y todos sus valores (con sus funciones)
+        m = self.rule_pattern.match(entry)
+        if not m:
+            raise ParseError(number, 'Error parseando la regla: %s' % entry)
 
-        """
-        pattern = re.compile(r'output: \((\w+)\) \((\w+)\) \((.*)\)')
-        m = pattern.search(text)
+        orig_head = m.group(1)
+        evaluator = self.evaluators.get(orig_head)
+        if evaluator is None:
+            try:
+                evaluator = self.compiler.compile(orig_head)
+            except Exception as e:
+                raise ParseError(number, str(e))
+            self.evaluators[orig_head] = evaluator
 
-        d = {}
+        return orig_head, evaluator, m.group(2), m.group(3)
 
-        while m:
-            name = m.group(1)
-            value_raw = m.group(2)
-            func = self.parse_function(m.group(3))
+    def build_rule(self, rule, output_var_def, number=None):
+        """
+        Construye la regla (Rule) a partir de lo devuelto por 'parse_rule'
 
-            value = ValueDefinition(value_raw, func)
-            if not name in d:
-                d[name] = []
+        'output_var_def' es la variable de salida (VariableDefinition) o la
+        coleccion de variables de salida (VariableCollection)
 
-            d[name].append(value)
+        """
+        orig_head, evaluator, name, output = rule
+
+        # Se guarda tambien 'output_var_def': mientras este en el cache su
+        # 'id' no puede pasar a otro objeto
+        key = (id(output_var_def), name, output)
+        cached = self.output_vars.get(key)
+        if cached is not None and cached[0] is output_var_def:
+            output_var = cached[1]
+        else:
+            definition = self.find_output(output_var_def, name, output,
+                                          number)
+            output_var = OutputVariable(definition,
+                                        definition.get_value(output))
+            self.output_vars[key] = (output_var_def, output_var)
 
-            m = pattern.search(text, m.end())
+        # El encabezado en codigo Python se genera solo si se pide
+        return Rule(orig_head, None, output_var, evaluator)
 
-        name = d.items()[0][0]
-        values = d.items()[0][1]
+    def find_output(self, output_var_def, name, output, number=None):
+        """
+        Devuelve la variable de salida que tiene el valor 'output' (y que se
+        llama 'name', si no es None)
 
-        return VariableDefinition(name, values)
+        """
+        if output_var_def is None:
+            definitions = []
+        elif isinstance(output_var_def, VariableDefinition):
+            definitions = [output_var_def]
+        else:
+            definitions = list(output_var_def)
+
+        if name is not None:
+            definitions = [d for d in definitions if d.name == name]
+            if not definitions:
+                raise ParseError(number, 'Variable de salida desconocida: '
+                                         '%s' % name)
+
+        definitions = [d for d in definitions
+                       if d.get_value(output) is not None]
+        if not definitions:
+            raise ParseError(number, 'Valor de salida desconocido: %s' %
+                                     output)
+        if len(definitions) > 1:
+            raise ParseError(number, 'Valor de salida ambiguo: %s (indique '
+                                     'la variable)' % output)
+        return definitions[0]
+
+    def parse_input_value(self, entry, number=None):
+        """
+        Parsea la entrada 'Var = valor' de un valor inicial
 
-    def parse_rules(self, text, output_var_def):
         """
-        Parsea el listado de reglas
+        m = self.input_value_pattern.match(entry)
+        if not m:
+            raise ParseError(number, 'Error parseando el valor inicial: %s' %
+                                     entry)
+        return m.group(1), float(m.group(2))
+
+    def parse_input_vars(self, text):
+        """
+        Parsea las variables de entrada. Devuelve un VariableCollection
 
         """
-        pattern = re.compile(r'rule: (.+?)\s+=>\s+(\w+)')
-        m = pattern.search(text)
+        variables = VariableCollection()
 
-        parser = RuleParser()
+        for number, kind, entry in self.lines(text):
+            if kind != 'input':
+                continue
+            name, value = self.parse_variable(entry, number)
+            self.add_input_value(variables, name, value)
 
-        rules = []
+        return variables
 
-        while m:
-            orig_head = m.group(1)
-            output = m.group(2)
-            head = parser.parse(orig_head)
+    def parse_output_var(self, text):
+        """
+        Parsea la variable de salida y todos sus valores (con sus funciones)
 
-            output_value = output_var_def.get_value(output)
-            output_var = OutputVariable(output_var_def, output_value)
+        Si hay varias variables de salida devuelve un VariableCollection (ver
+        'parse')
 
-            rules.append(Rule(orig_head, head, output_var))
+        """
+        output_vars = VariableCollection()
 
-            m = pattern.search(text, m.end())
+        for number, kind, entry in self.lines(text):
+            if kind != 'output':
+                continue
+            name, value = self.parse_variable(entry, number)
+            self.add_input_value(output_vars, name, value)
 
-        return rules
+        return self.output_definition(output_vars)
 
-    def parse_input_values(self, text):
+    def parse_rules(self, text, output_var_def):
         """
-        Parsea los valores iniciales
+        Parsea el listado de reglas
 
         """
-        pattern = re.compile(r'ini: (.+?)\s+=\s+([\d\.]+)')
-        m = pattern.search(text)
-
-        d = {}
-
-        while m:
-            d[m.group(1)] = float(m.group(2))
+        return [self.build_rule(self.parse_rule(entry, number),
+                                output_var_def, number)
+                for number, kind, entry in self.lines(text)
+                if kind == 'rule']
 
-            m = pattern.search(text, m.end())
+    def parse_input_values(self, text):
+        """
+        Parsea los valores iniciales
 
-        return d
+        """
+        return dict(self.parse_input_value(entry, number)
+                    for number, kind, entry in self.lines(text)
+                    if kind == 'ini')
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+Sistemas de inferencia encadenados (jerarquicos)
+
+Para evitar la explosion de reglas de un unico modelo con muchas entradas,
+el control se reparte en varios sistemas pequeños: el valor concreto de una
+variable de salida de un sistema es el valor inicial de la variable de
+entrada del mismo nombre de otro sistema.
+
+'Pipeline' conecta los sistemas por el nombre de sus variables, comprueba
+que no haya ciclos y los ejecuta en orden topologico como una unidad: todos
+los sistemas se evaluan sobre una sola tabla de valores (las salidas de un
+sistema se escriben directamente en ella como entradas del siguiente) y una
+sola tabla de grados de membresia (ver 'StageContext'). 'PipelineSession'
+ejecuta la cadena de forma incremental: solo se vuelven a ejecutar los
+sistemas cuyas entradas cambiaron.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from fis.batch import normalize_inputs
+from fis.definitions import VariableCollection
+
+
+class StageContext(object):
+    """
+    Contexto de evaluacion de un sistema de la cadena
+
+    Hace el papel de 'EvaluationContext' sobre la tabla de valores de toda
+    la cadena ('input', sin copiarla). La tabla de grados de membresia
+    ('degrees') tambien es comun a todos los sistemas: cada grado se indexa
+    por (variable, funcion de membresia), por lo que dos sistemas solo
+    comparten un grado si usan la misma funcion. Las subexpresiones comunes
+    ('shared', ver 'RuleSet') son propias de cada sistema.
+
+    """
+    __slots__ = ('functions', 'input', 'degrees', 'shared')
+
+    def __init__(self, functions, values, degrees):
+        self.functions = functions
+        self.input = values
+        self.degrees = degrees
+        self.shared = {}
+
+    def membership(self, variable, value):
+        function = self.functions[(variable, value)]
+        key = (variable, id(function))
+        degree = self.degrees.get(key)
+        if degree is None:
+            degree = function.evaluate(self.input[variable])
+            self.degrees[key] = degree
+        return degree
+
+
+class StageVariables(StageContext):
+    """
+    Igual que 'StageContext', pero sobre arreglos de NumPy (hace el papel
+    de 'BatchVariables')
+
+    """
+    __slots__ = ('inputs', 'size')
+
+    def __init__(self, functions, columns, degrees, size):
+        StageContext.__init__(self, functions, columns, degrees)
+        self.inputs = columns
+        self.size = size
+
+    def membership(self, variable, value):
+        function = self.functions[(variable, value)]
+        key = (variable, id(function))
+        degrees = self.degrees.get(key)
+        if degrees is None:
+            degrees = function.evaluate_batch(self.input[variable])
+            self.degrees[key] = degrees
+        return degrees
+
+    def __len__(self):
+        return self.size
+
+
+class Stage(object):
+    """
+    Un sistema de la cadena, con el nombre de sus variables de entrada
+    ('inputs') y de salida ('outputs')
+
+    'functions' es {(variable, valor linguistico): funcion de membresia}
+    para todas las entradas del sistema (ver 'StageContext').
+
+    """
+    __slots__ = ('fis', 'inputs', 'outputs', 'functions')
+
+    def __init__(self, fis):
+        self.fis = fis
+        self.inputs = tuple(var.name for var in fis.input_vars)
+        self.outputs = tuple(var.name for var in fis.output_vars)
+        self.functions = dict(((var.name, v.value), v.function)
+                              for var in fis.input_vars for v in var.values)
+
+    def execute(self, values, degrees=None):
+        """
+        Ejecuta el sistema con los valores de 'values' y devuelve
+        {variable de salida: valor}
+
+        El sistema se evalua directamente sobre 'values' (la tabla de toda
+        la cadena) y sobre la tabla de grados 'degrees' (ver
+        'StageContext'). Los sistemas con cache se ejecutan con 'execute'
+        para que la cache siga teniendo efecto.
+
+        Si falta el valor de alguna entrada (porque el sistema que la
+        calcula no activo ninguna regla), ninguna salida tiene valor
+
+        """
+        for name in self.inputs:
+            if values[name] is None:
+                return dict((name, None) for name in self.outputs)
+
+        fis = self.fis
+        if fis.cache is not None:
+            result = fis.execute(dict((name, values[name])
+                                      for name in self.inputs))
+            if len(self.outputs) == 1:
+                return {self.outputs[0]: result}
+            return result
+
+        context = StageContext(self.functions, values,
+                               {} if degrees is None else degrees)
+        return fis.evaluate(context)
+
+    def execute_batch(self, columns, degrees, size):
+        """
+        Igual que 'execute', pero sobre arreglos de NumPy con 'size' filas
+        (NaN en las filas sin valor)
+
+        Si alguna fila no tiene valor en todas las entradas, solo se evaluan
+        las filas con valor, con su propia tabla de grados
+
+        """
+        missing = numpy.zeros(size, dtype=bool)
+        for name in self.inputs:
+            missing |= numpy.isnan(columns[name])
+
+        if not missing.any():
+            return self.fis.evaluate_batch(
+                StageVariables(self.functions, columns, degrees, size))
+
+        outputs = dict((name, numpy.full(size, numpy.nan))
+                       for name in self.outputs)
+        if missing.all():
+            return outputs
+
+        valid = ~missing
+        inputs = dict((name, columns[name][valid]) for name in self.inputs)
+        result = self.fis.evaluate_batch(StageVariables(
+            self.functions, inputs, {}, len(inputs[self.inputs[0]])))
+        for name, values in result.items():
+            outputs[name][valid] = values
+        return outputs
+
+
+class Pipeline(object):
+    """
+    Cadena de sistemas de inferencia conectados por el nombre de sus
+    variables (ver el comentario del modulo)
+
+    Contiene la siguiente informacion:
+    - Sistemas en orden de ejecucion ('stages', lista de Stage)
+    - Variables de entrada que no calcula ningun sistema ('input_vars',
+      VariableCollection)
+    - Variables de salida de todos los sistemas ('output_vars') y sus
+      nombres ('outputs')
+
+    Cada variable de salida debe calcularla un solo sistema. 'execute'
+    devuelve {variable: valor} con las salidas de todos los sistemas
+    (tambien las intermedias); una salida es None si su sistema no activa
+    ninguna regla o si le falta el valor de alguna entrada.
+
+    """
+    def __init__(self, systems):
+        stages = [Stage(fis) for fis in systems]
+        if not stages:
+            raise Exception('La cadena necesita al menos un sistema')
+
+        producers = {}
+        for i, stage in enumerate(stages):
+            for name in stage.outputs:
+                if name in producers:
+                    raise Exception('La variable de salida %s la calculan '
+                                    'varios sistemas' % name)
+                producers[name] = i
+
+        self.stages = [stages[i] for i in sort_stages(stages, producers)]
+
+        self.input_vars = VariableCollection()
+        self.output_vars = []
+        for stage in self.stages:
+            for var in stage.fis.input_vars:
+                if (var.name not in producers and
+                        self.input_vars.get_definition(var.name) is None):
+                    self.input_vars.append(var)
+            self.output_vars.extend(stage.fis.output_vars)
+        self.outputs = tuple(var.name for var in self.output_vars)
+
+    def execute(self, input_values):
+        """
+        Ejecuta todos los sistemas de la cadena en orden y devuelve
+        {variable de salida: valor concreto}
+
+        """
+        values = dict(input_values)
+        degrees = {}
+        for stage in self.stages:
+            values.update(stage.execute(values, degrees))
+        return dict((name, values[name]) for name in self.outputs)
+
+    def execute_batch(self, inputs, columns=None):
+        """
+        Igual que 'execute', pero sobre muchas filas a la vez (ver
+        'BatchVariables' para los formatos aceptados de 'inputs'): devuelve
+        {variable de salida: arreglo}, con NaN en las filas sin valor
+
+        """
+        if numpy is None:
+            raise ImportError('Se necesita NumPy para evaluar por lotes')
+
+        values = normalize_inputs(inputs, columns)
+        sizes = set(len(v) for v in values.values())
+        if len(sizes) > 1:
+            raise Exception('Las variables de entrada tienen distinto '
+                            'numero de valores')
+        size = sizes.pop() if sizes else 0
+
+        degrees = {}
+        for stage in self.stages:
+            values.update(stage.execute_batch(values, degrees, size))
+        return dict((name, values[name]) for name in self.outputs)
+
+    def session(self, input_values):
+        """
+        Devuelve una sesion para ejecutar la cadena de forma incremental a
+        partir de los valores iniciales 'input_values' (ver
+        'PipelineSession')
+
+        """
+        return PipelineSession(self, input_values)
+
+
+def sort_stages(stages, producers):
+    """
+    Devuelve los indices de 'stages' en orden topologico: cada sistema
+    aparece despues de los que calculan sus entradas
+
+    'producers' es {variable de salida: indice del sistema que la calcula}
+
+    """
+    order = []
+    # 0: sin visitar, 1: en el camino actual, 2: terminado
+    state = [0] * len(stages)
+
+    def visit(i, path):
+        if state[i] == 2:
+            return
+        if state[i] == 1:
+            raise Exception('La cadena de sistemas tiene un ciclo: %s' %
+                            ' -> '.join(path))
+        state[i] = 1
+        for name in stages[i].inputs:
+            j = producers.get(name)
+            if j is not None:
+                visit(j, path + [name])
+        state[i] = 2
+        order.append(i)
+
+    for i in range(len(stages)):
+        visit(i, [])
+    return order
+
+
+class PipelineSession(object):
+    """
+    Ejecucion incremental de una cadena de sistemas ('pipeline')
+
+    Guarda los valores de todas las variables ('values', entradas y salidas
+    intermedias). Al llamar a 'update' solo se ejecutan los sistemas con
+    alguna entrada distinta a la de su ultima ejecucion; si sus salidas no
+    cambian, los sistemas siguientes tampoco se ejecutan.
+
+    Los sistemas Mamdani con una sola variable de salida usan a su vez una
+    sesion incremental (ver 'fis.session.Session'). 'evaluations' cuenta
+    las veces que se ejecuto cada sistema (en el orden de 'stages').
+
+    """
+    def __init__(self, pipeline, input_values):
+        self.pipeline = pipeline
+        self.values = dict(input_values)
+        self.sessions = [None] * len(pipeline.stages)
+        self.evaluations = [0] * len(pipeline.stages)
+        for i in range(len(pipeline.stages)):
+            self.values.update(self.execute(i))
+
+    @property
+    def result(self):
+        """
+        {variable de salida: valor} de la ultima ejecucion
+
+        """
+        return dict((var.name, self.values[var.name])
+                    for var in self.pipeline.output_vars)
+
+    def execute(self, i):
+        """
+        Ejecuta el sistema 'i' con los valores actuales y devuelve
+        {variable de salida: valor}
+
+        """
+        stage = self.pipeline.stages[i]
+        self.evaluations[i] += 1
+        fis = stage.fis
+        if fis.sugeno or len(stage.outputs) > 1:
+            return stage.execute(self.values)
+
+        inputs = dict((name, self.values[name]) for name in stage.inputs)
+        if any(value is None for value in inputs.values()):
+            return {stage.outputs[0]: None}
+
+        session = self.sessions[i]
+        if session is None:
+            session = self.sessions[i] = fis.session(inputs)
+            return {stage.outputs[0]: session.value}
+        return {stage.outputs[0]: session.update(inputs)}
+
+    def update(self, *args, **values):
+        """
+        Cambia el valor de algunas variables de entrada (igual que
+        'dict.update') y devuelve {variable de salida: valor}
+
+        Ejemplo: session.update(Servicio=4)
+
+        """
+        values = dict(*args, **values)
+        changed = set(name for name, x in values.items()
+                      if self.values.get(name) != x)
+        self.values.update(values)
+
+        for i, stage in enumerate(self.pipeline.stages):
+            if changed.isdisjoint(stage.inputs):
+                continue
+            for name, value in self.execute(i).items():
+                if self.values.get(name) != value:
+                    self.values[name] = value
+                    changed.add(name)
+        return self.result
+
+    def verify(self, tolerance=1e-9):
+        """
+        Comprueba que el estado incremental coincide con ejecutar la cadena
+        completa con los valores iniciales actuales
+
+        """
+        inputs = dict((var.name, self.values[var.name])
+                      for var in self.pipeline.input_vars)
+        expected = self.pipeline.execute(inputs)
+        for name, value in expected.items():
+            current = self.values[name]
+            if value is None or current is None:
+                if value is not None or current is not None:
+                    return False
+            elif abs(value - current) > tolerance:
+                return False
+        return True
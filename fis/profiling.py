@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import time
+
+from fis.parser import InputParser
+
+# Reloj de mayor resolucion disponible
+timer = getattr(time, 'perf_counter', time.time)
+
+PHASES = ('parse', 'fuzzify', 'infer', 'defuzzify')
+
+
+class RuleStats(object):
+    """
+    Estadisticas de una regla durante el perfilado
+
+    Contiene la siguiente informacion:
+    - Veces que se evaluo ('evaluations'; las reglas descartadas por el
+      indice no se evaluan)
+    - Veces que se activo (grado distinto de 0, 'fired') y veces que valio 0
+      ('zero', incluyendo las veces que no se evaluo)
+    - Tiempo total de evaluacion en segundos ('time')
+    - Grado de activacion maximo y ultimo ('max_strength', 'last_strength')
+
+    """
+    __slots__ = ('rule', 'evaluations', 'fired', 'zero', 'time',
+                 'max_strength', 'last_strength')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.evaluations = 0
+        self.fired = 0
+        self.zero = 0
+        self.time = 0.0
+        self.max_strength = 0
+        self.last_strength = 0
+
+    def report(self):
+        return {'rule': str(self.rule), 'evaluations': self.evaluations,
+                'fired': self.fired, 'zero': self.zero, 'time': self.time,
+                'max_strength': self.max_strength,
+                'last_strength': self.last_strength}
+
+
+class Profiler(object):
+    """
+    Instrumentacion opcional de las ejecuciones de un FIS
+
+    Se activa asignandolo al sistema ('FIS(..., profiler=Profiler())' o
+    'fis.profiler = Profiler()'), solo si es Mamdani con una variable de
+    salida. Sin perfilador, 'execute' solo comprueba que el perfilador es
+    None.
+
+    Guarda la siguiente informacion:
+    - Cantidad de ejecuciones ('executions')
+    - Tiempo total de cada fase ('phases'): carga del modelo ('parse', ver
+      'Profiler.parse'), grados de membresia ('fuzzify'), evaluacion de las
+      reglas ('infer') y valor concreto ('defuzzify', con la agregacion
+      cuando hace falta, ver 'FIS.defuzzify')
+    - Estadisticas de cada regla ('rules', ver 'RuleStats')
+    - Cantidad de veces que se calculo cada grado de membresia
+      ('memberships', {(variable, valor): cantidad})
+
+    Funciones a las que se llama en cada ejecucion:
+    - on_rule(indice, regla, grado, segundos), por cada regla evaluada
+    - on_execute(valores iniciales, resultado, {fase: segundos})
+
+    Un perfilador no debe compartirse entre varios hilos.
+
+    """
+    def __init__(self, on_rule=None, on_execute=None):
+        self.on_rule = on_rule
+        self.on_execute = on_execute
+        self.reset()
+
+    def reset(self):
+        self.executions = 0
+        self.phases = dict((phase, 0.0) for phase in PHASES)
+        self.rules = {}
+        self.memberships = {}
+
+    def parse(self, text, parser=None):
+        """
+        Carga el modelo 'text' con 'InputParser', contando el tiempo en la
+        fase 'parse'
+
+        """
+        if parser is None:
+            parser = InputParser()
+        start = timer()
+        result = parser.parse(text)
+        self.phases['parse'] += timer() - start
+        return result
+
+    def stats(self, index, rule):
+        stats = self.rules.get(index)
+        if stats is None:
+            stats = self.rules[index] = RuleStats(rule)
+        return stats
+
+    def execute(self, fis, input_values):
+        """
+        Igual que 'FIS.execute' (sin cache), midiendo cada fase
+
+        Los grados de membresia distintos de 0 se calculan antes de evaluar
+        las reglas, para poder medir las fases por separado
+
+        """
+        start = timer()
+        context = fis.input_vars.context(input_values)
+        for variable, value in fis.rule_index.active(input_values):
+            context.membership(variable, value)
+        fuzzified = timer()
+
+        activations = dict((v.value, 0) for v in fis.output_var.values)
+        evaluators = fis.rule_set.evaluators
+        candidates = fis.rule_index.candidates(input_values)
+        on_rule = self.on_rule
+
+        for i in candidates:
+            rule = fis.rules[i]
+            begin = timer()
+            result = evaluators[i].evaluate(context)
+            elapsed = timer() - begin
+
+            stats = self.stats(i, rule)
+            stats.evaluations += 1
+            stats.time += elapsed
+            stats.last_strength = result
+            if result > stats.max_strength:
+                stats.max_strength = result
+            if result:
+                stats.fired += 1
+            if on_rule is not None:
+                on_rule(i, rule, result, elapsed)
+
+            value = rule.output_var.value.value
+            if result > activations[value]:
+                activations[value] = result
+        inferred = timer()
+
+        # El mismo calculo que sin perfilador
+        value = fis.defuzzify(activations)
+        end = timer()
+
+        # Reglas descartadas por el indice o con grado 0
+        self.executions += 1
+        for i, rule in enumerate(fis.rules):
+            stats = self.stats(i, rule)
+            stats.zero = self.executions - stats.fired
+
+        for key in context.degrees:
+            self.memberships[key] = self.memberships.get(key, 0) + 1
+
+        phases = {'fuzzify': fuzzified - start,
+                  'infer': inferred - fuzzified,
+                  'defuzzify': end - inferred}
+        for phase, elapsed in phases.items():
+            self.phases[phase] += elapsed
+
+        if self.on_execute is not None:
+            self.on_execute(input_values, value, phases)
+        return value
+
+    def report(self):
+        """
+        Devuelve toda la informacion recogida como un diccionario (por
+        ejemplo, para guardarlo en JSON)
+
+        """
+        return {
+            'executions': self.executions,
+            'phases': dict(self.phases),
+            'rules': [dict(self.rules[i].report(), index=i)
+                      for i in sorted(self.rules)],
+            'memberships': dict(('%s = %s' % key, count)
+                                for key, count in self.memberships.items()),
+        }
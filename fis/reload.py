@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Recarga en caliente de un modelo cuando cambia su fichero
+
+'ModelLoader' vuelve a parsear un modelo de forma incremental: cada entrada
+('input:', 'output:', 'rule:') se identifica por su texto, por lo que solo
+se parsean y compilan las entradas nuevas o modificadas. Las variables de
+entrada (o de salida) se reconstruyen solo si cambio alguna de sus
+entradas, y el grafo de las reglas se actualiza en lugar de construirse de
+nuevo (ver 'RuleSet.update').
+
+'ModelHandle' vigila el fichero y, si cambia su contenido, carga el modelo
+nuevo y lo reemplaza de forma atomica: las ejecuciones que ya empezaron
+terminan con el modelo anterior (el FIS no se modifica durante una
+ejecucion, ver 'EvaluationContext').
+"""
+import hashlib
+import os
+import threading
+
+from fis.compiler import RuleSet
+from fis.core import FIS
+from fis.definitions import VariableCollection
+from fis.index import RuleIndex, required_atoms
+from fis.parser import InputParser, ParseError
+
+
+class ModelLoader(object):
+    """
+    Parsea versiones sucesivas de un mismo modelo reutilizando todo lo que
+    no cambio (ver el comentario del modulo)
+
+    'strict' se pasa a 'InputParser'.
+
+    Contiene la siguiente informacion de la ultima carga:
+    - Entradas parseadas de nuevo ('parsed')
+    - Entradas reutilizadas ('reused')
+
+    """
+    def __init__(self, strict=False):
+        self.parser = InputParser(strict)
+        # {linea: (tipo, entrada)} (ver 'InputParser.lines')
+        self.lines = {}
+        # {(tipo, texto): (variable, ValueDefinition)}
+        self.values = {}
+        # {texto: lo devuelto por 'InputParser.parse_rule'}
+        self.heads = {}
+        # {texto: Rule}, validas mientras no cambien las salidas
+        self.rules = {}
+        # {tipo: (textos de las entradas, VariableCollection)}
+        self.sections = {}
+        self.rule_set = None
+        # {id(encabezado compilado): 'required_atoms'}
+        self.required = {}
+        self.parsed = 0
+        self.reused = 0
+
+    def load(self, text, **options):
+        """
+        Devuelve una tupla (FIS, valores iniciales) con el modelo de 'text'
+
+        'options' se pasa al constructor del FIS (por ejemplo 'cache'). Si
+        el texto tiene errores se lanza ParseError y el estado anterior
+        sigue siendo valido para la siguiente carga.
+
+        """
+        parser = self.parser
+        self.parsed = self.reused = 0
+        entries = {'input': [], 'output': [], 'rule': [], 'ini': []}
+        lines = {}
+        for number, line in enumerate(text.splitlines(), 1):
+            found = self.lines.get(line)
+            if found is None:
+                m = parser.line_pattern.match(line)
+                if m:
+                    found = m.groups()
+                else:
+                    if parser.strict:
+                        parser.check_line(line, number)
+                    found = ()
+            lines[line] = found
+            if found:
+                entries[found[0]].append((number,) + found[1:])
+
+        values = {}
+        sections = {}
+        input_vars = self.section('input', entries['input'], values,
+                                  sections)
+        output_vars = self.section('output', entries['output'], values,
+                                   sections)
+        outputs_changed = 'output' in sections
+        if sections:
+            parser.check_outputs(
+                [(number, ) + values[('output', entry)]
+                 for number, entry in entries['output']], input_vars)
+        output_var_def = parser.output_definition(output_vars)
+
+        if outputs_changed:
+            # Las reglas apuntan a las definiciones de salida anteriores
+            self.rules = {}
+            parser.output_vars = {}
+
+        rules = []
+        heads = {}
+        built = {}
+        for number, entry in entries['rule']:
+            head = self.heads.get(entry)
+            if head is None:
+                self.parsed += 1
+                head = parser.parse_rule(entry, number)
+            else:
+                self.reused += 1
+            heads[entry] = head
+
+            rule = self.rules.get(entry)
+            if rule is None:
+                rule = parser.build_rule(head, output_var_def, number)
+            built[entry] = rule
+            rules.append(rule)
+
+        input_values = dict(parser.parse_input_value(entry, number)
+                            for number, entry in entries['ini'])
+
+        evaluators = [rule.evaluator for rule in rules]
+        if self.rule_set is None:
+            rule_set = RuleSet(evaluators)
+        else:
+            rule_set = self.rule_set.update(evaluators)
+
+        required = {}
+        for evaluator in evaluators:
+            k = id(evaluator)
+            if k not in required:
+                atoms = self.required.get(k)
+                required[k] = (required_atoms(evaluator) if atoms is None
+                               else atoms)
+        rule_index = RuleIndex(input_vars, rule_set.evaluators,
+                               [required[id(e)] for e in evaluators])
+
+        # Solo se conserva lo que usa la version actual
+        self.lines = lines
+        self.sections.update(sections)
+        if sections:
+            self.values = values
+        self.heads = heads
+        self.rules = built
+        self.rule_set = rule_set
+        self.required = required
+        parser.evaluators = dict((head[0], head[1])
+                                 for head in heads.values())
+
+        fis = FIS(input_vars, output_var_def, rules, rule_set=rule_set,
+                  rule_index=rule_index, **options)
+        return fis, input_values
+
+    def section(self, kind, entries, values, sections):
+        """
+        Devuelve las variables (VariableCollection) de las entradas
+        'entries' de tipo 'kind'
+
+        Si no cambio ninguna entrada respecto a la carga anterior devuelve
+        la misma coleccion. Si no, agrega la coleccion nueva a 'sections' y
+        el valor parseado de cada entrada (de las dos secciones) a 'values'
+
+        """
+        texts = tuple(entry for _, entry in entries)
+        previous = self.sections.get(kind)
+        if previous is not None and previous[0] == texts:
+            self.reused += len(texts)
+            for entry in texts:
+                values[(kind, entry)] = self.values[(kind, entry)]
+            return previous[1]
+
+        variables = VariableCollection()
+        for number, entry in entries:
+            key = (kind, entry)
+            value = self.values.get(key)
+            if value is None:
+                self.parsed += 1
+                value = self.parser.parse_variable(entry, number)
+            else:
+                self.reused += 1
+            values[key] = value
+            self.parser.add_input_value(variables, *value)
+
+        sections[kind] = (texts, variables)
+        return variables
+
+
+class ModelHandle(object):
+    """
+    Modelo que se vuelve a cargar cuando cambia su fichero ('path')
+
+    El modelo actual esta en 'model' (FIS) y sus valores iniciales en
+    'input_values'. 'execute' y 'execute_batch' toman el modelo actual una
+    sola vez, por lo que una ejecucion nunca mezcla dos versiones.
+
+    'check' comprueba si el fichero cambio (fecha de modificacion, tamaño y
+    hash del contenido) y lo recarga; 'watch' lo comprueba periodicamente
+    desde un hilo. Si la version nueva tiene errores se mantiene el modelo
+    anterior y el error queda en 'error'.
+
+    Contiene ademas:
+    - Numero de version ('version', cantidad de recargas)
+    - Cargador incremental ('loader', ver 'ModelLoader')
+
+    """
+    def __init__(self, path, **options):
+        self.path = path
+        self.options = options
+        self.loader = ModelLoader()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = threading.Event()
+        self.version = 0
+        self.error = None
+        self.stamp = None
+        self.digest = None
+        self.model = None
+        self.input_values = {}
+        if not self.check():
+            raise self.error
+
+    @property
+    def input_vars(self):
+        return self.model.input_vars
+
+    @property
+    def output_vars(self):
+        return self.model.output_vars
+
+    def execute(self, input_values):
+        return self.model.execute(input_values)
+
+    def execute_batch(self, inputs, columns=None):
+        return self.model.execute_batch(inputs, columns)
+
+    def check(self):
+        """
+        Recarga el modelo si cambio el fichero
+
+        Devuelve True si se cargo una version nueva
+
+        """
+        try:
+            info = os.stat(self.path)
+        except OSError as e:
+            self.error = e
+            return False
+        stamp = (info.st_mtime, info.st_size)
+        if stamp == self.stamp:
+            return False
+        return self.reload(stamp)
+
+    def reload(self, stamp=None):
+        """
+        Vuelve a leer el fichero (aunque no haya cambiado su fecha) y carga
+        el modelo si cambio su contenido
+
+        Devuelve True si se cargo una version nueva
+
+        """
+        with self.lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    data = f.read()
+            except (IOError, OSError) as e:
+                self.error = e
+                return False
+
+            self.stamp = stamp
+            digest = hashlib.sha1(data).hexdigest()
+            if digest == self.digest:
+                return False
+
+            text = data if isinstance(data, str) else data.decode('utf-8')
+            try:
+                model, input_values = self.loader.load(text, **self.options)
+            except Exception as e:
+                self.error = e
+                return False
+
+            self.digest = digest
+            self.input_values = input_values
+            self.model = model
+            self.version += 1
+            self.error = None
+            return True
+
+    def watch(self, interval=1.0):
+        """
+        Comprueba el fichero cada 'interval' segundos desde un hilo aparte,
+        hasta llamar a 'stop'
+
+        """
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+
+        def run():
+            while not self.stopped.wait(interval):
+                self.check()
+
+        self.thread = threading.Thread(target=run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+Formato binario de un modelo compilado
+
+Guarda los parametros de las funciones de membresia, las tablas de
+variables y valores linguisticos y la estructura compilada de las reglas en
+arreglos planos, por lo que cargar un modelo no necesita volver a parsear
+ni compilar el texto original.
+
+Alcance: al cargar se reconstruyen todos los objetos del modelo (funciones,
+nodos, reglas e indice) y la evaluacion no usa los arreglos. Cargar es mas
+rapido que parsear, pero no es instantaneo (decimas de segundo con decenas
+de miles de reglas), y los objetos no se comparten entre procesos salvo que
+el modelo se cargue antes de 'fork'. Evaluar directamente sobre un fichero
+proyectado en memoria ('mmap') queda fuera de este formato.
+
+Estructura del fichero (little-endian):
+- Cabecera: 'PYFISBIN', version (uint32), cantidad de secciones (uint32)
+- Tabla de secciones: tipo ('i': int32, 'd': float64, 'B': bytes),
+  cantidad de elementos y posicion en el fichero de cada seccion
+- Secciones (alineadas a 8 bytes), en el orden de 'SECTIONS'
+
+Los parametros de cada funcion son los de su metodo 'parameters'. Los que
+son textos (por ejemplo las variables de un consecuente lineal) se guardan
+como el indice del texto, y su posicion en 'param_texts'.
+
+Las variables se guardan como [cantidad de variables de entrada, variables
+de entrada..., cantidad de variables de salida, variables de salida...].
+
+Las reglas se guardan ya compiladas en un unico grafo (ver 'RuleSet'): cada
+nodo se guarda una sola vez, despues de sus operandos, como
+[instruccion, subexpresion compartida + 1 (0 si no lo es), cantidad de
+operandos, operandos...]. Los operandos de 'ATOM' son los indices de la
+variable y el valor en la tabla de textos; los del resto de instrucciones
+('NOT', 'AND' y 'OR') son los indices de otros nodos. Tambien se guardan
+los (variable, valor) que necesita cada regla (ver 'RuleIndex').
+"""
+import numbers
+import struct
+
+from fis.compiler import Atom, And, Or, Not, Shared, RuleSet
+from fis.core import FIS
+from fis.definitions import (VariableCollection, VariableDefinition,
+                             ValueDefinition, OutputVariable, Rule)
+from fis.functions import (TriangularFunction, TrapezoidalFunction,
+                           PiecewiseLinearFunction, ShoulderFunction,
+                           GaussianFunction, BellFunction, SigmoidFunction)
+from fis.index import RuleIndex
+from fis.sugeno import ConstantConsequent, LinearConsequent
+
+
+MAGIC = b'PYFISBIN'
+VERSION = 1
+
+HEADER = struct.Struct('<8sII')
+SECTION = struct.Struct('<cxxxIQ')
+
+SECTIONS = (
+    ('string_offsets', 'i'),
+    ('strings', 'B'),
+    ('kinds', 'i'),
+    ('param_offsets', 'i'),
+    ('params', 'd'),
+    ('variables', 'i'),
+    ('stats', 'i'),
+    ('nodes', 'i'),
+    ('rules', 'i'),
+    ('required', 'i'),
+    ('param_texts', 'i'),
+)
+
+# Tipos de funciones de membresia y consecuentes (los nuevos se agregan al
+# final)
+FUNCTIONS = (TriangularFunction, TrapezoidalFunction, PiecewiseLinearFunction,
+             ShoulderFunction, GaussianFunction, BellFunction,
+             SigmoidFunction, ConstantConsequent, LinearConsequent)
+
+# Instrucciones de cada nodo del grafo de reglas
+ATOM, NOT, AND, OR = range(4)
+
+
+class Writer(object):
+    """
+    Construye las secciones de un modelo compilado
+
+    """
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+        self.kinds = []
+        self.param_offsets = [0]
+        self.params = []
+        self.param_texts = []
+        self.variables = []
+        self.nodes = []
+        self.node_ids = {}
+        self.rules = []
+        self.required = []
+
+    def string(self, text):
+        i = self.string_ids.get(text)
+        if i is None:
+            i = self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return i
+
+    def function(self, function):
+        self.kinds.append(FUNCTIONS.index(type(function)))
+        for parameter in function.parameters():
+            if not isinstance(parameter, numbers.Real):
+                self.param_texts.append(len(self.params))
+                parameter = self.string(parameter)
+            self.params.append(parameter)
+        self.param_offsets.append(len(self.params))
+        return len(self.kinds) - 1
+
+    def variable(self, definition):
+        self.variables.extend((self.string(definition.name),
+                               len(definition.values)))
+        for value in definition.values:
+            self.variables.extend((self.string(value.value),
+                                   self.function(value.function)))
+
+    def node(self, node):
+        """
+        Agrega el nodo 'node' (y sus operandos) al grafo, una sola vez
+
+        Devuelve el indice del nodo
+
+        """
+        i = self.node_ids.get(id(node))
+        if i is not None:
+            return i
+
+        shared = 0
+        inner = node
+        if isinstance(node, Shared):
+            shared = node.index + 1
+            inner = node.node
+
+        if isinstance(inner, Atom):
+            code = ATOM
+            operands = (self.string(inner.variable), self.string(inner.value))
+        elif isinstance(inner, Not):
+            code = NOT
+            operands = (self.node(inner.operand),)
+        else:
+            code = OR if isinstance(inner, Or) else AND
+            operands = tuple(self.node(o) for o in inner.operands)
+
+        self.nodes.extend((code, shared, len(operands)) + operands)
+        i = self.node_ids[id(node)] = len(self.node_ids)
+        return i
+
+    def rule(self, rule, evaluator, required):
+        root = self.node(evaluator)
+        start = len(self.required)
+        for variable, value in sorted(required):
+            self.required.extend((self.string(variable), self.string(value)))
+        self.rules.extend((self.string(rule.orig_head),
+                           self.string(rule.output_var.definition.name),
+                           self.string(rule.output_var.value.value),
+                           root, start, len(self.required)))
+
+    def sections(self):
+        blobs = [text.encode('utf-8') for text in self.strings]
+        offsets = [0]
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+
+        return {
+            'string_offsets': offsets,
+            'strings': b''.join(blobs),
+            'kinds': self.kinds,
+            'param_offsets': self.param_offsets,
+            'params': self.params,
+            'variables': self.variables,
+            'stats': self.stats,
+            'nodes': self.nodes,
+            'rules': self.rules,
+            'required': self.required,
+            'param_texts': self.param_texts,
+        }
+
+
+def save_compiled(fis, path):
+    """
+    Guarda el sistema 'fis' en el fichero 'path' en formato binario
+
+    """
+    writer = Writer()
+
+    writer.variables.append(len(fis.input_vars))
+    for definition in fis.input_vars:
+        writer.variable(definition)
+    writer.variables.append(len(fis.output_vars))
+    for definition in fis.output_vars:
+        writer.variable(definition)
+
+    rule_set = fis.rule_set
+    for rule, evaluator, required in zip(fis.rules, rule_set.evaluators,
+                                         fis.rule_index.required):
+        writer.rule(rule, evaluator, required)
+    writer.stats = [rule_set.total_nodes, rule_set.unique_nodes,
+                    rule_set.shared_nodes]
+
+    sections = writer.sections()
+
+    table = []
+    data = []
+    position = HEADER.size + SECTION.size * len(SECTIONS)
+    for name, typecode in SECTIONS:
+        values = sections[name]
+        if typecode == 'B':
+            blob = values
+        else:
+            blob = struct.pack('<%d%s' % (len(values), typecode), *values)
+        padding = -position % 8
+        position += padding
+        table.append(SECTION.pack(typecode.encode('ascii'), len(values),
+                                  position))
+        data.append(b'\0' * padding + blob)
+        position += len(blob)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(SECTIONS)))
+        f.write(b''.join(table))
+        f.write(b''.join(data))
+
+
+def load_compiled(path):
+    """
+    Carga un sistema guardado con 'save_compiled'
+
+    El fichero se lee de una vez y cada seccion se decodifica con 'struct'
+    (sin 'pickle' ni volver a parsear el texto); los objetos del modelo
+    (funciones, nodos, reglas) se reconstruyen a partir de los arreglos
+
+    """
+    with open(path, 'rb') as f:
+        buf = f.read()
+    return Reader(buf).read()
+
+
+class Reader(object):
+    """
+    Reconstruye un sistema a partir de las secciones de un modelo compilado
+
+    """
+    def __init__(self, buf):
+        self.buf = buf
+
+        magic, version, count = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise Exception('El fichero no es un modelo compilado')
+        if version != VERSION:
+            raise Exception('Version de modelo compilado no soportada: %d' %
+                            version)
+
+        self.sections = {}
+        for i, (name, _) in enumerate(SECTIONS[:count]):
+            typecode, length, offset = SECTION.unpack_from(
+                buf, HEADER.size + i * SECTION.size)
+            self.sections[name] = (str(typecode.decode('ascii')), length,
+                                   offset)
+
+    def array(self, name):
+        typecode, length, offset = self.sections[name]
+        if typecode == 'B':
+            return self.buf[offset:offset + length]
+        return struct.unpack_from('<%d%s' % (length, typecode), self.buf,
+                                  offset)
+
+    def read(self):
+        offsets = self.array('string_offsets')
+        blob = self.array('strings')
+        self.strings = [blob[start:end].decode('utf-8')
+                        for start, end in zip(offsets, offsets[1:])]
+
+        self.kinds = self.array('kinds')
+        self.param_offsets = self.array('param_offsets')
+        self.params = self.array('params')
+        self.param_texts = frozenset(self.array('param_texts'))
+
+        variables = self.array('variables')
+        position = 1
+        input_vars = VariableCollection()
+        for _ in range(variables[0]):
+            definition, position = self.variable(variables, position)
+            input_vars.append(definition)
+        count = variables[position]
+        position += 1
+        definitions = []
+        for _ in range(count):
+            definition, position = self.variable(variables, position)
+            definitions.append(definition)
+
+        output_vars = dict(((d.name, v.value), OutputVariable(d, v))
+                           for d in definitions for v in d.values)
+
+        nodes = self.nodes()
+        strings = self.strings
+        required_table = self.array('required')
+        atoms = [(strings[variable], strings[value]) for variable, value
+                 in zip(required_table[::2], required_table[1::2])]
+        table = self.array('rules')
+        rules = []
+        evaluators = []
+        required = []
+        for i in range(0, len(table), 6):
+            head, name, output, root, start, end = table[i:i + 6]
+            evaluators.append(nodes[root])
+            required.append(frozenset(atoms[start // 2:end // 2]))
+            rules.append(Rule(strings[head], None,
+                              output_vars[(strings[name], strings[output])],
+                              nodes[root]))
+
+        total_nodes, unique_nodes, shared_nodes = self.array('stats')
+        rule_set = RuleSet.compiled(evaluators, total_nodes, unique_nodes,
+                                    shared_nodes)
+        rule_index = RuleIndex(input_vars, evaluators, required)
+
+        return FIS(input_vars, definitions, rules, rule_set, rule_index)
+
+    def function(self, i):
+        start, end = self.param_offsets[i], self.param_offsets[i + 1]
+        cls = FUNCTIONS[self.kinds[i]]
+        texts = self.param_texts
+        params = [self.strings[int(p)] if j in texts else p
+                  for j, p in enumerate(self.params[start:end], start)]
+        return cls.from_parameters(params)
+
+    def variable(self, variables, position):
+        name, count = variables[position:position + 2]
+        position += 2
+        values = []
+        for _ in range(count):
+            value, function = variables[position:position + 2]
+            position += 2
+            values.append(ValueDefinition(self.strings[value],
+                                          self.function(function)))
+        return VariableDefinition(self.strings[name], values), position
+
+    def nodes(self):
+        """
+        Reconstruye todos los nodos del grafo de reglas (en orden)
+
+        """
+        data = self.array('nodes')
+        nodes = []
+        i = 0
+        while i < len(data):
+            code, shared, count = data[i:i + 3]
+            operands = data[i + 3:i + 3 + count]
+            i += 3 + count
+
+            if code == ATOM:
+                node = Atom(self.strings[operands[0]],
+                            self.strings[operands[1]])
+            elif code == NOT:
+                node = Not(nodes[operands[0]])
+            else:
+                cls = Or if code == OR else And
+                node = cls([nodes[j] for j in operands])
+
+            if shared:
+                node = Shared(node, shared - 1)
+            nodes.append(node)
+
+        return nodes
@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor TCP (asyncio) que ejecuta un sistema cargado una sola vez
+
+Protocolo: una peticion JSON por linea y una respuesta JSON por linea, en
+el mismo orden que las peticiones de cada conexion.
+
+    {"id": 1, "inputs": {"Servicio": 3, "Comida": 8}}
+    -> {"id": 1, "value": 17.5}
+
+    {"command": "stats"}
+    -> {"stats": {"requests": ..., "batches": ..., ...}}
+
+Las peticiones que llegan dentro de una ventana corta ('max_wait') se
+evaluan juntas con 'FIS.execute_batch' (ver 'BatchExecutor'). Solo funciona
+en Python 3 (necesita 'asyncio').
+
+En lugar de un FIS se puede servir un 'ModelHandle' (ver 'fis.reload'): cada
+lote se evalua con la version del modelo vigente al empezar el lote.
+"""
+import collections
+import json
+import math
+import numbers
+import time
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from fis.reload import ModelHandle
+
+Protocol = asyncio.Protocol if asyncio is not None else object
+
+
+def to_value(value):
+    return None if math.isnan(value) else float(value)
+
+
+def invalid_inputs(input_vars, input_values):
+    """
+    Devuelve el error de una peticion con los valores de entrada
+    'input_values', o None si se puede evaluar
+
+    """
+    if not isinstance(input_values, dict):
+        return 'Las entradas deben ser un objeto JSON'
+    missing = [var.name for var in input_vars
+               if var.name not in input_values]
+    if missing:
+        return 'Faltan variables: %s' % ', '.join(missing)
+    invalid = [var.name for var in input_vars
+               if not is_number(input_values[var.name])]
+    if invalid:
+        return 'Valores no numericos: %s' % ', '.join(invalid)
+    return None
+
+
+def is_number(value):
+    return (isinstance(value, numbers.Real) and
+            not isinstance(value, bool))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[int(round(p / 100.0 * (len(values) - 1)))]
+
+
+class BatchExecutor(object):
+    """
+    Agrupa las peticiones que llegan en una ventana de tiempo y las evalua
+    juntas
+
+    - max_batch_size: cantidad maxima de peticiones por lote (si se alcanza,
+      el lote se evalua sin esperar)
+    - max_wait: tiempo maximo (en segundos) que espera una peticion a que se
+      llene el lote. La espera es adaptativa: si el lote anterior tenia una
+      sola peticion (poca carga) el siguiente se evalua en la proxima vuelta
+      del bucle, sin esperar
+    - max_pending: cantidad maxima de peticiones sin responder; al
+      alcanzarla se deja de leer de las conexiones hasta que se evalue el
+      lote ('pause'/'resume')
+
+    Los lotes se evaluan en el hilo del bucle de eventos. Si falla la
+    evaluacion de un lote, sus filas se evaluan una por una y solo fallan
+    las peticiones con errores.
+
+    """
+    def __init__(self, fis, loop, max_batch_size=64, max_wait=0.002,
+                 max_pending=1024, latencies=10000):
+        self.fis = fis
+        self.loop = loop
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+
+        self.pending = []
+        self.handle = None
+        self.last_size = 0
+        self.listeners = set()
+        self.paused = False
+
+        self.started = time.time()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.pauses = 0
+        self.latencies = collections.deque(maxlen=latencies)
+
+    def model(self):
+        """
+        Devuelve el FIS vigente (el de 'fis', o su version actual si es un
+        'ModelHandle')
+
+        """
+        if isinstance(self.fis, ModelHandle):
+            return self.fis.model
+        return self.fis
+
+    def submit(self, input_values):
+        """
+        Agrega una peticion al lote actual
+
+        Devuelve un 'asyncio.Future' con el resultado
+
+        """
+        future = self.loop.create_future()
+        error = invalid_inputs(self.model().input_vars, input_values)
+        if error is not None:
+            self.errors += 1
+            future.set_exception(Exception(error))
+            return future
+
+        self.pending.append((input_values, future, time.time()))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.handle is None:
+            wait = self.max_wait if self.last_size > 1 else 0
+            self.handle = self.loop.call_later(wait, self.flush)
+
+        if len(self.pending) >= self.max_pending and not self.paused:
+            self.paused = True
+            self.pauses += 1
+            for listener in list(self.listeners):
+                listener.pause()
+        return future
+
+    def flush(self):
+        """
+        Evalua todas las peticiones pendientes
+
+        """
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        batch, self.pending = self.pending, []
+        self.last_size = len(batch)
+        if not batch:
+            return
+        self.requests += len(batch)
+        self.batches += 1
+
+        rows = [input_values for input_values, _, _ in batch]
+        try:
+            values = self.evaluate(rows)
+        except Exception:
+            # Se evalua cada fila por separado: solo fallan las peticiones
+            # con errores
+            values = [self.evaluate_row(row) for row in rows]
+
+        now = time.time()
+        for (_, future, start), value in zip(batch, values):
+            if isinstance(value, Exception):
+                self.errors += 1
+                if not future.done():
+                    future.set_exception(value)
+                continue
+            self.latencies.append(now - start)
+            if not future.done():
+                future.set_result(value)
+
+        if self.paused and len(self.pending) < self.max_pending:
+            self.paused = False
+            for listener in list(self.listeners):
+                listener.resume()
+
+    def evaluate(self, rows):
+        """
+        Devuelve el valor de salida de cada fila (None si no se activa
+        ninguna regla), o {variable: valor} si hay varias variables de
+        salida
+
+        """
+        fis = self.model()
+        if numpy is None:
+            return [fis.execute(row) for row in rows]
+
+        columns = dict((var.name, [row[var.name] for row in rows])
+                       for var in fis.input_vars)
+        result = fis.execute_batch(columns)
+        if not isinstance(result, dict):
+            return [to_value(value) for value in result]
+        return [dict((name, to_value(values[i]))
+                     for name, values in result.items())
+                for i in range(len(rows))]
+
+    def evaluate_row(self, row):
+        """
+        Igual que 'evaluate' para una sola fila; devuelve la excepcion en
+        lugar de lanzarla
+
+        """
+        try:
+            return self.evaluate([row])[0]
+        except Exception as e:
+            return e
+
+    def stats(self):
+        elapsed = time.time() - self.started
+        latencies = list(self.latencies)
+        stats = {
+            'requests': self.requests,
+            'batches': self.batches,
+            'errors': self.errors,
+            'pauses': self.pauses,
+            'pending': len(self.pending),
+            'mean_batch_size': (self.requests / float(self.batches)
+                                if self.batches else 0),
+            'throughput': self.requests / elapsed if elapsed else 0,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p99': percentile(latencies, 99),
+        }
+        if isinstance(self.fis, ModelHandle):
+            stats['version'] = self.fis.version
+        return stats
+
+
+class InferenceProtocol(Protocol):
+    """
+    Conexion de un cliente: lee peticiones linea a linea y escribe las
+    respuestas en el mismo orden
+
+    """
+    def __init__(self, executor):
+        self.executor = executor
+        self.buffer = b''
+        self.transport = None
+        self.responses = collections.deque()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.executor.listeners.add(self)
+        if self.executor.paused:
+            self.pause()
+
+    def connection_lost(self, exc):
+        self.executor.listeners.discard(self)
+        self.transport = None
+
+    def pause(self):
+        if self.transport is not None:
+            self.transport.pause_reading()
+
+    def resume(self):
+        if self.transport is not None:
+            self.transport.resume_reading()
+
+    def data_received(self, data):
+        lines = (self.buffer + data).split(b'\n')
+        self.buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                self.request(line)
+
+    def request(self, line):
+        future = self.executor.loop.create_future()
+        self.responses.append(future)
+        future.add_done_callback(lambda _: self.write_responses())
+
+        try:
+            message = json.loads(line.decode('utf-8'))
+        except ValueError:
+            future.set_result({'error': 'JSON invalido'})
+            return
+
+        if not isinstance(message, dict):
+            future.set_result({'error': 'Se esperaba un objeto JSON'})
+        elif message.get('command') == 'stats':
+            future.set_result({'stats': self.executor.stats()})
+        else:
+            result = self.executor.submit(message.get('inputs', {}))
+            result.add_done_callback(
+                lambda r: future.set_result(self.response(message, r)))
+
+    def response(self, message, result):
+        response = {}
+        if 'id' in message:
+            response['id'] = message['id']
+        if result.exception() is not None:
+            response['error'] = str(result.exception())
+        else:
+            response['value'] = result.result()
+        return response
+
+    def write_responses(self):
+        # Las respuestas se escriben en el orden de las peticiones
+        while self.responses and self.responses[0].done():
+            response = self.responses.popleft().result()
+            if self.transport is not None:
+                self.transport.write(json.dumps(response).encode('utf-8') +
+                                     b'\n')
+
+
+class InferenceServer(object):
+    """
+    Servidor de inferencia para el sistema 'fis'
+
+    Ejemplo:
+        server = InferenceServer(fis, port=8765)
+        loop.run_until_complete(server.start())
+        loop.run_forever()
+
+    """
+    def __init__(self, fis, host='127.0.0.1', port=0, loop=None,
+                 **options):
+        if asyncio is None:
+            raise Exception('El servidor necesita asyncio (Python 3)')
+        self.fis = fis
+        self.host = host
+        self.port = port
+        self.loop = loop or asyncio.get_event_loop()
+        self.executor = BatchExecutor(fis, self.loop, **options)
+        self.server = None
+
+    def start(self):
+        """
+        Devuelve una corrutina que abre el socket; al terminar, 'port' es el
+        puerto real (util si se pidio el puerto 0)
+
+        """
+        def started(future):
+            self.server = future.result()
+            self.port = self.server.sockets[0].getsockname()[1]
+
+        future = self.loop.create_task(self.loop.create_server(
+            lambda: InferenceProtocol(self.executor), self.host, self.port))
+        future.add_done_callback(started)
+        return future
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.flush()
+
+    def stats(self):
+        return self.executor.stats()
+
+
+def serve(fis, host='127.0.0.1', port=8765, **options):
+    """
+    Atiende peticiones hasta que se interrumpa el proceso
+
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = InferenceServer(fis, host, port, loop, **options)
+    loop.run_until_complete(server.start())
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        loop.close()
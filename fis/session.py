@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from fis.compiler import Atom, Not, Shared
+
+
+def variables_of(node):
+    """
+    Devuelve el conjunto de variables de entrada que aparecen en 'node'
+
+    """
+    if isinstance(node, Shared):
+        return variables_of(node.node)
+    if isinstance(node, Atom):
+        return frozenset([node.variable])
+    if isinstance(node, Not):
+        return variables_of(node.operand)
+    return frozenset().union(*[variables_of(o) for o in node.operands])
+
+
+class Session(object):
+    """
+    Ejecucion incremental del sistema 'fis' cuando solo cambian algunas
+    variables de entrada entre una ejecucion y la siguiente
+
+    Guarda el grafo de dependencias variable -> (variable, valor) -> reglas
+    -> valor linguistico de salida, junto con el estado de la ultima
+    ejecucion:
+    - Valores iniciales actuales ('input')
+    - Grados de membresia ya calculados (en el contexto, ver
+      'EvaluationContext')
+    - Grado de activacion de cada regla ('strengths')
+    - Grado de activacion de cada valor linguistico de salida
+      ('activations')
+    - Valor concreto de la variable de salida ('value')
+
+    Al llamar a 'update' solo se recalculan los grados de membresia de las
+    variables que cambiaron y las reglas que las usan. El maximo de cada
+    valor de salida solo se recorre completo si bajo la regla que lo
+    definia, y el centroide solo se recalcula si cambio alguna activacion.
+
+    """
+    def __init__(self, fis, input_values):
+        if fis.sugeno:
+            raise Exception('Las sesiones incrementales solo admiten '
+                            'inferencia Mamdani')
+        if len(fis.output_vars) > 1:
+            raise Exception('Las sesiones incrementales solo admiten una '
+                            'variable de salida')
+        self.fis = fis
+        self.input = dict(input_values)
+        self.context = fis.input_vars.context(self.input)
+
+        evaluators = fis.rule_set.evaluators
+        self.outputs = [rule.output_var.value.value for rule in fis.rules]
+
+        # Reglas que usan cada variable y reglas de cada valor de salida
+        self.dependents = {}
+        self.groups = dict((v.value, []) for v in fis.output_var.values)
+        for i, evaluator in enumerate(evaluators):
+            for variable in variables_of(evaluator):
+                self.dependents.setdefault(variable, []).append(i)
+            self.groups[self.outputs[i]].append(i)
+
+        self.strengths = [e.evaluate(self.context) for e in evaluators]
+        self.activations = dict(
+            (value, max([self.strengths[i] for i in rules] or [0]))
+            for value, rules in self.groups.items())
+        self.value = fis.defuzzify(self.activations)
+
+    def update(self, *args, **values):
+        """
+        Cambia el valor de algunas variables de entrada (igual que
+        'dict.update') y devuelve el nuevo valor concreto de la salida
+
+        Ejemplo: session.update(Servicio=4)
+
+        """
+        values = dict(*args, **values)
+        changed = [name for name, x in values.items()
+                   if self.input.get(name) != x]
+        if not changed:
+            return self.value
+
+        rules = set()
+        for name in changed:
+            self.input[name] = values[name]
+            rules.update(self.dependents.get(name, ()))
+
+        # Descartamos los grados de membresia de las variables que cambiaron
+        degrees = self.context.degrees
+        for key in [key for key in degrees if key[0] in changed]:
+            del degrees[key]
+        self.context.shared = {}
+
+        evaluators = self.fis.rule_set.evaluators
+        modified = False
+        for i in sorted(rules):
+            old = self.strengths[i]
+            new = evaluators[i].evaluate(self.context)
+            if new == old:
+                continue
+            self.strengths[i] = new
+
+            output = self.outputs[i]
+            current = self.activations[output]
+            if new > current:
+                self.activations[output] = new
+            elif old == current:
+                # La regla que definia el maximo bajo: lo recalculamos
+                self.activations[output] = max(self.strengths[j]
+                                               for j in self.groups[output])
+            else:
+                continue
+            modified = modified or self.activations[output] != current
+
+        if modified:
+            self.value = self.fis.defuzzify(self.activations)
+        return self.value
+
+    def verify(self, tolerance=1e-9):
+        """
+        Comprueba que el estado incremental coincide con ejecutar el sistema
+        completo con los valores iniciales actuales
+
+        """
+        activations = self.fis.activate(self.input)
+        for value, degree in activations.items():
+            if abs(degree - self.activations[value]) > tolerance:
+                return False
+
+        value = self.fis.defuzzify(activations)
+        if value is None or self.value is None:
+            return value is None and self.value is None
+        return abs(value - self.value) <= tolerance
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluacion de muchos registros leidos de un fichero (o de la entrada
+estandar), por bloques de tamaño fijo
+
+La memoria utilizada depende del tamaño de cada bloque y no del tamaño del
+fichero: los registros se leen, evaluan y devuelven a medida que se
+necesitan.
+"""
+import csv
+from itertools import islice
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def read_records(f, delimiter=','):
+    """
+    Lee registros en formato CSV (con una columna por variable de entrada y
+    los nombres de las variables en la primera linea)
+
+    Devuelve un generador de diccionarios {variable: valor}
+    """
+    for row in csv.DictReader(f, delimiter=delimiter):
+        yield dict((name, float(value)) for name, value in row.items()
+                   if name is not None and value not in (None, ''))
+
+
+def chunks(records, size):
+    """
+    Agrupa los registros en listas de (a lo sumo) 'size' elementos
+
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def execute_stream(fis, records, chunk_size=1000):
+    """
+    Ejecuta el sistema sobre cada registro de 'records'
+
+    Los registros se evaluan por bloques de 'chunk_size' con
+    'FIS.execute_batch' (o uno a uno con 'FIS.execute' si NumPy no esta
+    instalado). Devuelve un generador de tuplas (registro, valor), donde
+    valor es None si no se activa ninguna regla. Con varias variables de
+    salida, valor es {variable: valor}
+    """
+    for chunk in chunks(records, chunk_size):
+        if numpy is None:
+            for record in chunk:
+                yield record, fis.execute(record)
+            continue
+
+        names = [var.name for var in fis.input_vars]
+        inputs = dict((name, [record[name] for record in chunk])
+                      for name in names)
+        result = fis.execute_batch(inputs)
+        if not isinstance(result, dict):
+            for record, value in zip(chunk, result):
+                yield record, to_value(value)
+            continue
+
+        for i, record in enumerate(chunk):
+            yield record, dict((name, to_value(values[i]))
+                               for name, values in result.items())
+
+
+def to_value(value):
+    """
+    Convierte un resultado de 'execute_batch' (NaN si no se activa ninguna
+    regla) al de 'execute' (None)
+
+    """
+    return None if numpy.isnan(value) else float(value)
+
+
+def write_results(results, f, names, output_name, delimiter=','):
+    """
+    Escribe en formato CSV los valores de entrada y el resultado de cada
+    registro, a medida que se van obteniendo
+
+    Con varias variables de salida, 'output_name' es la lista de sus
+    nombres (una columna por variable)
+
+    """
+    outputs = output_name if isinstance(output_name, list) else None
+    writer = csv.writer(f, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(list(names) + (outputs or [output_name]))
+    for record, value in results:
+        values = ([value.get(name) for name in outputs] if outputs
+                  else [value])
+        writer.writerow([record.get(name, '') for name in names] +
+                        ['' if v is None else repr(v) for v in values])
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Consecuentes de la inferencia Takagi-Sugeno
+
+En un sistema Sugeno cada valor linguistico de la variable de salida es una
+funcion de los valores de entrada (una constante o una combinacion lineal),
+en lugar de una funcion de membresia. El resultado es el promedio de los
+consecuentes de cada regla, ponderado por su grado de activacion, por lo que
+no hace falta truncar, agregar ni calcular centroides (ver
+'FIS.weighted_average').
+"""
+
+
+class ConstantConsequent(object):
+    """
+    Consecuente constante ('constante: (valor)')
+
+    """
+    __slots__ = ('value',)
+    consequent = True
+
+    def __init__(self, value):
+        self.value = float(value)
+
+    def evaluate(self, input_values):
+        return self.value
+
+    def evaluate_batch(self, inputs):
+        """
+        Igual que 'evaluate', pero 'inputs' es {variable: arreglo de NumPy}
+
+        """
+        return self.value
+
+    def variables(self):
+        return []
+
+    def parameters(self):
+        return [self.value]
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        return cls(*parameters)
+
+    def __str__(self):
+        return "Constant Consequent: %s" % self.value
+
+
+class LinearConsequent(object):
+    """
+    Consecuente lineal ('lineal: 2 + 0.5*Var1 - 1.5*Var2')
+
+    Contiene el termino independiente ('constant') y los coeficientes de
+    cada variable de entrada ('coefficients', lista de (variable,
+    coeficiente))
+
+    """
+    __slots__ = ('constant', 'coefficients')
+    consequent = True
+
+    def __init__(self, constant, coefficients):
+        self.constant = float(constant)
+        self.coefficients = [(name, float(c)) for name, c in coefficients]
+
+    def evaluate(self, input_values):
+        result = self.constant
+        for name, coefficient in self.coefficients:
+            result += coefficient * input_values[name]
+        return result
+
+    def evaluate_batch(self, inputs):
+        """
+        Igual que 'evaluate', pero 'inputs' es {variable: arreglo de NumPy}
+
+        """
+        result = self.constant
+        for name, coefficient in self.coefficients:
+            result = result + coefficient * inputs[name]
+        return result
+
+    def variables(self):
+        return [name for name, _ in self.coefficients]
+
+    def parameters(self):
+        """
+        Devuelve [termino independiente, variable, coeficiente, ...]: los
+        nombres de las variables son textos (ver 'fis.serialization')
+
+        """
+        parameters = [self.constant]
+        for name, coefficient in self.coefficients:
+            parameters.extend((name, coefficient))
+        return parameters
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        return cls(parameters[0], zip(parameters[1::2], parameters[2::2]))
+
+    def __str__(self):
+        terms = ['%s*%s' % (c, name) for name, c in self.coefficients]
+        return "Linear Consequent: %s" % ' + '.join([str(self.constant)] +
+                                                     terms)
+
+
+def is_sugeno(output_var):
+    """
+    Indica si los valores de la variable de salida son consecuentes Sugeno
+
+    """
+    return bool(output_var.values) and all(
+        getattr(v.function, 'consequent', False) for v in output_var.values)
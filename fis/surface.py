@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Superficie de control precalculada (tabla de busqueda)
+
+Para sistemas con pocas variables de entrada (2 o 3), el resultado se
+calcula una sola vez en una malla regular sobre el universo de cada
+variable. Despues cada consulta se responde por interpolacion multilineal
+entre los 2^n vertices de la celda, con un costo fijo que no depende de la
+cantidad de reglas.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from fis.batch import normalize_inputs
+
+
+def universe(definition):
+    """
+    Devuelve el intervalo (minimo, maximo) que cubren los soportes de las
+    funciones de la variable 'definition'
+
+    """
+    bounds = [x for v in definition.values for x in v.function.support()
+              if abs(x) != float('inf')]
+    if not bounds:
+        raise Exception('No se puede deducir el universo de %s' %
+                        definition.name)
+    return min(bounds), max(bounds)
+
+
+class ControlSurface(object):
+    """
+    Tabla con el resultado de un sistema en una malla regular
+
+    Contiene la siguiente informacion:
+    - Nombre de cada variable de entrada ('names', en el orden de los ejes)
+    - Extremos del universo de cada variable ('lows', 'highs')
+    - Resultado en cada punto de la malla ('values', NaN si no se activa
+      ninguna regla)
+    - Error maximo medido frente al sistema original ('max_error', ver
+      'measure_error')
+
+    Fuera del universo las entradas se llevan al extremo mas cercano. Los
+    vertices en los que no se activa ninguna regla no intervienen en la
+    interpolacion (el resto de pesos se normaliza).
+
+    """
+    def __init__(self, names, lows, highs, values, max_error=None):
+        self.names = list(names)
+        self.lows = [float(x) for x in lows]
+        self.highs = [float(x) for x in highs]
+        self.values = numpy.asarray(values, dtype=float)
+        self.max_error = max_error
+
+        self.shape = self.values.shape
+        if len(self.shape) != len(self.names) or min(self.shape) < 2:
+            raise Exception('La malla necesita al menos 2 puntos por eje')
+        self.steps = [(high - low) / (n - 1) for low, high, n in
+                      zip(self.lows, self.highs, self.shape)]
+
+        # Para las consultas individuales usamos listas de Python, que son
+        # mas rapidas que indexar arreglos de NumPy elemento a elemento
+        self.flat = self.values.ravel().tolist()
+        self.strides = [s // self.values.itemsize
+                        for s in self.values.strides]
+
+    @classmethod
+    def compile(cls, fis, resolution=21, ranges=None, check=True):
+        """
+        Calcula la tabla del sistema 'fis'
+
+        - resolution: puntos por eje (un numero o {variable: puntos})
+        - ranges: {variable: (minimo, maximo)}; por defecto, el intervalo
+          que cubren las funciones de cada variable (ver 'universe')
+        - check: si se mide el error maximo ('measure_error')
+
+        """
+        if len(fis.output_vars) > 1:
+            raise Exception('La tabla solo admite una variable de salida')
+        ranges = ranges or {}
+        names = [var.name for var in fis.input_vars]
+        lows, highs, axes = [], [], []
+        for var in fis.input_vars:
+            low, high = ranges.get(var.name) or universe(var)
+            n = (resolution.get(var.name, 21)
+                 if isinstance(resolution, dict) else resolution)
+            lows.append(low)
+            highs.append(high)
+            axes.append(numpy.linspace(low, high, n))
+
+        grid = numpy.meshgrid(*axes, indexing='ij')
+        values = fis.execute_batch(dict((name, g.ravel())
+                                        for name, g in zip(names, grid)))
+
+        surface = cls(names, lows, highs, values.reshape(grid[0].shape))
+        if check:
+            surface.max_error = surface.measure_error(fis)
+        return surface
+
+    def measure_error(self, fis):
+        """
+        Error maximo de la interpolacion frente a 'fis', medido en el centro
+        de cada celda (el punto mas alejado de los vertices) y en el centro
+        de cada arista
+
+        Los puntos en los que 'fis' no activa ninguna regla no se comparan;
+        si la tabla no da un valor donde 'fis' si, el error es infinito
+
+        """
+        axes = []
+        for low, step, n in zip(self.lows, self.steps, self.shape):
+            # Vertices y puntos medios de cada eje
+            axes.append(numpy.linspace(low, low + step * (n - 1),
+                                       2 * n - 1))
+        grid = numpy.meshgrid(*axes, indexing='ij')
+        inputs = dict((name, g.ravel()) for name, g in zip(self.names, grid))
+
+        exact = fis.execute_batch(inputs)
+        approx = self.lookup_batch(inputs)
+
+        defined = ~numpy.isnan(exact)
+        if numpy.isnan(approx[defined]).any():
+            return float('inf')
+        if not defined.any():
+            return 0.0
+        return float(numpy.abs(exact[defined] - approx[defined]).max())
+
+    def lookup(self, input_values):
+        """
+        Valor interpolado para los valores iniciales 'input_values' (None si
+        no se activa ninguna regla en los vertices que intervienen)
+
+        """
+        cells = []
+        for k, name in enumerate(self.names):
+            n = self.shape[k]
+            x = (input_values[name] - self.lows[k]) / self.steps[k]
+            if x <= 0:
+                cells.append((0, 0.0))
+            elif x >= n - 1:
+                cells.append((n - 2, 1.0))
+            else:
+                i = int(x)
+                cells.append((i, x - i))
+
+        result = 0.0
+        total = 0.0
+        for corner in range(1 << len(cells)):
+            weight = 1.0
+            offset = 0
+            for k, (i, t) in enumerate(cells):
+                if corner >> k & 1:
+                    weight *= t
+                    offset += (i + 1) * self.strides[k]
+                else:
+                    weight *= 1 - t
+                    offset += i * self.strides[k]
+            value = self.flat[offset]
+            if weight and value == value:
+                result += weight * value
+                total += weight
+
+        if not total:
+            return None
+        return result / total
+
+    def lookup_batch(self, inputs, columns=None):
+        """
+        Igual que 'lookup', pero sobre muchas filas a la vez (ver
+        'BatchVariables' para los formatos aceptados). Devuelve un arreglo
+        (NaN si no se activa ninguna regla)
+
+        """
+        inputs = normalize_inputs(inputs, columns)
+        cells = []
+        for k, name in enumerate(self.names):
+            n = self.shape[k]
+            x = (inputs[name] - self.lows[k]) / self.steps[k]
+            x = numpy.clip(x, 0, n - 1)
+            i = numpy.minimum(x.astype(int), n - 2)
+            cells.append((i, x - i))
+
+        values = self.values.ravel()
+        rows = len(cells[0][0])
+        result = numpy.zeros(rows)
+        total = numpy.zeros(rows)
+        for corner in range(1 << len(cells)):
+            weight = numpy.ones(rows)
+            offset = numpy.zeros(rows, dtype=int)
+            for k, (i, t) in enumerate(cells):
+                if corner >> k & 1:
+                    weight *= t
+                    offset += (i + 1) * self.strides[k]
+                else:
+                    weight *= 1 - t
+                    offset += i * self.strides[k]
+            value = values[offset]
+            weight[numpy.isnan(value)] = 0
+            result += numpy.where(weight > 0, weight * value, 0)
+            total += weight
+
+        output = numpy.full(rows, numpy.nan)
+        numpy.divide(result, total, out=output, where=total > 0)
+        return output
+
+    def save(self, path):
+        """
+        Guarda la tabla en formato '.npz' de NumPy
+
+        Se escribe exactamente en 'path' (con un nombre de fichero,
+        'numpy.savez' agregaria la extension '.npz')
+
+        """
+        with open(path, 'wb') as f:
+            numpy.savez(f, names=numpy.array(self.names),
+                        lows=numpy.array(self.lows),
+                        highs=numpy.array(self.highs), values=self.values,
+                        max_error=numpy.array(
+                            numpy.nan if self.max_error is None
+                            else self.max_error))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carga una tabla guardada con 'save'
+
+        """
+        data = numpy.load(path)
+        max_error = float(data['max_error'])
+        return cls([str(name) for name in data['names']], data['lows'],
+                   data['highs'], data['values'],
+                   None if max_error != max_error else max_error)
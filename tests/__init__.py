@@ -2,3 +2,21 @@
 
 from parsing import *
 from functions import *
+from compiler import *
+from batch import *
+from aggregation import *
+from definitions import *
+from index import *
+from stream import *
+from serialization import *
+from cache import *
+from session import *
+from profiling import *
+from server import *
+from sugeno import *
+from surface import *
+from codegen import *
+from outputs import *
+from optimizer import *
+from pipeline import *
+from reload import *
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from fis.aggregation import (clip, envelope, centroid, centroid_batch,
+                             breakpoints)
+from fis.core import FIS
+from fis.parser import InputParser
+from tests.models import PROPINA
+
+
+def sampled_centroid(functions, steps=20000):
+    """
+    Centroide aproximado, muestreando la envolvente en muchos puntos
+
+    """
+    start = min(f[0][0] for f in functions if f)
+    end = max(f[-1][0] for f in functions if f)
+    area = moment = 0.0
+    width = (end - start) / float(steps)
+    for i in range(steps):
+        x = start + (i + 0.5) * width
+        y = max(interpolate(f, x) for f in functions)
+        area += y
+        moment += x * y
+    return moment / area
+
+
+def interpolate(f, x):
+    for (x0, y0), (x1, y1) in zip(f, f[1:]):
+        if x0 <= x <= x1 and x1 > x0:
+            return y0 + (x - x0) * (y1 - y0) / (x1 - x0)
+    return 0
+
+
+class AggregationTests(unittest.TestCase):
+    def setUp(self):
+        self.triangle = [(0.0, 0.0), (10.0, 1.0), (20.0, 0.0)]
+        self.trapezoid = [(10.0, 0.0), (20.0, 1.0), (25.0, 1.0), (30.0, 0.0)]
+
+    def test_clip(self):
+        self.assertEqual(clip(self.triangle, 0.5),
+                         [(0, 0), (5, 0.5), (10, 0.5), (15, 0.5), (20, 0)])
+
+    def test_clip_higher(self):
+        self.assertEqual(clip(self.triangle, 1.5), self.triangle)
+
+    def test_clip_zero(self):
+        self.assertEqual(clip(self.triangle, 0), [])
+
+    def test_centroid_triangle(self):
+        self.assertAlmostEqual(centroid(self.triangle), 10)
+
+    def test_centroid_empty(self):
+        self.assertEqual(centroid([]), None)
+
+    def test_envelope_single(self):
+        self.assertEqual(envelope([self.triangle]), self.triangle)
+
+    def test_envelope_crossing(self):
+        # Los dos lados se cortan en (15, 0.5)
+        self.assertEqual(envelope([self.triangle, self.trapezoid]),
+                         [(0, 0), (10, 1), (15, 0.5), (20, 1), (25, 1),
+                          (30, 0)])
+
+    def test_envelope_centroid(self):
+        functions = [clip(self.triangle, 0.7), clip(self.trapezoid, 0.4)]
+        self.assertAlmostEqual(centroid(envelope(functions)),
+                               sampled_centroid(functions), places=3)
+
+    def test_envelope_disjoint(self):
+        functions = [[(0.0, 0.0), (1.0, 1.0), (2.0, 0.0)],
+                     [(4.0, 0.0), (5.0, 1.0), (6.0, 0.0)]]
+        self.assertAlmostEqual(centroid(envelope(functions)), 3)
+
+    @unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+    def test_centroid_batch(self):
+        alphas = [numpy.array([0.7, 0, 1, 0.2, 0]),
+                  numpy.array([0.4, 0.3, 1, 0.9, 0])]
+        result = centroid_batch([self.triangle, self.trapezoid], alphas)
+        for i in range(4):
+            functions = [clip(self.triangle, alphas[0][i]),
+                         clip(self.trapezoid, alphas[1][i])]
+            self.assertAlmostEqual(result[i], centroid(envelope(functions)))
+        self.assertTrue(numpy.isnan(result[4]))
+
+        # Los cortes fijos se pueden calcular una sola vez
+        fixed = breakpoints([self.triangle, self.trapezoid])
+        self.assertEqual(list(fixed[1]), sorted(set(fixed[1])))
+        numpy.testing.assert_array_equal(
+            centroid_batch([self.triangle, self.trapezoid], alphas, fixed),
+            result)
+
+
+class ExecutionTests(unittest.TestCase):
+    def setUp(self):
+        input_vars, output_var, rules, self.input_values = \
+            InputParser().parse(PROPINA)
+        self.fis = FIS(input_vars, output_var, rules)
+
+    def test_execute(self):
+        activations = self.fis.activate(self.input_values)
+        functions = [clip(v.function.points(), activations[v.value])
+                     for v in self.fis.output_var.values]
+        self.assertAlmostEqual(self.fis.execute(self.input_values),
+                               sampled_centroid(functions), places=3)
+
+    def test_execute_twice(self):
+        first = self.fis.execute(self.input_values)
+        self.assertEqual(self.fis.execute(self.input_values), first)
+
+    def test_execute_threads(self):
+        inputs = [{'Servicio': s, 'Comida': c}
+                  for s in range(11) for c in range(11)]
+        expected = [self.fis.execute(i) for i in inputs]
+        errors = []
+
+        def run():
+            for i, values in enumerate(inputs):
+                if self.fis.execute(values) != expected[i]:
+                    errors.append(values)
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+    @unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+    def test_execute_batch(self):
+        grid = numpy.linspace(0, 10, 21)
+        servicio, comida = [g.ravel() for g in numpy.meshgrid(grid, grid)]
+        result = self.fis.execute_batch({'Servicio': servicio,
+                                         'Comida': comida})
+        for i in range(len(servicio)):
+            expected = self.fis.execute({'Servicio': servicio[i],
+                                         'Comida': comida[i]})
+            if expected is None:
+                self.assertTrue(numpy.isnan(result[i]))
+            else:
+                self.assertAlmostEqual(result[i], expected)
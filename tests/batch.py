@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from fis.core import FIS
+from fis.functions import (TriangularFunction, Point, TrapezoidalFunction,
+                           PiecewiseLinearFunction, ShoulderFunction,
+                           GaussianFunction, BellFunction, SigmoidFunction)
+from fis.parser import InputParser
+from tests.models import PROPINA, SUAVE
+
+
+@unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+class BatchFunctionTests(unittest.TestCase):
+    def setUp(self):
+        self.values = numpy.linspace(-1, 21, 221)
+
+    def check(self, function):
+        result = function.evaluate_batch(self.values)
+        for value, degree in zip(self.values, result):
+            self.assertAlmostEqual(degree, function.evaluate(value))
+
+    def test_triangular(self):
+        self.check(TriangularFunction(Point(0, 0), Point(20, 0),
+                                      Point(10, 1)))
+
+    def test_triangle_rectangle(self):
+        self.check(TriangularFunction(Point(0, 0), Point(10, 0),
+                                      Point(10, 1)))
+
+    def test_trapezoidal(self):
+        self.check(TrapezoidalFunction(Point(0, 0), Point(6, 0),
+                                       Point(2, 0.8), Point(4, 0.8)))
+
+    def test_smooth(self):
+        self.check(GaussianFunction(5, 2))
+        self.check(BellFunction(2, 2, 10))
+        self.check(SigmoidFunction(2, 8))
+        self.check(GaussianFunction(5, 2).truncate(0.4))
+
+    def test_piecewise(self):
+        self.check(ShoulderFunction(Point(0, 1), Point(4, 0)))
+        self.check(PiecewiseLinearFunction(Point(-2, 0), Point(0, 1),
+                                           Point(6, 0)))
+
+
+@unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+class BatchExecutionTests(unittest.TestCase):
+    def setUp(self):
+        input_vars, output_var, rules, _ = InputParser().parse(PROPINA)
+        self.fis = FIS(input_vars, output_var, rules)
+
+        grid = numpy.linspace(0, 10, 21)
+        servicio, comida = numpy.meshgrid(grid, grid)
+        self.servicio = servicio.ravel()
+        self.comida = comida.ravel()
+
+    def check(self, activations):
+        for i in range(len(self.servicio)):
+            expected = self.fis.activate({'Servicio': self.servicio[i],
+                                          'Comida': self.comida[i]})
+            for value, degree in expected.items():
+                self.assertAlmostEqual(activations[value][i], degree)
+
+    def test_dict(self):
+        self.check(self.fis.activate_batch({'Servicio': self.servicio,
+                                            'Comida': self.comida}))
+
+    def test_columns(self):
+        inputs = numpy.column_stack([self.comida, self.servicio])
+        self.check(self.fis.activate_batch(
+            inputs, columns=['Comida', 'Servicio']))
+
+    def test_structured(self):
+        inputs = numpy.zeros(len(self.servicio),
+                             dtype=[('Servicio', float), ('Comida', float)])
+        inputs['Servicio'] = self.servicio
+        inputs['Comida'] = self.comida
+        self.check(self.fis.activate_batch(inputs))
+
+    def test_missing_columns(self):
+        inputs = numpy.column_stack([self.comida, self.servicio])
+        self.assertRaises(Exception, self.fis.activate_batch, inputs)
+
+    def test_execute_parallel(self):
+        inputs = {'Servicio': self.servicio, 'Comida': self.comida}
+        expected = self.fis.execute_batch(inputs)
+        result = self.fis.execute_parallel(inputs, workers=2, chunk_size=50)
+        numpy.testing.assert_allclose(result, expected)
+
+    def test_execute_parallel_columns(self):
+        inputs = numpy.column_stack([self.comida, self.servicio])
+        expected = self.fis.execute_batch(inputs,
+                                          columns=['Comida', 'Servicio'])
+        result = self.fis.execute_parallel(
+            inputs, workers=3, columns=['Comida', 'Servicio'])
+        numpy.testing.assert_allclose(result, expected)
+
+
+@unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+class BatchFunctionsExecutionTests(unittest.TestCase):
+    def test_smooth_model(self):
+        fis = FIS(*InputParser().parse(SUAVE)[:3])
+        grid = numpy.linspace(-2, 12, 8)
+        servicio, comida = [a.ravel() for a in numpy.meshgrid(grid, grid)]
+
+        result = fis.execute_batch({'Servicio': servicio, 'Comida': comida})
+        for i in range(len(servicio)):
+            expected = fis.execute({'Servicio': servicio[i],
+                                    'Comida': comida[i]})
+            # Las funciones suaves se agregan con su aproximacion lineal
+            self.assertAlmostEqual(result[i], expected, places=2)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import unittest
+from fis.cache import ResultCache
+from fis.core import FIS
+from fis.parser import InputParser
+from tests.models import PROPINA, PROPINA_DESCUENTO
+
+
+class ResultCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.model = InputParser().parse(PROPINA)[:3]
+        self.cache = ResultCache(maxsize=2, resolution={'Servicio': 0.5})
+        self.fis = FIS(*self.model, cache=self.cache)
+        self.plain = FIS(*self.model)
+
+    def test_hit(self):
+        first = self.fis.execute({'Servicio': 3, 'Comida': 8})
+        second = self.fis.execute({'Servicio': 3, 'Comida': 8})
+        self.assertEqual(first, second)
+        self.assertEqual(first, self.plain.execute({'Servicio': 3,
+                                                    'Comida': 8}))
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_resolution(self):
+        value = self.fis.execute({'Servicio': 3.1, 'Comida': 8})
+        self.assertEqual(value, self.plain.execute({'Servicio': 3,
+                                                    'Comida': 8}))
+        self.assertEqual(self.fis.execute({'Servicio': 2.9, 'Comida': 8}),
+                         value)
+        self.assertEqual(self.cache.hits, 1)
+
+        # 'Comida' no tiene resolucion: se usa el valor exacto
+        self.fis.execute({'Servicio': 3, 'Comida': 8.01})
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_eviction(self):
+        for servicio in (1, 2, 3):
+            self.fis.execute({'Servicio': servicio, 'Comida': 8})
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+
+        # El primero fue descartado (LRU)
+        self.fis.execute({'Servicio': 1, 'Comida': 8})
+        self.assertEqual(self.cache.hits, 0)
+        self.fis.execute({'Servicio': 3, 'Comida': 8})
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_replace_model(self):
+        self.fis.execute({'Servicio': 3, 'Comida': 8})
+        fis = FIS(*self.model, cache=self.cache)
+        self.assertEqual(len(self.cache), 0)
+        fis.execute({'Servicio': 3, 'Comida': 8})
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_replaced_model(self):
+        # El modelo anterior (por ejemplo, con ejecuciones en curso al
+        # recargarlo) no usa el cache del nuevo
+        text = PROPINA.replace('Bueno => Normal', 'Bueno => Mucha')
+        fis = FIS(*InputParser().parse(text)[:3], cache=self.cache)
+        values = {'Servicio': 3, 'Comida': 8}
+        old = self.fis.execute(values)
+        self.assertEqual(len(self.cache), 0)
+
+        expected = FIS(*InputParser().parse(text)[:3]).execute(values)
+        self.assertNotEqual(old, expected)
+        self.assertEqual(fis.execute(values), expected)
+        self.assertEqual(self.fis.execute(values), old)
+
+    def test_multiple_outputs(self):
+        # Modificar el resultado devuelto no cambia los aciertos siguientes
+        fis = FIS(*InputParser().parse(PROPINA_DESCUENTO)[:3],
+                  cache=ResultCache())
+        values = {'Servicio': 3, 'Comida': 8}
+        first = fis.execute(values)
+        expected = dict(first)
+        first['Propina'] = -1
+        second = fis.execute(values)
+        self.assertEqual(second, expected)
+        second.clear()
+        self.assertEqual(fis.execute(values), expected)
+        self.assertEqual(fis.cache.hits, 2)
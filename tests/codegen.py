@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from benchmarks.generator import generate_model, generate_inputs
+from fis.codegen import generate, write_module
+from fis.core import FIS
+from fis.parser import InputParser
+from tests.models import PROPINA, SUAVE, PROPINA_SUGENO
+
+
+def load(source):
+    """
+    Ejecuta el codigo generado y devuelve su espacio de nombres
+
+    """
+    namespace = {}
+    exec(compile(source, '<codegen>', 'exec'), namespace)
+    return namespace
+
+
+class CodegenTests(unittest.TestCase):
+    def check(self, text, points):
+        model = InputParser().parse(text)[:3]
+        fis = FIS(*model)
+        module = load(generate(*model))
+
+        for values in points:
+            expected = fis.execute(values)
+            result = module['evaluate'](**values)
+            if expected is None:
+                self.assertEqual(result, None)
+            else:
+                self.assertAlmostEqual(result, expected, 9)
+
+        if numpy is not None:
+            columns = dict((name, [values[name] for values in points])
+                           for name in points[0])
+            expected = fis.execute_batch(columns)
+            result = module['evaluate_batch'](**columns)
+            self.assertTrue(numpy.allclose(result, expected, equal_nan=True))
+
+    def grid(self, low=0, high=10, steps=20):
+        return [{'Servicio': low + (high - low) * i / float(steps),
+                 'Comida': low + (high - low) * j / float(steps)}
+                for i in range(steps + 1) for j in range(steps + 1)]
+
+    def test_propina(self):
+        self.check(PROPINA, self.grid(-1, 11))
+
+    def test_smooth(self):
+        self.check(SUAVE, self.grid(-2, 12, 7))
+
+    def test_sugeno(self):
+        self.check(PROPINA_SUGENO, self.grid(-1, 11))
+
+    def test_generated_model(self):
+        text = generate_model(variables=4, values=4, rules=60, depth=3)
+        self.check(text, generate_inputs(variables=4, values=4, rows=200))
+
+    def test_generated_outputs_vary(self):
+        # Con muchas reglas las activaciones no deben saturarse en 1: la
+        # salida tiene que depender de la fila
+        fis = FIS(*InputParser().parse(generate_model(rules=400,
+                                                      depth=3))[:3])
+        rows = generate_inputs(rows=100)
+        outputs = set(round(fis.execute(values), 6) for values in rows)
+        self.assertTrue(len(outputs) > 50)
+        self.assertTrue(any(min(fis.activate(values).values()) < 1
+                            for values in rows))
+
+    def test_no_dependencies(self):
+        source = generate(*InputParser().parse(PROPINA)[:3])
+        self.assertFalse('import fis' in source or 'from fis' in source)
+        self.assertFalse('eval(' in source)
+
+        module = load(source)
+        self.assertEqual(module['INPUTS'], ('Servicio', 'Comida'))
+        self.assertEqual(module['OUTPUT'], 'Propina')
+
+    def test_write_module(self):
+        directory = tempfile.mkdtemp()
+        sys.path.insert(0, directory)
+        try:
+            model = InputParser().parse(PROPINA)[:3]
+            write_module(os.path.join(directory, 'propina_generado.py'),
+                         *model)
+            import propina_generado
+            self.assertAlmostEqual(
+                propina_generado.evaluate(Servicio=3, Comida=8),
+                FIS(*model).execute({'Servicio': 3, 'Comida': 8}))
+        finally:
+            sys.path.remove(directory)
+            sys.modules.pop('propina_generado', None)
+            shutil.rmtree(directory)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import unittest
+from fis.compiler import RuleCompiler, RuleSet, Atom, And, Or, Not, Shared
+
+
+class FakeVariables(object):
+    """
+    Devuelve grados de membresia fijos y cuenta las evaluaciones
+
+    """
+    def __init__(self, degrees):
+        self.degrees = degrees
+        self.calls = []
+        self.shared = {}
+
+    def membership(self, variable, value):
+        self.calls.append((variable, value))
+        return self.degrees[(variable, value)]
+
+
+class CompilerTests(unittest.TestCase):
+    def setUp(self):
+        self.compiler = RuleCompiler()
+        self.variables = FakeVariables({
+            ('A', 'B'): 0.2,
+            ('C', 'D'): 0.7,
+            ('E', 'F'): 0,
+        })
+
+    def test_one_variable(self):
+        node = self.compiler.compile('A = B')
+        self.assertIsInstance(node, Atom)
+        self.assertEqual(node.variable, 'A')
+        self.assertEqual(node.value, 'B')
+        self.assertEqual(node.evaluate(self.variables), 0.2)
+
+    def test_AND(self):
+        node = self.compiler.compile('A = B and C = D')
+        self.assertIsInstance(node, And)
+        self.assertEqual(node.evaluate(self.variables), 0.2)
+
+    def test_OR(self):
+        node = self.compiler.compile('A = B or C = D')
+        self.assertIsInstance(node, Or)
+        self.assertEqual(node.evaluate(self.variables), 0.7)
+
+    def test_AND_OR(self):
+        # 'and' tiene mayor precedencia que 'or'
+        node = self.compiler.compile('A = B and C = D or E = F')
+        self.assertIsInstance(node, Or)
+        self.assertIsInstance(node.operands[0], And)
+        self.assertEqual(node.evaluate(self.variables), 0.2)
+
+    def test_pharentesis(self):
+        node = self.compiler.compile('(A = B or C = D) and E = F')
+        self.assertIsInstance(node, And)
+        self.assertEqual(node.evaluate(self.variables), 0)
+
+    def test_not(self):
+        node = self.compiler.compile('not(A = B and C = D)')
+        self.assertIsInstance(node, Not)
+        self.assertAlmostEqual(node.evaluate(self.variables), 0.8)
+
+    def test_AND_short_circuit(self):
+        node = self.compiler.compile('E = F and A = B and C = D')
+        self.assertEqual(node.evaluate(self.variables), 0)
+        self.assertEqual(self.variables.calls, [('E', 'F')])
+
+    def test_slots(self):
+        # Toda la jerarquia usa '__slots__': los nodos no tienen __dict__
+        node = self.compiler.compile('not(A = B) and (C = D or E = F)')
+        for n in (node, node.operands[0], node.operands[0].operand,
+                  node.operands[1]):
+            self.assertFalse(hasattr(n, '__dict__'))
+
+    def test_invalid(self):
+        self.assertRaises(Exception, self.compiler.compile, 'A = B and')
+        self.assertRaises(Exception, self.compiler.compile, '(A = B')
+        self.assertRaises(Exception, self.compiler.compile, 'A == B')
+
+
+class RuleSetTests(unittest.TestCase):
+    def setUp(self):
+        compiler = RuleCompiler()
+        self.rule_set = RuleSet([
+            compiler.compile('A = B or C = D'),
+            compiler.compile('(C = D or A = B) and E = F'),
+            compiler.compile('not(A = B or C = D)'),
+        ])
+        self.variables = FakeVariables({
+            ('A', 'B'): 0.2,
+            ('C', 'D'): 0.7,
+            ('E', 'F'): 0,
+        })
+
+    def test_counts(self):
+        self.assertEqual(self.rule_set.total_nodes, 12)
+        self.assertEqual(self.rule_set.unique_nodes, 6)
+        self.assertEqual(self.rule_set.saved_nodes, 6)
+        self.assertEqual(self.rule_set.shared_nodes, 1)
+
+    def test_shared(self):
+        first, second, third = self.rule_set.evaluators
+        self.assertIsInstance(first, Shared)
+        self.assertIs(second.operands[0], first)
+        self.assertIs(third.operand, first)
+
+    def test_evaluate_once(self):
+        results = [e.evaluate(self.variables)
+                   for e in self.rule_set.evaluators]
+        self.assertEqual(results[:2], [0.7, 0])
+        self.assertAlmostEqual(results[2], 0.3)
+        self.assertEqual(sorted(self.variables.calls),
+                         [('A', 'B'), ('C', 'D'), ('E', 'F')])
+
+    def test_update(self):
+        compiler = RuleCompiler()
+        first, second, third = self.rule_set.sources
+        new = compiler.compile('E = F and (A = B or C = D)')
+        rule_set = self.rule_set.update([first, third, new])
+
+        # Las reglas que ya estaban conservan su evaluador
+        self.assertIs(rule_set.evaluators[0], self.rule_set.evaluators[0])
+        self.assertIs(rule_set.evaluators[1], self.rule_set.evaluators[2])
+        self.assertRaises(Exception, self.rule_set.update, [first])
+
+        expected = RuleSet([first, third, new])
+        self.assertEqual(rule_set.total_nodes, expected.total_nodes)
+        self.assertEqual(rule_set.unique_nodes, expected.unique_nodes)
+        self.assertEqual([e.evaluate(FakeVariables(self.variables.degrees))
+                          for e in rule_set.evaluators],
+                         [e.evaluate(FakeVariables(self.variables.degrees))
+                          for e in expected.evaluators])
+
+        # Se eliminan del grafo los nodos que ya no usa ninguna regla
+        rule_set = rule_set.update([third])
+        self.assertEqual(rule_set.total_nodes, 4)
+        self.assertEqual(rule_set.unique_nodes, 4)
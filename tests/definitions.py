@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import unittest
+from fis.definitions import (VariableDefinition, VariableCollection,
+                             ValueDefinition, InputVariable)
+from fis.functions import TriangularFunction, Point
+
+
+class CountingFunction(TriangularFunction):
+    """
+    Funcion triangular que cuenta cuantas veces se evalua
+
+    """
+    calls = 0
+
+    def evaluate(self, value):
+        CountingFunction.calls += 1
+        return super(CountingFunction, self).evaluate(value)
+
+
+class IndexTests(unittest.TestCase):
+    def setUp(self):
+        CountingFunction.calls = 0
+        f = CountingFunction(Point(0, 0), Point(10, 0), Point(5, 1))
+        self.agua = VariableDefinition('Agua', [ValueDefinition('Fria', f),
+                                                ValueDefinition('Tibia', f)])
+        self.variables = VariableCollection([self.agua])
+
+    def test_get_definition(self):
+        self.assertIs(self.variables.get_definition('Agua'), self.agua)
+        self.assertIs(self.variables.get_definition('Propina'), None)
+
+    def test_get_definition_after_append(self):
+        propina = VariableDefinition('Propina')
+        self.variables.append(propina)
+        self.assertIs(self.variables.get_definition('Propina'), propina)
+
+    def test_miss_without_rebuild(self):
+        def fail():
+            raise AssertionError('Se reconstruyo el indice')
+        self.variables.build_index = fail
+        self.agua.build_index = fail
+        self.assertIs(self.variables.get_definition('Propina'), None)
+        self.assertIs(self.agua.get_value('Caliente'), None)
+
+    def test_list_operations(self):
+        propina = VariableDefinition('Propina')
+        comida = VariableDefinition('Comida')
+        self.variables.extend([propina])
+        self.variables.insert(0, comida)
+        self.assertIs(self.variables.get_definition('Propina'), propina)
+        self.assertIs(self.variables.get_definition('Comida'), comida)
+        self.variables.remove(propina)
+        self.assertIs(self.variables.pop(0), comida)
+        self.assertIs(self.variables.get_definition('Propina'), None)
+        self.assertIs(self.variables.get_definition('Comida'), None)
+        self.assertIs(self.variables.get_definition('Agua'), self.agua)
+
+    def test_get_value(self):
+        self.assertEqual(self.agua.get_value('Tibia').value, 'Tibia')
+        self.assertIs(self.agua.get_value('Caliente'), None)
+
+    def test_add_value(self):
+        f = TriangularFunction(Point(5, 0), Point(15, 0), Point(10, 1))
+        self.agua.add_value(ValueDefinition('Caliente', f))
+        self.assertIs(self.agua.get_value('Caliente').function, f)
+
+    def test_membership_once_per_context(self):
+        context = self.variables.context({'Agua': 2.5})
+        for _ in range(3):
+            self.assertEqual(context.membership('Agua', 'Fria'), 0.5)
+        self.assertEqual(CountingFunction.calls, 1)
+
+        context = self.variables.context({'Agua': 5})
+        self.assertEqual(context.membership('Agua', 'Fria'), 1)
+        self.assertEqual(CountingFunction.calls, 2)
+
+
+class InputVariableTests(unittest.TestCase):
+    def setUp(self):
+        f = TriangularFunction(Point(0, 0), Point(10, 0), Point(5, 1))
+        agua = VariableDefinition('Agua', [ValueDefinition('Tibia', f)])
+        self.low = InputVariable(agua, agua.values[0], 2)
+        self.high = InputVariable(agua, agua.values[0], 5)
+
+    def test_and(self):
+        self.assertIs(self.low & self.high, self.low)
+        self.assertIs(self.high & self.low, self.low)
+
+    def test_or(self):
+        self.assertIs(self.low | self.high, self.high)
+        self.assertIs(self.high | self.low, self.high)
+
+    def test_neg(self):
+        var = -self.low
+        self.assertAlmostEqual(var.membership_value, 0.6)
+        self.assertAlmostEqual(self.low.membership_value, 0.4)
+        self.assertIs(var.definition, self.low.definition)
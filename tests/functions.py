@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import math
 import unittest
-from fis.functions import TriangularFunction, Point, TrapezoidalFunction
+from fis.aggregation import integrate
+from fis.functions import (TriangularFunction, Point, TrapezoidalFunction,
+                           PiecewiseLinearFunction, ShoulderFunction,
+                           GaussianFunction, BellFunction, SigmoidFunction)
 
 
 class TriangularTests(unittest.TestCase):
@@ -70,6 +74,17 @@ class TriangularTests(unittest.TestCase):
         self.assertEqual(func.c, Point(5, 0.5))
         self.assertEqual(func.d, Point(10, 0.5))
 
+    def test_evaluate_after_changing_point(self):
+        # Las pendientes precalculadas se actualizan al asignar un punto
+        self.function.c = Point(5, 1)
+        self.assertEqual(self.function.evaluate(5), 1)
+        self.assertEqual(self.function.evaluate(2.5), 0.5)
+        self.assertEqual(self.function.evaluate(12.5), 0.5)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.function, '__dict__'))
+        self.assertFalse(hasattr(Point(0, 0), '__dict__'))
+
 
 class TrapezoidalTests(unittest.TestCase):
     def setUp(self):
@@ -122,8 +137,145 @@ class TrapezoidalTests(unittest.TestCase):
         self.assertEqual(func.d, Point(5, 0.4))
 
     def test_truncate_zero(self):
-        func = self.function.truncate(0.4)
+        func = self.function.truncate(0)
         self.assertEqual(func.a, self.function.a)
         self.assertEqual(func.b, self.function.b)
         self.assertEqual(func.c, self.function.c)
         self.assertEqual(func.d, self.function.d)
+
+    def test_truncate_keeps_original(self):
+        self.function.truncate(0.4)
+        self.assertEqual(self.function.c, Point(2, 0.8))
+        self.assertEqual(self.function.d, Point(4, 0.8))
+
+
+def integrate_numerically(function, low, high, steps=20000):
+    """
+    Area y centroide por la regla del punto medio (solo para comprobar)
+
+    """
+    width = (high - low) / float(steps)
+    area = moment = 0.0
+    for i in range(steps):
+        x = low + (i + 0.5) * width
+        y = function.evaluate(x)
+        area += y * width
+        moment += x * y * width
+    return area, moment / area
+
+
+class GaussianTests(unittest.TestCase):
+    def setUp(self):
+        self.function = GaussianFunction(5, 2)
+
+    def test_evaluate(self):
+        self.assertEqual(self.function.evaluate(5), 1)
+        self.assertAlmostEqual(self.function.evaluate(7), math.exp(-0.5))
+        self.assertAlmostEqual(self.function.evaluate(3), math.exp(-0.5))
+
+    def test_area(self):
+        self.assertAlmostEqual(self.function.area(),
+                               2 * math.sqrt(2 * math.pi))
+        area, centroid = integrate_numerically(self.function.truncate(0.3),
+                                               -20, 30)
+        self.assertAlmostEqual(self.function.area(0.3), area, places=6)
+        self.assertEqual(self.function.centroid(0.3), 5)
+
+    def test_points(self):
+        # La aproximacion lineal a trozos tiene casi la misma area
+        area, centroid = integrate(self.function.points())
+        self.assertAlmostEqual(area, self.function.area(), places=3)
+        for x, y in self.function.points():
+            self.assertAlmostEqual(y, self.function.evaluate(x))
+
+    def test_truncate(self):
+        func = self.function.truncate(0.5)
+        self.assertEqual(func.evaluate(5), 0.5)
+        self.assertAlmostEqual(func.evaluate(9), self.function.evaluate(9))
+        self.assertIs(self.function.truncate(1), self.function)
+
+
+class BellTests(unittest.TestCase):
+    def setUp(self):
+        self.function = BellFunction(2, 2, 10)
+
+    def test_evaluate(self):
+        self.assertEqual(self.function.evaluate(10), 1)
+        self.assertEqual(self.function.evaluate(12), 0.5)
+        self.assertEqual(self.function.evaluate(8), 0.5)
+
+    def test_area(self):
+        area, centroid = integrate_numerically(self.function, -1000, 1020)
+        self.assertAlmostEqual(self.function.area(), area, places=4)
+        self.assertEqual(self.function.centroid(), 10)
+        self.assertEqual(self.function.area(0.5), None)
+
+
+class SigmoidTests(unittest.TestCase):
+    def test_evaluate(self):
+        function = SigmoidFunction(2, 8)
+        self.assertEqual(function.evaluate(8), 0.5)
+        self.assertAlmostEqual(function.evaluate(10), 1 / (1 + math.exp(-4)))
+        self.assertEqual(function.evaluate(-1e6), 0)
+        self.assertEqual(function.area(), None)
+        self.assertRaises(Exception, function.points)
+
+
+class ShoulderTests(unittest.TestCase):
+    def setUp(self):
+        self.function = ShoulderFunction(Point(0, 1), Point(4, 0))
+
+    def test_evaluate(self):
+        self.assertEqual(self.function.evaluate(-100), 1)
+        self.assertEqual(self.function.evaluate(1), 0.75)
+        self.assertEqual(self.function.evaluate(4), 0)
+        self.assertEqual(self.function.evaluate(100), 0)
+        self.assertEqual(self.function.support(), (float('-inf'), 4))
+
+    def test_truncate(self):
+        func = self.function.truncate(0.5)
+        self.assertEqual(func.a, Point(2, 0.5))
+        self.assertEqual(func.b, Point(4, 0))
+        self.assertEqual(func.evaluate(-100), 0.5)
+        self.assertEqual(func.evaluate(3), 0.25)
+
+
+class PiecewiseLinearTests(unittest.TestCase):
+    def setUp(self):
+        self.function = PiecewiseLinearFunction(
+            Point(-2, 0), Point(0, 1), Point(4, 1), Point(4, 0.5),
+            Point(6, 0))
+
+    def test_evaluate(self):
+        self.assertEqual(self.function.evaluate(-3), 0)
+        self.assertEqual(self.function.evaluate(-1), 0.5)
+        self.assertEqual(self.function.evaluate(2), 1)
+        self.assertEqual(self.function.evaluate(4), 0.5)
+        self.assertEqual(self.function.evaluate(5), 0.25)
+        self.assertEqual(self.function.evaluate(7), 0)
+
+    def test_area(self):
+        self.assertEqual(self.function.area(), 1 + 4 + 0.5)
+        self.assertEqual(self.function.area(0.5), 0.75 + 4 * 0.5 + 0.5)
+
+    def test_truncate(self):
+        func = self.function.truncate(0.5)
+        self.assertEqual(func.evaluate(2), 0.5)
+        self.assertEqual(func.evaluate(-1), 0.5)
+        self.assertEqual(func.evaluate(5), 0.25)
+        self.assertEqual(self.function.evaluate(2), 1)
+
+    def test_support(self):
+        self.assertEqual(self.function.support(), (-2, 6))
+
+        # Salto vertical en el primer punto: vale 1 en x = 0
+        function = PiecewiseLinearFunction(Point(0, 0), Point(0, 1),
+                                           Point(5, 1), Point(10, 0))
+        self.assertEqual(function.evaluate(0), 1)
+        low, high = function.support()
+        self.assertTrue(low < 0)
+        self.assertEqual(high, 10)
+
+        function = PiecewiseLinearFunction(Point(0, 0), Point(5, 1),
+                                           Point(10, 1), Point(10, 0))
+        self.assertEqual(function.support(), (0, float('inf')))
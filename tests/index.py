@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import itertools
+import unittest
+from fis.compiler import RuleCompiler
+from fis.core import FIS
+from fis.index import SupportIndex, required_atoms
+from fis.parser import InputParser
+from tests.models import PROPINA
+
+
+def grid_model(variables=3, values=5):
+    """
+    Genera un modelo con todas las combinaciones de valores ('and')
+
+    """
+    lines = []
+    names = ['V%d' % i for i in range(variables)]
+    for name in names:
+        for j in range(values):
+            lines.append('input: (%s) (L%d) (triangulo: (%d,0) (%d,0) '
+                         '(%d,1))' % (name, j, j * 10, j * 10 + 20,
+                                      j * 10 + 10))
+    for j in range(values):
+        lines.append('output: (Salida) (S%d) (triangulo: (%d,0) (%d,0) '
+                     '(%d,1))' % (j, j * 10, j * 10 + 20, j * 10 + 10))
+    for combination in itertools.product(range(values), repeat=variables):
+        head = ' and '.join('%s = L%d' % (name, j)
+                            for name, j in zip(names, combination))
+        lines.append('rule: %s => S%d' % (head, sum(combination) % values))
+    return '\n'.join(lines)
+
+
+class SupportIndexTests(unittest.TestCase):
+    def setUp(self):
+        input_vars = InputParser().parse_input_vars(PROPINA)
+        self.servicio = input_vars.get_definition('Servicio')
+        self.index = SupportIndex(self.servicio)
+
+    def test_active(self):
+        for i in range(-10, 111):
+            x = i / 10.0
+            expected = set(v.value for v in self.servicio.values
+                           if v.function.evaluate(x) > 0)
+            self.assertEqual(set(self.index.active(x)), expected)
+
+    def test_outside(self):
+        self.assertEqual(self.index.active(-100), ())
+        self.assertEqual(self.index.active(100), ())
+
+    def test_vertical_jump(self):
+        # La funcion vale 1 justo en el primer punto (salto vertical)
+        fis = FIS(*InputParser().parse("""
+input: (V) (Alto) (poligonal: (0,0) (0,1) (5,1) (10,0))
+output: (S) (Uno) (triangulo: (0,0) (10,0) (5,1))
+rule: V = Alto => Uno
+""")[:3])
+        self.assertEqual(fis.execute({'V': 0}), 5)
+
+
+class RequiredAtomsTests(unittest.TestCase):
+    def required(self, head):
+        return required_atoms(RuleCompiler().compile(head))
+
+    def test_and(self):
+        self.assertEqual(self.required('A = B and C = D'),
+                         set([('A', 'B'), ('C', 'D')]))
+
+    def test_or(self):
+        self.assertEqual(
+            self.required('(A = B and C = D) or (A = B and E = F)'),
+            set([('A', 'B')]))
+
+    def test_not(self):
+        self.assertEqual(self.required('not(A = B) and C = D'),
+                         set([('C', 'D')]))
+
+
+class RuleIndexTests(unittest.TestCase):
+    def setUp(self):
+        input_vars, output_var, rules, _ = InputParser().parse(grid_model())
+        self.fis = FIS(input_vars, output_var, rules)
+
+    def test_candidates(self):
+        inputs = {'V0': 22, 'V1': 30, 'V2': 45}
+        candidates = self.fis.rule_index.candidates(inputs)
+        # 2 valores activos de V0, 1 de V1 y 2 de V2
+        self.assertEqual(len(candidates), 4)
+
+    def test_activate(self):
+        for inputs in ({'V0': 22, 'V1': 30, 'V2': 45},
+                       {'V0': 10, 'V1': 13.3, 'V2': 50},
+                       {'V0': 0, 'V1': 17, 'V2': 28}):
+            context = self.fis.input_vars.context(inputs)
+            expected = dict((v.value, 0) for v in self.fis.output_var.values)
+            for rule in self.fis.rules:
+                value = rule.output_var.value.value
+                expected[value] = max(expected[value],
+                                      rule.evaluator.evaluate(context))
+            self.assertEqual(self.fis.activate(inputs), expected)
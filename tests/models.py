@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Modelos de ejemplo utilizados en las pruebas
+"""
+
+PROPINA = """
+input: (Servicio) (Malo) (trapecio: (0,0) (4,0) (0,1) (2,1))
+input: (Servicio) (Bueno) (triangulo: (2,0) (8,0) (5,1))
+input: (Servicio) (Excelente) (trapecio: (6,0) (10,0) (8,1) (10,1))
+input: (Comida) (Rancia) (trapecio: (0,0) (5,0) (0,1) (2,1))
+input: (Comida) (Deliciosa) (trapecio: (4,0) (10,0) (8,1) (10,1))
+
+output: (Propina) (Poca) (triangulo: (0,0) (12,0) (6,1))
+output: (Propina) (Normal) (triangulo: (8,0) (22,0) (15,1))
+output: (Propina) (Mucha) (trapecio: (18,0) (30,0) (24,1) (30,1))
+
+rule: Servicio = Malo or Comida = Rancia => Poca
+rule: Servicio = Bueno => Normal
+rule: Servicio = Excelente or Comida = Deliciosa => Mucha
+rule: not(Servicio = Malo) and Comida = Rancia => Normal
+
+ini: Servicio = 3
+ini: Comida = 8
+"""
+
+# Mismo modelo con funciones suaves, hombros y poligonales (y negativos)
+SUAVE = """
+input: (Servicio) (Malo) (hombro: (0,1) (4,0))
+input: (Servicio) (Bueno) (gaussiana: (5, 1.5))
+input: (Servicio) (Excelente) (sigmoide: (2, 8))
+input: (Comida) (Rancia) (campana: (2, 2, 0))
+input: (Comida) (Deliciosa) (poligonal: (4,0) (8,1) (10,1))
+
+output: (Propina) (Poca) (gaussiana: (6, 2))
+output: (Propina) (Normal) (campana: (4, 2, 15))
+output: (Propina) (Mucha) (poligonal: (18,0) (24,1) (28,0.5) (30,0))
+
+rule: Servicio = Malo or Comida = Rancia => Poca
+rule: Servicio = Bueno => Normal
+rule: Servicio = Excelente or Comida = Deliciosa => Mucha
+rule: not(Servicio = Malo) and Comida = Rancia => Normal
+
+ini: Servicio = -1
+ini: Comida = 8
+"""
+
+# Modelo Takagi-Sugeno: los valores de salida son consecuentes
+PROPINA_SUGENO = """
+input: (Servicio) (Malo) (trapecio: (0,0) (4,0) (0,1) (2,1))
+input: (Servicio) (Bueno) (triangulo: (2,0) (8,0) (5,1))
+input: (Servicio) (Excelente) (trapecio: (6,0) (10,0) (8,1) (10,1))
+input: (Comida) (Rancia) (trapecio: (0,0) (5,0) (0,1) (2,1))
+input: (Comida) (Deliciosa) (trapecio: (4,0) (10,0) (8,1) (10,1))
+
+output: (Propina) (Poca) (constante: (5))
+output: (Propina) (Normal) (lineal: 10 + 0.5*Servicio + 0.5*Comida)
+output: (Propina) (Mucha) (lineal: 15 + 1.5*Servicio - Comida)
+
+rule: Servicio = Malo or Comida = Rancia => Poca
+rule: Servicio = Bueno => Normal
+rule: Servicio = Excelente or Comida = Deliciosa => Mucha
+rule: not(Servicio = Malo) and Comida = Rancia => Normal
+
+ini: Servicio = 3
+ini: Comida = 8
+"""
+
+# Dos variables de salida (una Mamdani y otra Sugeno) sobre las mismas
+# entradas. 'Normal' existe en ambas, por lo que hay que indicar la variable
+PROPINA_DESCUENTO = """
+input: (Servicio) (Malo) (trapecio: (0,0) (4,0) (0,1) (2,1))
+input: (Servicio) (Bueno) (triangulo: (2,0) (8,0) (5,1))
+input: (Servicio) (Excelente) (trapecio: (6,0) (10,0) (8,1) (10,1))
+input: (Comida) (Rancia) (trapecio: (0,0) (5,0) (0,1) (2,1))
+input: (Comida) (Deliciosa) (trapecio: (4,0) (10,0) (8,1) (10,1))
+
+output: (Propina) (Poca) (triangulo: (0,0) (12,0) (6,1))
+output: (Propina) (Normal) (triangulo: (8,0) (22,0) (15,1))
+output: (Propina) (Mucha) (trapecio: (18,0) (30,0) (24,1) (30,1))
+output: (Descuento) (Ninguno) (constante: (0))
+output: (Descuento) (Normal) (constante: (5))
+output: (Descuento) (Alto) (lineal: 20 - Servicio)
+
+rule: Servicio = Malo or Comida = Rancia => Poca
+rule: Servicio = Bueno => Propina = Normal
+rule: Servicio = Excelente or Comida = Deliciosa => Mucha
+rule: not(Servicio = Malo) and Comida = Rancia => Propina = Normal
+rule: Servicio = Malo or Comida = Rancia => Descuento = Alto
+rule: Servicio = Bueno => Descuento = Normal
+rule: Servicio = Excelente and Comida = Deliciosa => Ninguno
+
+ini: Servicio = 3
+ini: Comida = 8
+"""
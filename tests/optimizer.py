@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import unittest
+from benchmarks.generator import generate_model
+from fis.compiler import RuleCompiler
+from fis.core import FIS
+from fis.optimizer import (Normalizer, RuleOptimizer, optimize_rules,
+                           verify)
+from fis.parser import InputParser
+from tests.models import PROPINA, PROPINA_SUGENO
+
+
+REDUNDANTE = PROPINA + """
+rule: Servicio = Malo or Comida = Rancia => Poca
+rule: Comida = Rancia or Servicio = Malo => Poca
+rule: Servicio = Malo and Comida = Deliciosa => Poca
+rule: not(not(Servicio = Bueno)) => Normal
+rule: Servicio = Bueno and (Servicio = Bueno or Comida = Rancia) => Normal
+rule: Servicio = Excelente and Comida = Deliciosa => Mucha
+rule: Servicio = Excelente => Mucha
+"""
+
+
+class NormalizerTests(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = Normalizer()
+        self.compiler = RuleCompiler()
+
+    def normalize(self, head):
+        return self.normalizer.normalize(self.compiler.compile(head))
+
+    def assertEquivalent(self, a, b):
+        self.assertEqual(self.normalizer.number(self.normalize(a)),
+                         self.normalizer.number(self.normalize(b)))
+
+    def test_normalize(self):
+        self.assertEquivalent('A = X and B = Y', 'B = Y and A = X')
+        self.assertEquivalent('A = X and (B = Y and C = Z)',
+                              '(A = X and B = Y) and C = Z')
+        self.assertEquivalent('not(not(A = X))', 'A = X')
+        self.assertEquivalent('A = X or A = X', 'A = X')
+        # Absorcion
+        self.assertEquivalent('A = X and (A = X or B = Y)', 'A = X')
+        self.assertEquivalent('A = X or (A = X and B = Y)', 'A = X')
+        self.assertEqual(str(self.normalize('A = X and (B = Y or A = X)')),
+                         'A = X')
+
+    def test_implies(self):
+        def implies(a, b):
+            return self.normalizer.implies(self.normalize(a),
+                                           self.normalize(b))
+
+        self.assertTrue(implies('A = X and B = Y', 'A = X'))
+        self.assertTrue(implies('A = X', 'A = X or B = Y'))
+        self.assertTrue(implies('A = X and B = Y', 'A = X or C = Z'))
+        self.assertTrue(implies('not(A = X)', 'not(A = X and B = Y)'))
+        self.assertFalse(implies('A = X', 'A = X and B = Y'))
+        self.assertFalse(implies('A = X or B = Y', 'A = X'))
+        self.assertFalse(implies('A = X', 'not(A = X)'))
+
+
+class RuleOptimizerTests(unittest.TestCase):
+    def test_optimize(self):
+        input_vars, output_var, rules, _ = InputParser().parse(REDUNDANTE)
+        optimized, optimizer = optimize_rules(rules)
+
+        self.assertEqual(optimizer.original, 11)
+        self.assertEqual(optimizer.duplicates, 4)
+        self.assertEqual(optimizer.subsumed, 3)
+        self.assertEqual(optimizer.optimized, 4)
+        self.assertTrue(optimizer.nodes_after < optimizer.nodes_before)
+        self.assertTrue('Reglas: 11 -> 4' in optimizer.report())
+
+        self.assertEqual([r.output_var.value.value for r in optimized],
+                         ['Poca', 'Normal', 'Normal', 'Mucha'])
+        # El encabezado nuevo se puede volver a compilar
+        for rule in optimized:
+            RuleCompiler().compile(rule.orig_head)
+
+        self.assertAlmostEqual(verify(input_vars, output_var, rules, optimized,
+                                samples=300), 0)
+
+    def test_merge(self):
+        text = PROPINA + """
+rule: Comida = Rancia and not(Servicio = Bueno) => Normal
+rule: Comida = Rancia and Servicio = Excelente => Mucha
+"""
+        input_vars, output_var, rules, _ = InputParser().parse(text)
+        optimized, optimizer = optimize_rules(rules)
+        # Se une con 'not(Servicio = Malo) and Comida = Rancia' (ambas solo
+        # necesitan 'Comida = Rancia')
+        self.assertEqual(optimizer.merged, 1)
+        self.assertEqual(optimizer.subsumed, 1)
+        self.assertAlmostEqual(verify(input_vars, output_var, rules, optimized,
+                                samples=300), 0)
+
+        optimized, optimizer = optimize_rules(rules, merge=False)
+        self.assertEqual(optimizer.merged, 0)
+        self.assertEqual(len(optimized), len(rules) - 1)
+
+    def test_sugeno(self):
+        # Las reglas repetidas cambian el promedio ponderado
+        text = PROPINA_SUGENO + """
+rule: Servicio = Bueno => Normal
+"""
+        input_vars, output_var, rules, _ = InputParser().parse(text)
+        optimized, optimizer = optimize_rules(rules)
+        self.assertEqual(len(optimized), len(rules))
+        self.assertAlmostEqual(verify(input_vars, output_var, rules, optimized,
+                                samples=100), 0)
+
+    def test_generated_model(self):
+        text = generate_model(variables=6, values=4, rules=300, depth=2)
+        input_vars, output_var, rules, _ = InputParser().parse(text)
+        optimizer = RuleOptimizer()
+        optimized = optimizer.optimize(rules)
+
+        self.assertTrue(len(optimized) < len(rules))
+        self.assertAlmostEqual(verify(input_vars, output_var, rules, optimized,
+                                samples=200), 0)
+        self.assertEqual(len(FIS(input_vars, output_var, optimized).rules),
+                         optimizer.optimized)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from fis.core import FIS
+from fis.definitions import VariableCollection
+from fis.parser import InputParser, ParseError
+from fis.serialization import save_compiled, load_compiled
+from fis.stream import execute_stream, write_results
+from tests.models import PROPINA, PROPINA_DESCUENTO
+
+
+DESCUENTO = """
+input: (Servicio) (Malo) (trapecio: (0,0) (4,0) (0,1) (2,1))
+input: (Servicio) (Bueno) (triangulo: (2,0) (8,0) (5,1))
+input: (Servicio) (Excelente) (trapecio: (6,0) (10,0) (8,1) (10,1))
+input: (Comida) (Rancia) (trapecio: (0,0) (5,0) (0,1) (2,1))
+input: (Comida) (Deliciosa) (trapecio: (4,0) (10,0) (8,1) (10,1))
+
+output: (Descuento) (Ninguno) (constante: (0))
+output: (Descuento) (Normal) (constante: (5))
+output: (Descuento) (Alto) (lineal: 20 - Servicio)
+
+rule: Servicio = Malo or Comida = Rancia => Alto
+rule: Servicio = Bueno => Normal
+rule: Servicio = Excelente and Comida = Deliciosa => Ninguno
+"""
+
+
+class CountingFunction(object):
+    """
+    Envuelve una funcion de membresia y cuenta sus evaluaciones
+
+    """
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+
+    def evaluate(self, value):
+        self.calls += 1
+        return self.function.evaluate(value)
+
+    def support(self):
+        return self.function.support()
+
+
+class MultipleOutputTests(unittest.TestCase):
+    def setUp(self):
+        self.model = InputParser().parse(PROPINA_DESCUENTO)
+        self.fis = FIS(*self.model[:3])
+        self.propina = FIS(*InputParser().parse(PROPINA)[:3])
+        self.descuento = FIS(*InputParser().parse(DESCUENTO)[:3])
+
+    def points(self):
+        return [{'Servicio': servicio, 'Comida': comida}
+                for servicio in range(11) for comida in range(11)]
+
+    def test_parse(self):
+        input_vars, output_vars, rules, _ = self.model
+        self.assertIsInstance(output_vars, VariableCollection)
+        self.assertEqual([v.name for v in output_vars],
+                         ['Propina', 'Descuento'])
+        self.assertEqual(['%s = %s' % (rule.output_var.definition.name,
+                                       rule.output_var.value.value)
+                          for rule in rules],
+                         ['Propina = Poca', 'Propina = Normal',
+                          'Propina = Mucha', 'Propina = Normal',
+                          'Descuento = Alto', 'Descuento = Normal',
+                          'Descuento = Ninguno'])
+
+    def test_parse_errors(self):
+        # 'Normal' existe en las dos variables de salida
+        ambiguous = PROPINA_DESCUENTO.replace('=> Propina = Normal',
+                                              '=> Normal')
+        self.assertRaises(ParseError, InputParser().parse, ambiguous)
+
+        unknown = PROPINA_DESCUENTO.replace('=> Propina = Normal',
+                                            '=> Bebida = Normal')
+        self.assertRaises(ParseError, InputParser().parse, unknown)
+
+        wrong = PROPINA_DESCUENTO.replace('=> Descuento = Alto',
+                                          '=> Propina = Alto')
+        self.assertRaises(ParseError, InputParser().parse, wrong)
+
+    def test_reused_parser(self):
+        # Cada 'parse' usa sus propias variables de salida aunque el
+        # parser se reutilice
+        parser = InputParser()
+        values = {'Servicio': 9.5, 'Comida': 9.5}
+        for k in range(1, 6):
+            text = PROPINA_DESCUENTO.replace(
+                '(Ninguno) (constante: (0))',
+                '(Ninguno) (constante: (%d))' % (100 * k))
+            fis = FIS(*parser.parse(text)[:3])
+            expected = FIS(*InputParser().parse(text)[:3]).execute(values)
+            self.assertEqual(fis.execute(values), expected)
+
+    def test_named_single_output(self):
+        text = PROPINA.replace('=> Mucha', '=> Propina = Mucha')
+        fis = FIS(*InputParser().parse(text)[:3])
+        values = {'Servicio': 9, 'Comida': 9}
+        self.assertEqual(fis.execute(values), self.propina.execute(values))
+
+    def test_execute(self):
+        # Igual que ejecutar un modelo por cada variable de salida
+        for values in self.points():
+            result = self.fis.execute(values)
+            self.assertEqual(sorted(result), ['Descuento', 'Propina'])
+            self.assertEqual(result['Propina'],
+                             self.propina.execute(values))
+            self.assertEqual(result['Descuento'],
+                             self.descuento.execute(values))
+
+    def test_single_pass(self):
+        # Cada grado de membresia se calcula una sola vez por ejecucion
+        input_vars, output_vars, rules, _ = InputParser().parse(
+            PROPINA_DESCUENTO)
+        functions = []
+        for definition in input_vars:
+            for value in definition.values:
+                value.function = CountingFunction(value.function)
+                functions.append(value.function)
+        fis = FIS(input_vars, output_vars, rules)
+
+        for values in self.points():
+            fis.execute(values)
+            self.assertTrue(all(f.calls <= 1 for f in functions))
+            for f in functions:
+                f.calls = 0
+
+    @unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+    def test_execute_batch(self):
+        points = self.points()
+        result = self.fis.execute_batch(
+            [[p['Servicio'], p['Comida']] for p in points],
+            ['Servicio', 'Comida'])
+        for i, values in enumerate(points):
+            expected = self.fis.execute(values)
+            for name in ('Propina', 'Descuento'):
+                if expected[name] is None:
+                    self.assertTrue(numpy.isnan(result[name][i]))
+                else:
+                    self.assertAlmostEqual(result[name][i], expected[name])
+
+    @unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+    def test_execute_parallel(self):
+        points = self.points()
+        columns = {'Servicio': [p['Servicio'] for p in points],
+                   'Comida': [p['Comida'] for p in points]}
+        expected = self.fis.execute_batch(columns)
+        result = self.fis.execute_parallel(columns, workers=2,
+                                           chunk_size=30)
+        self.assertEqual(sorted(result), ['Descuento', 'Propina'])
+        for name in result:
+            self.assertTrue(numpy.allclose(result[name], expected[name],
+                                           equal_nan=True))
+
+    def test_serialization(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'propina.fisc')
+            save_compiled(self.fis, path)
+            fis = load_compiled(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual([v.name for v in fis.output_vars],
+                         ['Propina', 'Descuento'])
+        for values in self.points():
+            self.assertEqual(fis.execute(values), self.fis.execute(values))
+
+    def test_stream(self):
+        records = [{'Servicio': 3, 'Comida': 8}, {'Servicio': 0, 'Comida': 0}]
+        output = StringIO()
+        write_results(execute_stream(self.fis, records), output,
+                      ['Servicio', 'Comida'], ['Propina', 'Descuento'])
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], 'Servicio,Comida,Propina,Descuento')
+        expected = self.fis.execute(records[0])
+        propina, descuento = [float(v) for v in lines[1].split(',')[2:]]
+        self.assertAlmostEqual(propina, expected['Propina'])
+        self.assertAlmostEqual(descuento, expected['Descuento'])
+
+    def test_unsupported(self):
+        self.assertRaises(Exception, self.fis.session, {'Servicio': 3,
+                                                        'Comida': 8})
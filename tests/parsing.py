@@ -2,8 +2,11 @@
 import unittest
 from fis.definitions import (VariableDefinition, VariableCollection,
                              ValueDefinition)
-from fis.functions import TriangularFunction, Point, TrapezoidalFunction
-from fis.parser import RuleEvaluator, InputParser
+from fis.functions import (TriangularFunction, Point, TrapezoidalFunction,
+                           PiecewiseLinearFunction, ShoulderFunction,
+                           GaussianFunction, BellFunction, SigmoidFunction)
+from fis.parser import RuleEvaluator, InputParser, ParseError
+from tests.models import PROPINA
 
 
 class ParserTests(unittest.TestCase):
@@ -129,6 +132,42 @@ class InputParserTests(unittest.TestCase):
         self.assertEqual(result.c, Point(5, 6))
         self.assertEqual(result.d, Point(7, 8))
 
+    def test_parse_function_negative(self):
+        result = self.parser.parse_function(
+            'triangulo: (-10,0) (-2.5,0) (-5,1)')
+        self.assertEqual(result.a, Point(-10, 0))
+        self.assertEqual(result.b, Point(-2.5, 0))
+
+    def test_parse_function_smooth(self):
+        result = self.parser.parse_function('gaussiana: (5, 1.5)')
+        self.assertIsInstance(result, GaussianFunction)
+        self.assertEqual((result.mean, result.sigma), (5, 1.5))
+
+        result = self.parser.parse_function('campana: (2, 4, -6)')
+        self.assertIsInstance(result, BellFunction)
+        self.assertEqual((result.a, result.b, result.c), (2, 4, -6))
+
+        result = self.parser.parse_function('sigmoide: (-2, 8)')
+        self.assertIsInstance(result, SigmoidFunction)
+        self.assertEqual((result.slope, result.center), (-2, 8))
+
+    def test_parse_function_points(self):
+        result = self.parser.parse_function('hombro: (0,1) (4,0)')
+        self.assertIsInstance(result, ShoulderFunction)
+        self.assertEqual(result.b, Point(4, 0))
+
+        result = self.parser.parse_function('poligonal: (0,0) (1,1) (3,0)')
+        self.assertIsInstance(result, PiecewiseLinearFunction)
+        self.assertEqual(result.points(), [(0, 0), (1, 1), (3, 0)])
+
+    def test_parse_function_errors(self):
+        self.assertRaises(Exception, self.parser.parse_function,
+                          'elipse: (1,2)')
+        self.assertRaises(Exception, self.parser.parse_function,
+                          'gaussiana: (1, 2, 3, 4)')
+        self.assertRaises(Exception, self.parser.parse_function,
+                          'gaussiana: (1, 0)')
+
     def test_parse_input_vars(self):
         result = self.parser.parse_input_vars(
             """
@@ -199,6 +238,8 @@ class InputParserTests(unittest.TestCase):
         # Asegurarnos de que se parsea la regla
         self.assertEqual(rules[0].head,
             'variables.get_var("VarA", "ValueA")')
+        # y que se compila una sola vez al cargarla
+        self.assertEqual(str(rules[0].evaluator), 'VarA = ValueA')
         self.assertEqual(rules[0].output_var.definition, output_var_def)
         self.assertEqual(rules[0].output_var.value.value, 'Buena')
 
@@ -217,3 +258,78 @@ class InputParserTests(unittest.TestCase):
         self.assertEqual(d['Calidad'], 13)
         self.assertEqual(d['Temperatura'], 10)
         self.assertEqual(d['Propina'], 16.3)
+
+    def test_parse_file(self):
+        from tests.models import PROPINA
+        f = iter(PROPINA.splitlines(True))
+        lines = Lines(f)
+        input_vars, output_var, rules, input_values = self.parser.parse(lines)
+        self.assertEqual([v.name for v in input_vars],
+                         ['Servicio', 'Comida'])
+        self.assertEqual(output_var.name, 'Propina')
+        self.assertEqual(len(output_var.values), 3)
+        self.assertEqual(len(rules), 4)
+        self.assertEqual(input_values, {'Servicio': 3, 'Comida': 8})
+
+    def test_parse_rule_before_output(self):
+        _, output_var, rules, _ = self.parser.parse(
+            """
+            rule: VarA = ValueA => Buena
+            output: (Calidad) (Buena) (triangulo: (1,2) (3,4) (5,6))
+            """
+        )
+        self.assertIs(rules[0].output_var.definition, output_var)
+
+    def test_error_line(self):
+        try:
+            self.parser.parse(
+                """
+                input: (Calidad) (Buena) (triangulo: (1,2) (3,4) (5,6))
+                input: (Calidad) (Mala) (triangulo: (1,2) (3,4))
+                """
+            )
+        except ParseError as e:
+            self.assertEqual(e.line, 3)
+        else:
+            self.fail('No se detecto el error')
+
+    def test_unknown_line(self):
+        # Las lineas desconocidas se ignoran, salvo con 'strict'
+        text = PROPINA + 'nota: revisar las reglas\n'
+        self.assertEqual(len(InputParser().parse(text)[2]),
+                         len(InputParser().parse(PROPINA)[2]))
+        try:
+            InputParser(strict=True).parse(text)
+        except ParseError as e:
+            self.assertEqual(e.line, len(text.splitlines()))
+        else:
+            self.fail('No se detecto el error')
+
+    def test_error_unknown_output(self):
+        try:
+            self.parser.parse(
+                """
+                output: (Calidad) (Buena) (triangulo: (1,2) (3,4) (5,6))
+
+                rule: VarA = ValueA => Mala
+                """
+            )
+        except ParseError as e:
+            self.assertEqual(e.line, 4)
+        else:
+            self.fail('No se detecto el error')
+
+
+class Lines(object):
+    """
+    Fichero de prueba que solo puede recorrerse linea a linea
+
+    """
+    def __init__(self, lines):
+        self.lines = lines
+
+    def read(self):
+        raise AssertionError('Se leyo el fichero completo')
+
+    def __iter__(self):
+        return self.lines
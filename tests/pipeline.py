@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import random
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from fis.core import FIS
+from fis.parser import InputParser
+from fis.pipeline import Pipeline
+from tests.models import PROPINA_SUGENO
+
+
+CALIDAD = """
+input: (Servicio) (Malo) (trapecio: (0,0) (4,0) (0,1) (2,1))
+input: (Servicio) (Bueno) (triangulo: (2,0) (8,0) (5,1))
+input: (Servicio) (Excelente) (trapecio: (6,0) (10,0) (8,1) (10,1))
+input: (Comida) (Rancia) (trapecio: (0,0) (5,0) (0,1) (2,1))
+input: (Comida) (Deliciosa) (trapecio: (4,0) (10,0) (8,1) (10,1))
+
+output: (Calidad) (Baja) (triangulo: (0,0) (5,0) (2,1))
+output: (Calidad) (Media) (triangulo: (2,0) (8,0) (5,1))
+output: (Calidad) (Alta) (triangulo: (5,0) (10,0) (8,1))
+
+rule: Servicio = Malo or Comida = Rancia => Baja
+rule: Servicio = Bueno => Media
+rule: Servicio = Excelente or Comida = Deliciosa => Alta
+"""
+
+PROPINA_CALIDAD = """
+input: (Calidad) (Baja) (trapecio: (0,0) (5,0) (0,1) (3,1))
+input: (Calidad) (Alta) (trapecio: (4,0) (10,0) (7,1) (10,1))
+input: (Ambiente) (Tranquilo) (trapecio: (0,0) (6,0) (0,1) (3,1))
+input: (Ambiente) (Animado) (trapecio: (4,0) (10,0) (7,1) (10,1))
+
+output: (Propina) (Poca) (triangulo: (0,0) (12,0) (6,1))
+output: (Propina) (Normal) (triangulo: (8,0) (22,0) (15,1))
+output: (Propina) (Mucha) (trapecio: (18,0) (30,0) (24,1) (30,1))
+
+rule: Calidad = Baja => Poca
+rule: Calidad = Alta and Ambiente = Tranquilo => Normal
+rule: Calidad = Alta and Ambiente = Animado => Mucha
+"""
+
+
+def load(text):
+    return FIS(*InputParser().parse(text)[:3])
+
+
+class PipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.calidad = load(CALIDAD)
+        self.propina = load(PROPINA_CALIDAD)
+        # El orden de los sistemas no importa
+        self.pipeline = Pipeline([self.propina, self.calidad])
+
+    def points(self):
+        return [{'Servicio': servicio, 'Comida': comida, 'Ambiente': ambiente}
+                for servicio in range(12) for comida in range(12)
+                for ambiente in (1, 3, 5, 8)]
+
+    def expected(self, values):
+        calidad = self.calidad.execute(values)
+        if calidad is None:
+            return {'Calidad': None, 'Propina': None}
+        return {'Calidad': calidad,
+                'Propina': self.propina.execute(
+                    {'Calidad': calidad, 'Ambiente': values['Ambiente']})}
+
+    def test_structure(self):
+        self.assertEqual([s.fis for s in self.pipeline.stages],
+                         [self.calidad, self.propina])
+        self.assertEqual([v.name for v in self.pipeline.input_vars],
+                         ['Servicio', 'Comida', 'Ambiente'])
+        self.assertEqual([v.name for v in self.pipeline.output_vars],
+                         ['Calidad', 'Propina'])
+
+    def test_execute(self):
+        for values in self.points():
+            self.assertEqual(self.pipeline.execute(values),
+                             self.expected(values))
+
+        # Ninguna regla de 'Calidad' se activa
+        self.assertEqual(self.pipeline.execute(
+            {'Servicio': 11, 'Comida': 11, 'Ambiente': 5}),
+            {'Calidad': None, 'Propina': None})
+
+    def test_invalid(self):
+        self.assertRaises(Exception, Pipeline, [self.calidad, self.calidad])
+
+        # 'Calidad' depende de 'Propina' y 'Propina' de 'Calidad'
+        ciclo = load(CALIDAD.replace('(Comida)', '(Propina)').replace(
+            'Comida =', 'Propina ='))
+        self.assertRaises(Exception, Pipeline, [ciclo, self.propina])
+
+    def test_sugeno_stage(self):
+        sugeno = load(PROPINA_SUGENO.replace('Propina', 'Calidad'))
+        pipeline = Pipeline([sugeno, self.propina])
+        values = {'Servicio': 3, 'Comida': 8, 'Ambiente': 2}
+        calidad = sugeno.execute(values)
+        self.assertEqual(pipeline.execute(values),
+                         {'Calidad': calidad,
+                          'Propina': self.propina.execute(
+                              {'Calidad': calidad, 'Ambiente': 2})})
+
+    def test_shared_variable(self):
+        # 'Servicio' es entrada de los dos sistemas, con otra definicion de
+        # 'Malo' en el segundo: los grados no pueden compartirse
+        propina = load(PROPINA_CALIDAD.replace(
+            'input: (Ambiente)', 'input: (Servicio) (Malo) (trapecio: (0,0) '
+            '(6,0) (0,1) (3,1))\ninput: (Ambiente)', 1) +
+            'rule: Servicio = Malo => Poca')
+        pipeline = Pipeline([self.calidad, propina])
+        for values in self.points():
+            calidad = self.calidad.execute(values)
+            inputs = dict(values, Calidad=calidad)
+            expected = None if calidad is None else propina.execute(inputs)
+            self.assertEqual(pipeline.execute(values),
+                             {'Calidad': calidad, 'Propina': expected})
+
+    @unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+    def test_execute_batch(self):
+        points = self.points()
+        columns = dict((name, [p[name] for p in points])
+                       for name in ('Servicio', 'Comida', 'Ambiente'))
+        result = self.pipeline.execute_batch(columns)
+        for i, values in enumerate(points):
+            for name, value in self.expected(values).items():
+                if value is None:
+                    self.assertTrue(numpy.isnan(result[name][i]))
+                else:
+                    self.assertAlmostEqual(result[name][i], value)
+
+    def test_session(self):
+        session = self.pipeline.session(
+            {'Servicio': 3, 'Comida': 8, 'Ambiente': 2})
+        self.assertEqual(session.evaluations, [1, 1])
+
+        # 'Ambiente' solo es entrada del segundo sistema
+        result = session.update(Ambiente=8)
+        self.assertEqual(session.evaluations, [1, 2])
+        self.assertEqual(result, self.expected(
+            {'Servicio': 3, 'Comida': 8, 'Ambiente': 8}))
+
+        session.update(Ambiente=8)
+        self.assertEqual(session.evaluations, [1, 2])
+        self.assertTrue(session.verify())
+
+    def test_random_updates(self):
+        rnd = random.Random(0)
+        values = {'Servicio': 5, 'Comida': 5, 'Ambiente': 5}
+        session = self.pipeline.session(values)
+        for _ in range(200):
+            name = rnd.choice(sorted(values))
+            values[name] = rnd.uniform(-1, 11)
+            result = session.update({name: values[name]})
+            self.assertTrue(session.verify())
+            for output, value in self.expected(values).items():
+                if value is None:
+                    self.assertEqual(result[output], None)
+                else:
+                    self.assertAlmostEqual(result[output], value)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import unittest
+from fis.core import FIS
+from fis.profiling import Profiler
+from tests.models import PROPINA, PROPINA_DESCUENTO, PROPINA_SUGENO, SUAVE
+
+
+class ProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.rules = []
+        self.executions = []
+        self.profiler = Profiler(
+            on_rule=lambda *args: self.rules.append(args),
+            on_execute=lambda *args: self.executions.append(args))
+        self.fis = FIS(*self.profiler.parse(PROPINA)[:3],
+                       profiler=self.profiler)
+        self.plain = FIS(self.fis.input_vars, self.fis.output_var,
+                         self.fis.rules)
+
+    def test_unsupported(self):
+        # Las ejecuciones Sugeno o con varias salidas no pasan por el
+        # perfilador
+        for text in (PROPINA_SUGENO, PROPINA_DESCUENTO):
+            args = self.profiler.parse(text)[:3]
+            self.assertRaises(Exception, FIS, *args, profiler=self.profiler)
+
+            fis = FIS(*args)
+            self.assertRaises(Exception, setattr, fis, 'profiler',
+                              self.profiler)
+            self.assertEqual(fis.profiler, None)
+
+    def test_smooth_outputs(self):
+        # Con un solo valor de salida activo se usa el centroide exacto de
+        # la funcion truncada (ver 'FIS.defuzzify'), igual que sin perfilador
+        text = (SUAVE[:SUAVE.index('rule:')] +
+                'rule: Servicio = Bueno => Normal')
+        fis = FIS(*Profiler().parse(text)[:3])
+        plain = FIS(fis.input_vars, fis.output_var, fis.rules)
+        fis.profiler = Profiler()
+        for servicio in range(-2, 12):
+            for comida in range(-2, 12):
+                values = {'Servicio': servicio, 'Comida': comida}
+                self.assertEqual(fis.execute(values), plain.execute(values))
+
+    def test_same_result(self):
+        for servicio in range(0, 11):
+            input_values = {'Servicio': servicio, 'Comida': 8}
+            self.assertEqual(self.fis.execute(input_values),
+                             self.plain.execute(input_values))
+
+    def test_report(self):
+        self.fis.execute({'Servicio': 3, 'Comida': 8})
+        self.fis.execute({'Servicio': 3, 'Comida': 8})
+        report = self.profiler.report()
+
+        self.assertEqual(report['executions'], 2)
+        self.assertEqual(len(report['rules']), len(self.fis.rules))
+        for rule in report['rules']:
+            self.assertEqual(rule['fired'] + rule['zero'], 2)
+            self.assertTrue(rule['evaluations'] <= 2)
+        self.assertTrue(report['phases']['parse'] > 0)
+        self.assertTrue(all(count == 2
+                            for count in report['memberships'].values()))
+
+    def test_callbacks(self):
+        value = self.fis.execute({'Servicio': 3, 'Comida': 8})
+        self.assertEqual(len(self.executions), 1)
+        self.assertEqual(self.executions[0][1], value)
+        self.assertEqual(sorted(self.executions[0][2]),
+                         ['defuzzify', 'fuzzify', 'infer'])
+        for i, rule, strength, elapsed in self.rules:
+            self.assertIs(rule, self.fis.rules[i])
+            self.assertTrue(0 <= strength <= 1)
+
+    def test_reset(self):
+        self.fis.execute({'Servicio': 3, 'Comida': 8})
+        self.profiler.reset()
+        self.assertEqual(self.profiler.report()['executions'], 0)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from fis.core import FIS
+from fis.parser import InputParser, ParseError
+from fis.reload import ModelLoader, ModelHandle
+from fis.server import BatchExecutor
+from tests.models import PROPINA
+
+
+def points():
+    return [{'Servicio': servicio, 'Comida': comida}
+            for servicio in range(-1, 12) for comida in range(-1, 12)]
+
+
+class ModelLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self.loader = ModelLoader()
+        self.fis, self.input_values = self.loader.load(PROPINA)
+
+    def assertSameModel(self, fis, text):
+        expected = FIS(*InputParser().parse(text)[:3])
+        for values in points():
+            self.assertEqual(fis.execute(values), expected.execute(values))
+
+    def test_load(self):
+        self.assertEqual(self.input_values, {'Servicio': 3, 'Comida': 8})
+        self.assertSameModel(self.fis, PROPINA)
+
+    def test_changed_rule(self):
+        text = PROPINA.replace('rule: Servicio = Bueno => Normal',
+                               'rule: Servicio = Bueno and '
+                               'Comida = Deliciosa => Normal')
+        fis, _ = self.loader.load(text)
+        self.assertEqual(self.loader.parsed, 1)
+        self.assertSameModel(fis, text)
+
+        # Las entradas que no cambiaron se reutilizan
+        self.assertIs(fis.input_vars, self.fis.input_vars)
+        self.assertIs(fis.rules[0], self.fis.rules[0])
+        self.assertIs(fis.rule_set.evaluators[2],
+                      self.fis.rule_set.evaluators[2])
+
+        # La version anterior no cambia
+        self.assertSameModel(self.fis, PROPINA)
+
+    def test_changed_output(self):
+        text = PROPINA.replace('(Mucha) (trapecio: (18,0) (30,0) (24,1) '
+                               '(30,1))', '(Mucha) (triangulo: (18,0) '
+                                          '(30,0) (26,1))')
+        fis, _ = self.loader.load(text)
+        self.assertEqual(self.loader.parsed, 1)
+        self.assertIs(fis.input_vars, self.fis.input_vars)
+        self.assertSameModel(fis, text)
+
+    def test_errors(self):
+        self.assertRaises(ParseError, self.loader.load,
+                          PROPINA + 'rule: Servicio = Bueno => Poca =>')
+        self.assertRaises(ParseError, self.loader.load,
+                          PROPINA + 'rule: Servicio = Bueno => Muchisima')
+
+        # Consecuentes mezclados con funciones de membresia
+        mixed = PROPINA.replace('(Poca) (triangulo: (0,0) (12,0) (6,1))',
+                                '(Poca) (constante: (5))')
+        self.assertRaises(ParseError, self.loader.load, mixed)
+        self.assertRaises(ParseError, self.loader.load,
+                          mixed + 'rule: Comida = Rancia => Poca')
+
+        # Las lineas desconocidas solo son errores con 'strict'
+        text = PROPINA + 'nota: revisar\n'
+        self.assertSameModel(self.loader.load(text)[0], PROPINA)
+        self.assertRaises(ParseError, ModelLoader(strict=True).load, text)
+
+        # Los errores no afectan a las cargas siguientes
+        text = PROPINA + 'rule: Comida = Rancia => Poca'
+        fis, _ = self.loader.load(text)
+        self.assertSameModel(fis, text)
+
+
+class ModelHandleTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'propina.txt')
+        self.write(PROPINA)
+        self.handle = ModelHandle(self.path)
+
+    def tearDown(self):
+        self.handle.stop()
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        with open(self.path, 'w') as f:
+            f.write(text)
+
+    def test_reload(self):
+        values = {'Servicio': 3, 'Comida': 8}
+        old = self.handle.model
+        self.assertEqual(self.handle.version, 1)
+        self.assertEqual(self.handle.input_values, values)
+        self.assertFalse(self.handle.check())
+
+        text = PROPINA.replace('Bueno => Normal', 'Bueno => Mucha')
+        self.write(text)
+        self.assertTrue(self.handle.reload())
+        self.assertEqual(self.handle.version, 2)
+        self.assertFalse(self.handle.reload())
+        expected = FIS(*InputParser().parse(text)[:3])
+        self.assertEqual(self.handle.execute(values),
+                         expected.execute(values))
+
+        # Las ejecuciones que ya tenian el modelo anterior no cambian
+        self.assertEqual(old.execute(values),
+                         FIS(*InputParser().parse(PROPINA)[:3]).execute(
+                             values))
+
+    def test_invalid_version(self):
+        model = self.handle.model
+        self.write(PROPINA + 'rule: Servicio = Bueno =>')
+        self.assertFalse(self.handle.reload())
+        self.assertIsInstance(self.handle.error, ParseError)
+        self.assertIs(self.handle.model, model)
+
+        self.write(PROPINA + 'rule: Servicio = Bueno => Mucha')
+        self.assertTrue(self.handle.reload())
+        self.assertEqual(self.handle.error, None)
+
+    def test_missing_file(self):
+        os.remove(self.path)
+        self.assertRaises(Exception, ModelHandle, self.path)
+
+    def test_watch(self):
+        self.handle.watch(0.01)
+        self.write(PROPINA + 'rule: Servicio = Bueno => Mucha')
+        deadline = time.time() + 5
+        while self.handle.version == 1 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.handle.version, 2)
+
+    def test_server(self):
+        # 'evaluate' no usa el bucle de eventos
+        executor = BatchExecutor(self.handle, None)
+        rows = [{'Servicio': 3, 'Comida': 8}]
+        before = executor.evaluate(rows)
+
+        text = PROPINA.replace('Bueno => Normal', 'Bueno => Mucha')
+        self.write(text)
+        self.handle.reload()
+        expected = FIS(*InputParser().parse(text)[:3]).execute(rows[0])
+        self.assertNotEqual(before, [expected])
+        self.assertAlmostEqual(executor.evaluate(rows)[0], expected)
+        self.assertEqual(executor.stats()['version'], 2)
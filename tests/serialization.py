@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from fis.core import FIS
+from fis.parser import InputParser
+from fis.serialization import (save_compiled, load_compiled, HEADER, MAGIC,
+                                SECTIONS, VERSION)
+from tests.models import PROPINA, SUAVE
+
+
+class SerializationTests(unittest.TestCase):
+    def setUp(self):
+        input_vars, output_var, rules, self.input_values = \
+            InputParser().parse(PROPINA)
+        self.fis = FIS(input_vars, output_var, rules)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'propina.fisc')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_roundtrip(self):
+        save_compiled(self.fis, self.path)
+        fis = load_compiled(self.path)
+
+        self.assertEqual([v.name for v in fis.input_vars],
+                         [v.name for v in self.fis.input_vars])
+        self.assertEqual(fis.output_var.name, 'Propina')
+        self.assertEqual([str(r) for r in fis.rules],
+                         [str(r) for r in self.fis.rules])
+        self.assertEqual([str(r.evaluator) for r in fis.rules],
+                         [str(e) for e in self.fis.rule_set.evaluators])
+
+        for servicio in range(11):
+            for comida in range(11):
+                values = {'Servicio': servicio, 'Comida': comida}
+                self.assertEqual(fis.execute(values),
+                                 self.fis.execute(values))
+
+    def test_not_compiled(self):
+        with open(self.path, 'w') as f:
+            f.write(PROPINA)
+        self.assertRaises(Exception, load_compiled, self.path)
+
+    def test_unknown_version(self):
+        save_compiled(self.fis, self.path)
+        with open(self.path, 'r+b') as f:
+            f.write(HEADER.pack(MAGIC, VERSION + 1, len(SECTIONS)))
+        self.assertRaises(Exception, load_compiled, self.path)
+
+    def test_roundtrip_functions(self):
+        fis = FIS(*InputParser().parse(SUAVE)[:3])
+        save_compiled(fis, self.path)
+        loaded = load_compiled(self.path)
+
+        for servicio in range(-2, 12, 2):
+            for comida in range(-2, 12, 2):
+                values = {'Servicio': servicio, 'Comida': comida}
+                self.assertEqual(loaded.execute(values), fis.execute(values))
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import json
+import socket
+import threading
+import unittest
+from fis.core import FIS
+from fis.parser import InputParser
+from fis.server import asyncio, BatchExecutor, InferenceServer
+from tests.models import PROPINA
+
+
+class FakeFuture(object):
+    """
+    Lo minimo de 'asyncio.Future' que usa 'BatchExecutor'
+
+    """
+    def __init__(self):
+        self.value = None
+        self.error = None
+        self.finished = False
+
+    def done(self):
+        return self.finished
+
+    def set_result(self, value):
+        self.value = value
+        self.finished = True
+
+    def set_exception(self, error):
+        self.error = error
+        self.finished = True
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def exception(self):
+        return self.error
+
+
+class FakeHandle(object):
+    def cancel(self):
+        pass
+
+
+class FakeLoop(object):
+    """
+    Bucle sin eventos: los lotes se evaluan al llamar a 'flush'
+
+    """
+    def create_future(self):
+        return FakeFuture()
+
+    def call_later(self, delay, callback):
+        return FakeHandle()
+
+
+class FailingExecutor(BatchExecutor):
+    # Falla cualquier lote que contenga Servicio = 99
+    def evaluate(self, rows):
+        if any(row['Servicio'] == 99 for row in rows):
+            raise Exception('Fila invalida')
+        return BatchExecutor.evaluate(self, rows)
+
+
+class BatchExecutorTests(unittest.TestCase):
+    def setUp(self):
+        self.fis = FIS(*InputParser().parse(PROPINA)[:3])
+        self.executor = BatchExecutor(self.fis, FakeLoop(),
+                                      max_batch_size=100)
+
+    def test_evaluate(self):
+        rows = [{'Servicio': s, 'Comida': c}
+                for s in range(11) for c in (0, 5, 8)]
+        for row, value in zip(rows, self.executor.evaluate(rows)):
+            self.assertAlmostEqual(value, self.fis.execute(row))
+
+    def test_invalid_inputs(self):
+        rows = [{'Servicio': 3, 'Comida': 8}, {'Servicio': 3},
+                {'Servicio': 'tres', 'Comida': 8},
+                {'Servicio': True, 'Comida': 8}, [3, 8],
+                {'Servicio': 5, 'Comida': 2}]
+        futures = [self.executor.submit(row) for row in rows]
+        self.executor.flush()
+
+        self.assertAlmostEqual(futures[0].result(),
+                               self.fis.execute(rows[0]))
+        self.assertAlmostEqual(futures[5].result(),
+                               self.fis.execute(rows[5]))
+        self.assertIn('Comida', str(futures[1].exception()))
+        self.assertIn('Servicio', str(futures[2].exception()))
+        self.assertIn('Servicio', str(futures[3].exception()))
+        self.assertNotEqual(futures[4].exception(), None)
+        stats = self.executor.stats()
+        self.assertEqual((stats['requests'], stats['errors']), (2, 4))
+
+    def test_failed_batch(self):
+        executor = FailingExecutor(self.fis, FakeLoop(), max_batch_size=100)
+        rows = [{'Servicio': s, 'Comida': 8} for s in (1, 99, 4)]
+        futures = [executor.submit(row) for row in rows]
+        executor.flush()
+
+        # Solo falla la fila invalida
+        self.assertAlmostEqual(futures[0].result(),
+                               self.fis.execute(rows[0]))
+        self.assertEqual(str(futures[1].exception()), 'Fila invalida')
+        self.assertAlmostEqual(futures[2].result(),
+                               self.fis.execute(rows[2]))
+        self.assertEqual(executor.stats()['errors'], 1)
+
+
+@unittest.skipIf(asyncio is None, 'asyncio no esta disponible')
+class InferenceServerTests(unittest.TestCase):
+    options = {'max_batch_size': 8, 'max_wait': 0.01}
+
+    def setUp(self):
+        self.fis = FIS(*InputParser().parse(PROPINA)[:3])
+        self.loop = asyncio.new_event_loop()
+        self.server = InferenceServer(self.fis, loop=self.loop,
+                                      **self.options)
+        self.loop.run_until_complete(self.server.start())
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def request(self, messages):
+        """
+        Envia todas las peticiones por una conexion y devuelve las
+        respuestas
+
+        """
+        connection = socket.create_connection(('127.0.0.1',
+                                               self.server.port))
+        try:
+            data = ''.join(json.dumps(m) + '\n' for m in messages)
+            connection.sendall(data.encode('utf-8'))
+            f = connection.makefile('r')
+            return [json.loads(f.readline()) for _ in messages]
+        finally:
+            connection.close()
+
+    def test_execute(self):
+        inputs = [{'Servicio': s, 'Comida': 8} for s in range(11)]
+        responses = self.request([{'id': i, 'inputs': values}
+                                  for i, values in enumerate(inputs)])
+        for i, (values, response) in enumerate(zip(inputs, responses)):
+            self.assertEqual(response['id'], i)
+            self.assertAlmostEqual(response['value'],
+                                   self.fis.execute(values))
+
+        stats = self.request([{'command': 'stats'}])[0]['stats']
+        self.assertEqual(stats['requests'], len(inputs))
+        self.assertTrue(stats['batches'] < len(inputs))
+
+    def test_errors(self):
+        responses = self.request([{'id': 1, 'inputs': {'Servicio': 3}},
+                                  'texto'])
+        self.assertIn('Comida', responses[0]['error'])
+        self.assertIn('error', responses[1])
+
+
+class BackpressureTests(InferenceServerTests):
+    options = {'max_batch_size': 100, 'max_wait': 0.01, 'max_pending': 4}
+
+    def test_pause(self):
+        inputs = [{'Servicio': s % 11, 'Comida': 8} for s in range(50)]
+        responses = self.request([{'inputs': values} for values in inputs])
+        self.assertEqual(len(responses), len(inputs))
+        self.assertTrue(self.server.stats()['pauses'] > 0)
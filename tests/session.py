@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import random
+import unittest
+from fis.core import FIS
+from fis.parser import InputParser
+from tests.index import grid_model
+from tests.models import PROPINA
+
+
+class SessionTests(unittest.TestCase):
+    def setUp(self):
+        self.fis = FIS(*InputParser().parse(PROPINA)[:3])
+        self.session = self.fis.session({'Servicio': 3, 'Comida': 8})
+
+    def test_initial(self):
+        self.assertAlmostEqual(self.session.value,
+                               self.fis.execute({'Servicio': 3, 'Comida': 8}))
+        self.assertTrue(self.session.verify())
+
+    def test_update(self):
+        value = self.session.update(Servicio=7)
+        self.assertAlmostEqual(value,
+                               self.fis.execute({'Servicio': 7, 'Comida': 8}))
+        self.assertTrue(self.session.verify())
+
+        value = self.session.update({'Comida': 2}, Servicio=1)
+        self.assertAlmostEqual(value,
+                               self.fis.execute({'Servicio': 1, 'Comida': 2}))
+        self.assertTrue(self.session.verify())
+
+    def test_unchanged(self):
+        value = self.session.value
+        self.assertEqual(self.session.update(Servicio=3), value)
+
+    def test_random_updates(self):
+        fis = FIS(*InputParser().parse(grid_model(4, 4))[:3])
+        names = ['V%d' % i for i in range(4)]
+        rnd = random.Random(0)
+        session = fis.session(dict((name, 15) for name in names))
+
+        for _ in range(200):
+            changes = dict((name, rnd.uniform(-5, 45))
+                           for name in rnd.sample(names, rnd.randint(1, 2)))
+            value = session.update(**changes)
+            self.assertTrue(session.verify())
+            expected = fis.execute(session.input)
+            if expected is None:
+                self.assertEqual(value, None)
+            else:
+                self.assertAlmostEqual(value, expected)
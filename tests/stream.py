@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+from fis.core import FIS
+from fis.parser import InputParser
+from fis.stream import read_records, chunks, execute_stream, write_results
+from tests.models import PROPINA
+
+
+CSV = """Servicio,Comida
+3,8
+0,0
+10,10
+5,2.5
+"""
+
+
+class StreamTests(unittest.TestCase):
+    def setUp(self):
+        input_vars, output_var, rules, _ = InputParser().parse(PROPINA)
+        self.fis = FIS(input_vars, output_var, rules)
+
+    def test_read_records(self):
+        records = list(read_records(StringIO(CSV)))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[3], {'Servicio': 5, 'Comida': 2.5})
+
+    def test_chunks(self):
+        self.assertEqual(list(chunks(range(7), 3)),
+                         [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_execute_stream(self):
+        results = list(execute_stream(self.fis, read_records(StringIO(CSV)),
+                                      chunk_size=3))
+        self.assertEqual(len(results), 4)
+        for record, value in results:
+            expected = self.fis.execute(record)
+            if expected is None:
+                self.assertEqual(value, None)
+            else:
+                self.assertAlmostEqual(value, expected)
+
+    def test_execute_stream_lazy(self):
+        def records():
+            yield {'Servicio': 3, 'Comida': 8}
+            raise AssertionError('Se leyo mas de un bloque')
+
+        results = execute_stream(self.fis, records(), chunk_size=1)
+        record, _ = next(results)
+        self.assertEqual(record['Servicio'], 3)
+
+    def test_write_results(self):
+        f = StringIO()
+        write_results([({'Servicio': 3, 'Comida': 8}, 15.5),
+                       ({'Servicio': 0, 'Comida': 0}, None)],
+                      f, ['Servicio', 'Comida'], 'Propina')
+        self.assertEqual(f.getvalue(),
+                         'Servicio,Comida,Propina\n3,8,15.5\n0,0,\n')
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from fis.core import FIS
+from fis.parser import InputParser, ParseError
+from fis.serialization import save_compiled, load_compiled
+from fis.sugeno import ConstantConsequent, LinearConsequent
+from tests.models import PROPINA_SUGENO
+
+
+class SugenoTests(unittest.TestCase):
+    def setUp(self):
+        self.parser = InputParser()
+        self.fis = FIS(*self.parser.parse(PROPINA_SUGENO)[:3])
+
+    def test_parse_consequents(self):
+        result = self.parser.parse_function('constante: (5)')
+        self.assertIsInstance(result, ConstantConsequent)
+        self.assertEqual(result.value, 5)
+
+        result = self.parser.parse_function('lineal: -2 + Var1 - 0.5*Var2')
+        self.assertIsInstance(result, LinearConsequent)
+        self.assertEqual(result.constant, -2)
+        self.assertEqual(result.coefficients, [('Var1', 1), ('Var2', -0.5)])
+        self.assertEqual(result.evaluate({'Var1': 4, 'Var2': 2}), 1)
+
+        # Coeficientes con exponente
+        result = self.parser.parse_function('lineal: 1 + 2e-3*X - 1.5E+2*Y')
+        self.assertEqual(result.constant, 1)
+        self.assertEqual(result.coefficients, [('X', 2e-3), ('Y', -150)])
+
+        for text in ('lineal: 1 +', 'lineal: 2*', 'lineal: X Y + *3',
+                     'lineal: 1 + 2e-3**X'):
+            self.assertRaises(Exception, self.parser.parse_function, text)
+
+    def test_parameters(self):
+        result = self.parser.parse_function('lineal: -2 + Var1 - 0.5*Var2')
+        self.assertEqual(result.parameters(),
+                         [-2, 'Var1', 1, 'Var2', -0.5])
+        copy = LinearConsequent.from_parameters(result.parameters())
+        self.assertEqual(copy.constant, -2)
+        self.assertEqual(copy.coefficients, result.coefficients)
+
+    def test_parse_errors(self):
+        mixed = PROPINA_SUGENO.replace(
+            '(constante: (5))', '(triangulo: (0,0) (12,0) (6,1))')
+        self.assertRaises(ParseError, InputParser().parse, mixed)
+
+        unknown = PROPINA_SUGENO.replace('0.5*Comida', '0.5*Bebida')
+        self.assertRaises(ParseError, InputParser().parse, unknown)
+
+    def test_execute(self):
+        self.assertTrue(self.fis.sugeno)
+
+        # Servicio = 3: Malo = 0.5, Bueno = 1/3; Comida = 8: Deliciosa = 1
+        poca, normal, mucha = 5, 10 + 1.5 + 4, 15 + 4.5 - 8
+        expected = (0.5 * poca + normal / 3.0 + mucha) / (0.5 + 1 / 3.0 + 1)
+        self.assertAlmostEqual(
+            self.fis.execute({'Servicio': 3, 'Comida': 8}), expected)
+
+    def test_no_rule(self):
+        fis = FIS(*InputParser().parse(PROPINA_SUGENO.replace(
+            'rule: Servicio = Malo or Comida = Rancia => Poca\n', ''))[:3])
+        self.assertEqual(fis.execute({'Servicio': 1, 'Comida': 3}), None)
+
+    @unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+    def test_execute_batch(self):
+        grid = numpy.linspace(0, 10, 21)
+        servicio, comida = [a.ravel() for a in numpy.meshgrid(grid, grid)]
+        result = self.fis.execute_batch({'Servicio': servicio,
+                                         'Comida': comida})
+        for i in range(len(servicio)):
+            expected = self.fis.execute({'Servicio': servicio[i],
+                                         'Comida': comida[i]})
+            if expected is None:
+                self.assertTrue(numpy.isnan(result[i]))
+            else:
+                self.assertAlmostEqual(result[i], expected)
+
+    def test_serialization(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'sugeno.fisc')
+            save_compiled(self.fis, path)
+            fis = load_compiled(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertTrue(fis.sugeno)
+        for servicio in range(11):
+            values = {'Servicio': servicio, 'Comida': 8}
+            self.assertEqual(fis.execute(values), self.fis.execute(values))
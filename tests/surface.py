@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import shutil
+import tempfile
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from fis.core import FIS
+from fis.parser import InputParser
+from fis.surface import ControlSurface, universe
+from tests.models import PROPINA
+
+
+@unittest.skipIf(numpy is None, 'NumPy no esta instalado')
+class ControlSurfaceTests(unittest.TestCase):
+    def setUp(self):
+        self.fis = FIS(*InputParser().parse(PROPINA)[:3])
+        self.surface = ControlSurface.compile(self.fis, resolution=41)
+
+    def test_universe(self):
+        self.assertEqual(universe(self.fis.input_vars[0]), (0, 10))
+        self.assertEqual(self.surface.shape, (41, 41))
+
+    def test_vertices(self):
+        # En los puntos de la malla el resultado es exacto
+        for servicio in numpy.linspace(0, 10, 41)[::4]:
+            for comida in numpy.linspace(0, 10, 41)[::5]:
+                values = {'Servicio': servicio, 'Comida': comida}
+                expected = self.fis.execute(values)
+                if expected is None:
+                    continue
+                self.assertAlmostEqual(self.surface.lookup(values), expected)
+
+    def test_max_error(self):
+        # En los bordes del universo (0 y 10) las funciones valen 0 y el
+        # resultado salta, por lo que medimos el error en el interior
+        ranges = {'Servicio': (0.5, 9.5), 'Comida': (0.5, 9.5)}
+        surface = ControlSurface.compile(self.fis, resolution=37,
+                                         ranges=ranges)
+        self.assertTrue(0 < surface.max_error < 1)
+
+        rnd = random.Random(0)
+        for _ in range(200):
+            values = {'Servicio': rnd.uniform(0.5, 9.5),
+                      'Comida': rnd.uniform(0.5, 9.5)}
+            error = abs(surface.lookup(values) - self.fis.execute(values))
+            # El error medido es una estimacion, no una cota estricta
+            self.assertTrue(error <= 2 * surface.max_error)
+
+        finer = ControlSurface.compile(self.fis, resolution=145,
+                                       ranges=ranges)
+        self.assertTrue(finer.max_error < surface.max_error)
+
+    def test_out_of_range(self):
+        self.assertEqual(self.surface.lookup({'Servicio': -5, 'Comida': 20}),
+                         self.surface.lookup({'Servicio': 0, 'Comida': 10}))
+
+    def test_lookup_batch(self):
+        rnd = random.Random(1)
+        servicio = [rnd.uniform(-1, 11) for _ in range(100)]
+        comida = [rnd.uniform(-1, 11) for _ in range(100)]
+        result = self.surface.lookup_batch({'Servicio': servicio,
+                                            'Comida': comida})
+        for i in range(100):
+            expected = self.surface.lookup({'Servicio': servicio[i],
+                                            'Comida': comida[i]})
+            if expected is None:
+                self.assertTrue(numpy.isnan(result[i]))
+            else:
+                self.assertAlmostEqual(result[i], expected)
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'propina.npz')
+            self.surface.save(path)
+            surface = ControlSurface.load(path)
+
+            # Sin la extension '.npz'
+            other = os.path.join(directory, 'propina.surf')
+            self.surface.save(other)
+            self.assertEqual(sorted(os.listdir(directory)),
+                             ['propina.npz', 'propina.surf'])
+            loaded = ControlSurface.load(other)
+            self.assertEqual(loaded.names, self.surface.names)
+            numpy.testing.assert_array_equal(loaded.values,
+                                             self.surface.values)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(surface.names, self.surface.names)
+        self.assertEqual(surface.max_error, self.surface.max_error)
+        values = {'Servicio': 3.3, 'Comida': 7.1}
+        self.assertEqual(surface.lookup(values), self.surface.lookup(values))